@@ -0,0 +1,305 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import bisect
+import heapq
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Tuple
+
+import discord
+import apscheduler.executors.base
+import apscheduler.schedulers.base
+from apscheduler.util import astimezone
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bot")
+sys.path.append(BOT_DIR)
+
+TIMEZONE = astimezone("Asia/Taipei")
+# 模擬從星期一 00:00 開始，方便以時間戳計算一週中的位置
+START_TIME = datetime(2024, 1, 1, tzinfo=TIMEZONE)
+SECONDS_PER_WEEK = 7 * 24 * 60 * 60
+
+
+def import_bot_modules() -> None:
+    '''匯入機器人模組，模組匯入時會讀寫工作目錄中的設定、通知與日誌，需在切換到暫存目錄後呼叫'''
+    global bot_setting, NOTIFICATION_FILE_PATH, create_notification_dao
+    global channel_resolver, delivery_pipeline, notification_dispatcher, notification_manager
+    global to_slot, NotificationManager
+
+    from dao.bot_setting_dao import bot_setting
+    from dao.notification_dao_factory import NOTIFICATION_FILE_PATH, create_notification_dao
+    from core import channel_resolver, delivery_pipeline, notification_dispatcher, notification_manager
+    from core.notification_dispatcher import to_slot
+    from core.notification_manager import NotificationManager
+
+
+class VirtualClock:
+    '''虛擬時間 (unix 時間戳)，由 VirtualEventLoop 推進'''
+
+    def __init__(self, start: float) -> None:
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    @contextmanager
+    def install(self) -> Iterator[None]:
+        '''讓排程器、通知分派與發送管線使用虛擬時間'''
+        clock = self
+
+        class VirtualDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromtimestamp(clock.now, tz)
+
+        virtual_time = SimpleNamespace(time=self.time, monotonic=self.monotonic)
+        patches = [
+            (apscheduler.schedulers.base, "datetime", VirtualDatetime),
+            (apscheduler.executors.base, "datetime", VirtualDatetime),
+            (notification_dispatcher, "datetime", VirtualDatetime),
+            (delivery_pipeline, "time", virtual_time),
+            (channel_resolver, "time", virtual_time)
+        ]
+        originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+        for module, name, value in patches:
+            setattr(module, name, value)
+        try:
+            yield
+        finally:
+            for module, name, value in originals:
+                setattr(module, name, value)
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    '''沒有可執行的工作時直接將虛擬時間推進到下一個計時器，不實際等待'''
+
+    def __init__(self, clock: VirtualClock) -> None:
+        super().__init__()
+        self.clock = clock
+        # 虛擬時間以 unix 時間戳表示，預設的解析度小於浮點數精度會讓到期的計時器無法執行
+        self._clock_resolution = 1e-6
+
+    def time(self) -> float:
+        return self.clock.now
+
+    def _run_once(self) -> None:
+        # 與 BaseEventLoop 相同先移除已取消的計時器，避免跳到已取消的時間後實際等待下一個計時器
+        while self._scheduled and self._scheduled[0].cancelled():
+            self._timer_cancelled_count -= 1
+            handle = heapq.heappop(self._scheduled)
+            handle._scheduled = False
+        if not self._ready and self._scheduled:
+            self.clock.now = max(self.clock.now, self._scheduled[0].when())
+        super()._run_once()
+
+
+class FakeChannel(discord.TextChannel):
+    '''記錄收到的訊息與虛擬時間，發送耗時 send_latency 秒'''
+
+    def __init__(self, client: 'FakeClient', channel_id: int) -> None:
+        self.id = channel_id
+        self.client = client
+
+    async def send(self, content: str) -> None:
+        await asyncio.sleep(self.client.send_latency)
+        self.client.sent.append((self.client.clock.now, content))
+
+
+class FakeClient(discord.Client):
+    '''不連線的客戶端，所有頻道都需要 fetch_channel，每次耗時 fetch_latency 秒'''
+
+    def __init__(self, clock: VirtualClock, fetch_latency: float, send_latency: float) -> None:
+        super().__init__(intents=discord.Intents.none())
+        self.clock = clock
+        self.fetch_latency = fetch_latency
+        self.send_latency = send_latency
+        self.fetch_count = 0
+        # [(虛擬時間, 訊息)]
+        self.sent: List[Tuple[float, str]] = []
+
+    async def wait_until_ready(self) -> None:
+        return
+
+    def get_channel(self, channel_id: int) -> None:
+        return None
+
+    async def fetch_channel(self, channel_id: int) -> FakeChannel:
+        self.fetch_count += 1
+        await asyncio.sleep(self.fetch_latency)
+        return FakeChannel(self, channel_id)
+
+
+def generate_notification_data(count: int, channel_count: int, seed: int = 0) -> dict:
+    '''產生與 notification.json 結構相同的測試資料，訊息不重複以便對應排程時間'''
+    rng = random.Random(seed)
+    channel_ids = [rng.randrange(10 ** 17, 10 ** 18) for _ in range(channel_count)]
+    jdata: dict = {}
+    for i in range(count):
+        user_id = str(rng.randrange(10 ** 17, 10 ** 18))
+        jdata.setdefault(user_id, {})[f"notification {i}"] = {
+            "hour": rng.randrange(24),
+            "minute": rng.randrange(0, 60, 5),
+            "weekdays": sorted(rng.sample(range(1, 8), rng.randint(1, 7))),
+            "channel_id": rng.choice(channel_ids)
+        }
+    return jdata
+
+
+def get_message_slots(jdata: dict) -> Dict[str, List[int]]:
+    '''{訊息: 排序後的時段}'''
+    return {
+        message: sorted({to_slot(weekday, data["hour"], data["minute"]) for weekday in data["weekdays"]})
+        for notifications in jdata.values()
+        for message, data in notifications.items()
+    }
+
+
+def count_expected(message_slots: Dict[str, List[int]], start: float, end: float) -> int:
+    '''計算 (start, end] 之間應觸發的通知數量'''
+    expected = 0
+    for slots in message_slots.values():
+        for slot in slots:
+            fire_time = START_TIME.timestamp() + slot * 60
+            expected += int((end - fire_time) // SECONDS_PER_WEEK) - \
+                int((start - fire_time) // SECONDS_PER_WEEK)
+    return expected
+
+
+def get_skews(message_slots: Dict[str, List[int]], sent: List[Tuple[float, str]]) -> List[float]:
+    '''實際發送時間與最近一次排程時間的差 (秒)'''
+    skews = []
+    for sent_time, message in sent:
+        slots = message_slots[message]
+        offset = (sent_time - START_TIME.timestamp()) % SECONDS_PER_WEEK
+        index = bisect.bisect_right(slots, offset // 60) - 1
+        skews.append(offset - slots[index] * 60 if index >= 0 else offset + SECONDS_PER_WEEK - slots[-1] * 60)
+    return sorted(skews)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def measure_memory(clock: VirtualClock, args) -> Tuple[float, float]:
+    '''以另一個管理器載入所有通知，返回每則通知使用的記憶體與啟動時的峰值 (bytes)'''
+    manager = NotificationManager(FakeClient(clock, args.fetch_latency, args.send_latency))
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    await manager.start()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    manager.stop()
+    await manager.delivery_pipeline.close()
+    return (current - baseline) / args.count, (peak - baseline) / args.count
+
+
+async def run(clock: VirtualClock, args, message_slots: Dict[str, List[int]]) -> List[List[str]]:
+    # 啟動當下的時段不會觸發，先在模擬開始前測量記憶體
+    memory, peak_memory = (0.0, 0.0) if args.skip_memory else await measure_memory(clock, args)
+
+    client = FakeClient(clock, args.fetch_latency, args.send_latency)
+    manager = NotificationManager(client)
+
+    start = time.perf_counter()
+    await manager.start()
+    startup_time = time.perf_counter() - start
+
+    # 在虛擬時間中運行 hours 小時，再等待管線中的訊息發送完畢
+    # 提早一秒結束，避免停止時剛好有時段觸發
+    simulate_start = clock.now
+    start = time.perf_counter()
+    await asyncio.sleep(args.hours * 3600 - 1)
+    simulate_end = clock.now
+    while manager.delivery_pipeline.get_stats()["queue_depth"]:
+        await asyncio.sleep(1)
+    simulate_time = time.perf_counter() - start
+
+    manager.stop()
+    await manager.delivery_pipeline.close()
+
+    expected = count_expected(message_slots, simulate_start, simulate_end)
+    skews = get_skews(message_slots, client.sent)
+    stats = manager.delivery_pipeline.get_stats()
+    return [
+        ["notifications", str(args.count)],
+        ["backend", args.backend],
+        ["startup", f"{startup_time * 1000:.1f} ms ({args.count / startup_time:,.0f} notifications/s)"],
+        ["memory per notification", "-" if args.skip_memory else f"{memory:.0f} B (peak {peak_memory:.0f} B)"],
+        ["simulated", f"{args.hours} h in {simulate_time:.2f} s"],
+        ["sent / expected", f"{len(client.sent)} / {expected}"],
+        ["dispatch throughput", f"{len(client.sent) / simulate_time:,.0f} sends/s"],
+        ["fetch_channel calls", str(client.fetch_count)],
+        ["max queue depth", str(stats["max_queue_depth"])],
+        ["skew p50", f"{percentile(skews, 0.5):.3f} s"],
+        ["skew p99", f"{percentile(skews, 0.99):.3f} s"],
+        ["skew max", f"{skews[-1] if skews else 0.0:.3f} s"]
+    ]
+
+
+def create_dao(backend: str, jdata: dict):
+    '''將測試資料寫入 notification.json，再依 backend 建立 (或遷移成) 通知 DAO'''
+    with open(NOTIFICATION_FILE_PATH, "w", encoding="utf8") as file:
+        json.dump(jdata, file)
+
+    setting = bot_setting.get_dao_setting("notification")
+    setting["backend"] = backend
+    return create_notification_dao(setting)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="通知排程壓力測試")
+    parser.add_argument("--count", type=int, default=10000, help="通知數量")
+    parser.add_argument("--channels", type=int, default=1000, help="頻道數量")
+    parser.add_argument("--hours", type=float, default=24, help="模擬的時間 (小時)")
+    parser.add_argument("--fetch-latency", type=float, default=0.05, help="fetch_channel 耗時 (秒)")
+    parser.add_argument("--send-latency", type=float, default=0.02, help="send 耗時 (秒)")
+    parser.add_argument("--backend", choices=["json", "sqlite", "sharded"], default="json")
+    parser.add_argument("--skip-memory", action="store_true", help="不測量記憶體")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # 在暫存目錄執行，避免讀寫機器人實際的設定、通知與日誌
+    original_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="notification_load_test_")
+    try:
+        os.makedirs(os.path.join(work_dir, "data"))
+        os.chdir(work_dir)
+        import_bot_modules()
+
+        jdata = generate_notification_data(args.count, args.channels, args.seed)
+        message_slots = get_message_slots(jdata)
+        notification_manager.notification_dao = create_dao(args.backend, jdata)
+
+        clock = VirtualClock(START_TIME.timestamp())
+        loop = VirtualEventLoop(clock)
+        try:
+            with clock.install():
+                rows = loop.run_until_complete(run(clock, args, message_slots))
+        finally:
+            loop.close()
+            notification_manager.notification_dao.close()
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(2)]
+    for row in rows:
+        print("    ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
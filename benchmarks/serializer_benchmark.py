@@ -0,0 +1,84 @@
+import sys
+import json
+import random
+import timeit
+from typing import List
+
+sys.path.append("./bot")
+
+from dao.serializers import SERIALIZERS, Serializer, get_serializer  # noqa: E402
+
+SIZES = [100, 1000, 10000, 100000]
+REPEAT = 5
+
+
+class StdlibJsonSerializer(Serializer):
+    '''改寫前 BaseDAO 使用的標準庫 json，作為比較基準'''
+    name = "json (stdlib)"
+
+    def dumps(self, data: dict) -> bytes:
+        return json.dumps(data, indent=2).encode('utf8')
+
+    def loads(self, content: bytes) -> dict:
+        return json.loads(content)
+
+
+def generate_notification_data(count: int, seed: int = 0) -> dict:
+    '''產生與 notification.json 結構相同的測試資料'''
+    rng = random.Random(seed)
+    jdata: dict = {}
+    for i in range(count):
+        user_id = str(rng.randrange(10 ** 17, 10 ** 18))
+        jdata.setdefault(user_id, {})[f"notification {i}"] = {
+            "hour": rng.randrange(24),
+            "minute": rng.randrange(0, 60, 5),
+            "weekdays": sorted(rng.sample(range(1, 8), rng.randint(1, 7))),
+            "channel_id": rng.randrange(10 ** 17, 10 ** 18)
+        }
+    return jdata
+
+
+def benchmark(size: int) -> List[List[str]]:
+    '''測量各格式在指定資料量下的 dump、load 時間與檔案大小'''
+    jdata = generate_notification_data(size)
+    rows = []
+
+    for name in [StdlibJsonSerializer.name, *SERIALIZERS]:
+        try:
+            if name == StdlibJsonSerializer.name:
+                serializer = StdlibJsonSerializer()
+            else:
+                serializer = get_serializer(name)
+        except ImportError:
+            rows.append([str(size), name, "-", "-", "not installed"])
+            continue
+
+        content = serializer.dumps(jdata)
+        assert serializer.loads(content) == jdata, f"{name} is not lossless"
+
+        number = max(1, 10000 // size)
+        dump_time = min(timeit.repeat(
+            lambda: serializer.dumps(jdata), number=number, repeat=REPEAT)) / number
+        load_time = min(timeit.repeat(
+            lambda: serializer.loads(content), number=number, repeat=REPEAT)) / number
+
+        rows.append([
+            str(size),
+            name,
+            f"{dump_time * 1000:.3f} ms",
+            f"{load_time * 1000:.3f} ms",
+            f"{len(content) / 1024:.1f} KiB"
+        ])
+
+    return rows
+
+
+if __name__ == "__main__":
+    header = ["notifications", "format", "dump", "load", "size"]
+    rows = [header]
+    for size in SIZES:
+        rows.extend(benchmark(size))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("    ".join(cell.ljust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,84 @@
+import sys
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+sys.path.append("./bot")
+
+from apscheduler.triggers.base import BaseTrigger  # noqa: E402
+from apscheduler.triggers.cron import CronTrigger  # noqa: E402
+from apscheduler.util import astimezone  # noqa: E402
+from core.weekly_trigger import WeeklyTrigger, WEEKDAY_NAMES  # noqa: E402
+
+JOB_COUNT = 100000
+TIMEZONE = astimezone("Asia/Taipei")
+
+
+def generate_schedules(count: int, seed: int = 0) -> List[tuple]:
+    '''產生與通知設定相同的 (星期列表, 時, 分)'''
+    rng = random.Random(seed)
+    return [
+        (
+            sorted(rng.sample(range(1, 8), rng.randint(1, 7))),
+            rng.randrange(24),
+            rng.randrange(0, 60, 5)
+        )
+        for _ in range(count)
+    ]
+
+
+def create_cron_trigger(weekdays: List[int], hour: int, minute: int) -> CronTrigger:
+    '''改寫前 __add_weekly_job 建立 cron trigger 的方式'''
+    return CronTrigger(
+        day_of_week=",".join(WEEKDAY_NAMES[day - 1] for day in weekdays),
+        hour=hour,
+        minute=minute,
+        timezone=TIMEZONE
+    )
+
+
+def create_weekly_trigger(weekdays: List[int], hour: int, minute: int) -> WeeklyTrigger:
+    return WeeklyTrigger.from_weekdays(weekdays, hour, minute, TIMEZONE)
+
+
+def benchmark(name: str, factory: Callable[..., BaseTrigger], schedules: List[tuple]) -> tuple:
+    '''測量建立 trigger 與計算下次觸發時間的時間'''
+    now = datetime.now(TIMEZONE)
+
+    start = time.perf_counter()
+    triggers = [factory(*schedule) for schedule in schedules]
+    create_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fire_times = [trigger.get_next_fire_time(None, now) for trigger in triggers]
+    next_time = time.perf_counter() - start
+
+    # 模擬排程器觸發後以上次觸發時間計算下一次
+    start = time.perf_counter()
+    for trigger, fire_time in zip(triggers, fire_times):
+        trigger.get_next_fire_time(fire_time, fire_time + timedelta(seconds=1))
+    following_time = time.perf_counter() - start
+
+    row = [
+        name,
+        f"{create_time * 1000:.1f} ms",
+        f"{next_time * 1000:.1f} ms",
+        f"{following_time * 1000:.1f} ms",
+        f"{(create_time + next_time + following_time) * 1000:.1f} ms"
+    ]
+    return row, fire_times
+
+
+if __name__ == "__main__":
+    schedules = generate_schedules(JOB_COUNT)
+    header = ["trigger", "create", "first fire", "next fire", "total"]
+    cron_row, cron_fire_times = benchmark("CronTrigger", create_cron_trigger, schedules)
+    weekly_row, weekly_fire_times = benchmark("WeeklyTrigger", create_weekly_trigger, schedules)
+    assert cron_fire_times == weekly_fire_times, "WeeklyTrigger differs from CronTrigger"
+
+    rows = [header, cron_row, weekly_row]
+    print(f"{JOB_COUNT} jobs")
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("    ".join(cell.ljust(width) for cell, width in zip(row, widths)))
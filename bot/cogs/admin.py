@@ -1,29 +1,42 @@
 import os
+import re
 import sys
+import asyncio
 import discord
 import subprocess
+from datetime import datetime
 from discord import app_commands
 from utils.log_manager import bot_log
-from typing import List, TYPE_CHECKING
-from core.log_viewer import LogPageViewer
+from typing import List, Optional, TYPE_CHECKING
+from core.log_viewer import LogPageViewer, LOG_INDEX_DIR_PATH, is_log_segment
+from core.log_search import LogSearchPageViewer, LOG_LEVELS, search_log
 from dao.bot_setting_dao import bot_setting
+from utils.converters import list_to_table
 from ui.log_viewer_view import LogViewerView
 from core.cog_helpers.cog_extension import CogExtension
 from core.cog_helpers.command_checker import CommandChecker
+from core.cog_manager.config_reloader import ConfigReloader
 
 if TYPE_CHECKING:
     from core.bot import Bot
 
+# Discord 自動完成最多 25 個選項
+MAX_AUTOCOMPLETE_CHOICES = 25
+
+
 async def get_log_filenames(
     interaction: discord.Interaction,
     current: str
 ) -> List[app_commands.Choice]:
-    '''取得日誌檔案名稱列表'''
+    '''取得日誌檔案名稱列表，輪替後的分段會與原日誌一起顯示，不列出'''
     log_dir_path = bot_setting.get_log_dir_path()
-    filenames = os.listdir(log_dir_path)
+    filenames = sorted(
+        filename for filename in os.listdir(log_dir_path)
+        if not is_log_segment(filename) and current.lower() in filename.lower()
+    )
     choices = [
         app_commands.Choice(name=filename, value=filename)
-        for filename in filenames
+        for filename in filenames[:MAX_AUTOCOMPLETE_CHOICES]
     ]
     return choices
 
@@ -83,27 +96,151 @@ class Admin(CogExtension):
         user = interaction.user.name
         user_id = interaction.user.id
 
-        result = bot_setting.read()
+        await interaction.response.send_message("正在載入機器人設定...")
+        result = await ConfigReloader(self.bot).reload()
 
-        if result:
-            await interaction.response.send_message("載入機器人設定")
-            bot_log.info_cmd_load_conf(user, user_id)
-        else:
-            await interaction.response.send_message("載入機器人設定失敗")
+        if result is None:
+            await interaction.edit_original_response(content="載入機器人設定失敗")
             bot_log.error_cmd_load_conf(user, user_id)
+            return
+
+        changed_commands = [
+            f"{cog_name}: {', '.join(commands)}"
+            for cog_name, commands in result.changed_commands.items()
+        ]
+        rebound_cogs = [cog_name or "管理指令" for cog_name in result.rebound_cogs]
+        synced_guilds = [
+            "全局" if guild_id is None else str(guild_id)
+            for guild_id in result.synced_guilds
+        ]
+
+        msg = "載入機器人設定"
+        if changed_commands:
+            msg = msg + "\n更新權限：\n" + "\n".join(changed_commands)
+        if rebound_cogs:
+            msg = msg + "\n更新伺服器：" + "、".join(rebound_cogs)
+        if synced_guilds:
+            msg = msg + "\n同步伺服器：" + "、".join(synced_guilds)
+        if result.sync_errors:
+            errors = "\n".join(
+                f"{guild_id or '全局'}: {error}" for guild_id, error in result.sync_errors.items())
+            msg = msg + f"\n同步失敗\n```\n{errors}\n```"
+
+        await interaction.edit_original_response(content=msg)
+        bot_log.info_cmd_load_conf(user, user_id)
+
+    @check.roleauth
+    @app_commands.command(name="notification_stats", description="通知發送統計")
+    async def notification_stats(self, interaction: discord.Interaction):
+        notification_manager = self.bot.notification_manager
+        pipeline_stats = notification_manager.delivery_pipeline.get_stats()
+        resolver_stats = notification_manager.channel_resolver.get_stats()
+        metrics = notification_manager.delivery_pipeline.metrics
+        summary = metrics.get_summary()
+
+        def format_seconds(value):
+            return "-" if value is None else f"{value:g}s"
+
+        outcomes = "\n".join(
+            f"{outcome}: {count} (total {summary['totals'][outcome]})"
+            for outcome, count in summary["outcomes"].items()
+        )
+        lateness = ", ".join(
+            f"{name} {format_seconds(value)}" for name, value in summary["lateness"].items())
+        duration = ", ".join(
+            f"{name} {format_seconds(value)}" for name, value in summary["duration"].items())
+        lateness_histogram = list_to_table([
+            [label, str(count)] for label, count in metrics.format_histogram(metrics.lateness)
+        ])
+
+        content = (
+            f"最近 {summary['window'] // 60} 分鐘\n"
+            f"{outcomes}\n\n"
+            f"延遲: {lateness}\n"
+            f"耗時: {duration}\n"
+            f"{lateness_histogram}\n\n"
+            f"佇列: {pipeline_stats['queue_depth']} (最大 {pipeline_stats['max_queue_depth']})\n"
+            f"頻道快取: 命中 {resolver_stats['hits']}，未命中 {resolver_stats['misses']}"
+        )
+        await interaction.response.send_message(f"```\n{content}\n```", ephemeral=True)
 
     @check.roleauth
     @app_commands.command(name="log_viewer", description="日誌檢視器")
+    @app_commands.describe(page="頁數，預設為最新一頁")
     @app_commands.autocomplete(filename=get_log_filenames)
-    async def log_viewer(self, interaction: discord.Interaction, filename: str):
+    async def log_viewer(self, interaction: discord.Interaction, filename: str, page: Optional[int] = None):
         log_dir_path = bot_setting.get_log_dir_path()
         log_file_path = os.path.join(log_dir_path, filename)
+        if is_log_segment(filename):
+            await interaction.response.send_message("輪替後的分段已包含在原日誌中，請選擇原日誌", ephemeral=True)
+            return
+        index_path = os.path.join(LOG_INDEX_DIR_PATH, f"{os.path.basename(filename)}.idx")
+
+        # 第一次開啟大型日誌時建立索引需要讀取整個檔案
+        await interaction.response.defer()
+        log_page_viewer = await asyncio.to_thread(
+            LogPageViewer, log_file_path, 1990, index_path=index_path)
+        if page is not None:
+            log_page_viewer.go_to_page(page)
+
+        view = LogViewerView(log_page_viewer)
+        content = f"```js\n{log_page_viewer.get_page_content()}\n```"
 
-        log_page_viewer = LogPageViewer(log_file_path, 1990)
+        await interaction.followup.send(content, view=view)
+
+    @check.roleauth
+    @app_commands.command(name="log_search", description="搜尋日誌")
+    @app_commands.describe(
+        pattern="正規表達式",
+        level="最低日誌等級",
+        since="開始時間 (YYYY-MM-DD HH:MM)",
+        until="結束時間 (YYYY-MM-DD HH:MM)"
+    )
+    @app_commands.choices(level=[
+        app_commands.Choice(name=level, value=level) for level in LOG_LEVELS
+    ])
+    @app_commands.autocomplete(filename=get_log_filenames)
+    async def log_search(
+        self,
+        interaction: discord.Interaction,
+        filename: str,
+        pattern: Optional[str] = None,
+        level: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ):
+        log_dir_path = bot_setting.get_log_dir_path()
+        log_file_path = os.path.join(log_dir_path, filename)
+        if is_log_segment(filename):
+            await interaction.response.send_message("輪替後的分段已包含在原日誌中，請選擇原日誌", ephemeral=True)
+            return
+
+        try:
+            regex = re.compile(pattern) if pattern is not None else None
+        except re.error as e:
+            await interaction.response.send_message(f"正規表達式錯誤: {e}", ephemeral=True)
+            return
+
+        try:
+            since_time = datetime.strptime(since, "%Y-%m-%d %H:%M") if since is not None else None
+            until_time = datetime.strptime(until, "%Y-%m-%d %H:%M") if until is not None else None
+        except ValueError:
+            await interaction.response.send_message("時間格式錯誤，請使用 YYYY-MM-DD HH:MM", ephemeral=True)
+            return
+
+        # 在背景執行緒中從檔案末尾往前搜尋
+        await interaction.response.defer()
+        result = await asyncio.to_thread(
+            search_log, log_file_path, regex, level, since_time, until_time)
+        if not result.records:
+            await interaction.followup.send("找不到符合的日誌")
+            return
+
+        log_page_viewer = LogSearchPageViewer(result, 1990)
         view = LogViewerView(log_page_viewer)
         content = f"```js\n{log_page_viewer.get_page_content()}\n```"
 
-        await interaction.response.send_message(content, view=view)
+        await interaction.followup.send(content, view=view)
 
 
 async def setup(bot: 'Bot'):
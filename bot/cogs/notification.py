@@ -1,7 +1,7 @@
 import discord
 from typing import TYPE_CHECKING, List
 from discord import app_commands
-from dao.notification_dao import notification_dao
+from dao.notification_dao_factory import notification_dao
 from ui.notification_view import NotificationView
 from core.cog_helpers.cog_extension import CogExtension
 from core.cog_helpers.command_checker import CommandChecker
@@ -18,7 +18,7 @@ async def get_user_notifications(
     '''取得使用者的通知列表'''
     choices: List[app_commands.Choice] = []
 
-    notifications = notification_dao.get_user_notifications(interaction.user.id)
+    notifications = await notification_dao.aget_user_notifications(interaction.user.id)
     notifications.sort()
 
     for notification in notifications:
@@ -35,7 +35,7 @@ class Notification(CogExtension):
     @app_commands.command(name="list_notification", description="顯示所有通知訊息")
     async def list_notification(self, interaction: discord.Interaction):
         user_id = interaction.user.id
-        notifications = notification_dao.get_user_notifications(user_id)
+        notifications = await notification_dao.aget_user_notifications(user_id)
 
         embed = discord.Embed(title="📬 通知訊息", color=0x00ff00)
 
@@ -46,7 +46,7 @@ class Notification(CogExtension):
 
         for notification in sorted(notifications):
 
-            content = notification_dao.get_weekly_notification(user_id, notification)    
+            content = await notification_dao.aget_weekly_notification(user_id, notification)
             if content is None:
                 continue
 
@@ -72,7 +72,7 @@ class Notification(CogExtension):
     async def add_notification(self, interaction: discord.Interaction, message: str):
         user_id = interaction.user.id
         
-        notifications =  notification_dao.get_user_notifications(interaction.user.id)
+        notifications = await notification_dao.aget_user_notifications(interaction.user.id)
 
         if len(notifications) >= CHOICES_LIMIT:
             await interaction.response.send_message("通知數量已達上限", ephemeral=True)
@@ -82,7 +82,8 @@ class Notification(CogExtension):
             await interaction.response.send_message("已經有這個通知了", ephemeral=True)
             return
 
-        await interaction.response.send_message("# 新增通知", view=NotificationView(message, user_id), ephemeral=True)
+        view = await NotificationView.create(message, user_id)
+        await interaction.response.send_message("# 新增通知", view=view, ephemeral=True)
 
     @check.roleauth
     @app_commands.command(name="edit_notification", description="編輯通知訊息")
@@ -90,12 +91,13 @@ class Notification(CogExtension):
     async def edit_notification(self, interaction: discord.Interaction, message: str):
         user_id = interaction.user.id
         
-        notifications = notification_dao.get_user_notifications(interaction.user.id)
+        notifications = await notification_dao.aget_user_notifications(interaction.user.id)
         if message not in notifications:
             await interaction.response.send_message("沒有這個通知", ephemeral=True)
             return
         
-        await interaction.response.send_message("# 編輯通知", view=NotificationView(message, user_id), ephemeral=True)
+        view = await NotificationView.create(message, user_id)
+        await interaction.response.send_message("# 編輯通知", view=view, ephemeral=True)
 
     @check.roleauth
     @app_commands.command(name="del_notification", description="刪除通知訊息")
@@ -103,12 +105,12 @@ class Notification(CogExtension):
     async def del_notification(self, interaction: discord.Interaction, message: str):
         user_id = interaction.user.id
 
-        notifications = notification_dao.get_user_notifications(interaction.user.id)
+        notifications = await notification_dao.aget_user_notifications(interaction.user.id)
         if message not in notifications:
             await interaction.response.send_message("沒有這個通知", ephemeral=True)
             return
 
-        notification_dao.del_user_notification(interaction.user.id, message)
+        await notification_dao.adel_user_notification(interaction.user.id, message)
         self.bot.notification_manager.del_notification_job(user_id, message)
         await interaction.response.send_message("已經刪除這個通知", ephemeral=True)
 
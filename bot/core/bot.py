@@ -2,18 +2,17 @@ import os
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.log_manager import bot_log
+from utils.log_manager import bot_log, LogManager
 from typing import List, Dict, Optional
 from discord.ext.commands.cog import Cog
 from dao.bot_setting_dao import bot_setting
+from dao.dao_executor import dao_executor
+from dao.notification_dao_factory import notification_dao
 from utils.converters import guild_ids_to_guilds, list_to_table
 from .notification_manager import NotificationManager
 from .cog_manager.load_cog_contral_commands import LoadCogContralCommands
 
 
-COG_PATH = bot_setting.get_cog_dir_path()
-
-
 class Bot(commands.Bot):
 
     def __init__(self, intents: discord.Intents) -> None:
@@ -24,6 +23,9 @@ class Bot(commands.Bot):
 
 
     async def add_cog(self, cog: Cog):
+        # 一次寫入 cog 載入時缺少的權限位
+        bot_setting.save_missing_auth()
+
         cog_name = cog.__cog_name__
         guild_ids = bot_setting.get_cog_guilds(cog_name)
 
@@ -91,7 +93,7 @@ class Bot(commands.Bot):
         LoadCogContralCommands(self)
             
         # 載入 cog 命令
-        for filename in os.listdir(COG_PATH):
+        for filename in os.listdir(bot_setting.get_cog_dir_path()):
             if filename.endswith('.py'):
                 try:
                     await self.load_extension(f"cogs.{filename[:-3]}")
@@ -106,13 +108,29 @@ class Bot(commands.Bot):
         bot_log.info_start()
 
 
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self.notification_manager.channel_resolver.evict(channel.id)
+
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.notification_manager.channel_resolver.evict_guild(guild.id)
+
+
     async def close(self) -> None:
         bot_log.info_stop()
 
         if self.notification_manager:
             self.notification_manager.stop()
+            await self.notification_manager.delivery_pipeline.close()
+
+        # 等待排隊中的資料操作完成，再寫入尚未寫入的通知資料
+        dao_executor.shutdown(wait=True)
+        notification_dao.close()
 
         await super().close()
+
+        # 寫入背景日誌佇列中剩餘的日誌
+        LogManager.shutdown()
         
     
     async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError) -> None:
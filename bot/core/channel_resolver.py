@@ -0,0 +1,102 @@
+import time
+import discord
+from collections import OrderedDict
+from typing import Tuple, Optional
+
+CHANNEL_CACHE_SIZE = 1024
+CHANNEL_CACHE_TTL = 600.0
+
+
+class ChannelResolver:
+    """
+    頻道解析器
+    依序從 bot 快取、已取得頻道的 LRU 快取取得頻道，都沒有時才以 REST 取得
+
+    hits 為不需 REST 的次數，misses 為以 REST 取得的次數
+    """
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        max_size: int = CHANNEL_CACHE_SIZE,
+        ttl: float = CHANNEL_CACHE_TTL
+    ) -> None:
+        self.bot = bot
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # {頻道 ID: (頻道, 過期時間)}
+        self.__cache: OrderedDict[int, Tuple[discord.abc.Messageable, float]] = OrderedDict()
+
+    async def resolve(self, channel_id: int) -> Optional[discord.abc.Messageable]:
+        '''取得頻道，頻道不存在時返回 None，無權限時拋出 discord.Forbidden'''
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            self.hits += 1
+            return channel
+
+        channel = self.__get_cache(channel_id)
+        if channel is not None:
+            self.hits += 1
+            return channel
+
+        self.misses += 1
+        try:
+            channel = await self.bot.fetch_channel(channel_id)
+        except discord.NotFound:
+            self.evict(channel_id)
+            return None
+        except discord.Forbidden:
+            # 無權限時交由呼叫端記錄為 forbidden
+            self.evict(channel_id)
+            raise
+
+        self.__set_cache(channel_id, channel)
+        return channel
+
+    def evict(self, channel_id: int) -> None:
+        '''移除快取的頻道，頻道刪除或無法發送時使用'''
+        self.__cache.pop(channel_id, None)
+
+    def evict_guild(self, guild_id: int) -> None:
+        '''移除快取中屬於該伺服器的頻道，離開伺服器時使用'''
+        for channel_id, (channel, _) in list(self.__cache.items()):
+            guild = getattr(channel, "guild", None)
+            if guild is not None and guild.id == guild_id:
+                del self.__cache[channel_id]
+
+    def clear(self) -> None:
+        '''清除所有快取'''
+        self.__cache.clear()
+
+    def get_stats(self) -> dict:
+        '''取得快取統計'''
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.__cache)
+        }
+
+    def __get_cache(self, channel_id: int) -> Optional[discord.abc.Messageable]:
+        '''取得未過期的快取頻道'''
+        item = self.__cache.get(channel_id)
+        if item is None:
+            return None
+
+        channel, expire_time = item
+        if expire_time <= time.monotonic():
+            del self.__cache[channel_id]
+            return None
+
+        self.__cache.move_to_end(channel_id)
+        return channel
+
+    def __set_cache(self, channel_id: int, channel: discord.abc.Messageable) -> None:
+        '''加入快取，超過上限時移除最久未使用的頻道'''
+        self.__cache[channel_id] = (channel, time.monotonic() + self.ttl)
+        self.__cache.move_to_end(channel_id)
+        while len(self.__cache) > self.max_size:
+            self.__cache.popitem(last=False)
@@ -1,41 +1,73 @@
 import os
 import inspect
+from typing import Dict, List, Callable
 from discord import app_commands
-from dao.bot_setting_dao import bot_setting
+from dao.bot_setting_dao import bot_setting, CommandAuth
 
 class CommandChecker:
+    # 所有 cog 的 CommandChecker，重新載入設定時用於重建權限判定
+    checkers: Dict[str, 'CommandChecker'] = {}
+
     def __init__(self) -> None:
-        '''初始化 Cog 名稱，並創建 Cog 設定'''
+        '''初始化 Cog 名稱，並登記 Cog 設定'''
         file_path = inspect.stack()[1].filename
         filename = os.path.basename(file_path)
         filename, _ = os.path.splitext(filename)
         self.cog_name = filename
-        bot_setting.create_cog(self.cog_name)
+        bot_setting.register_cog(self.cog_name)
+
+        self.commands: List[app_commands.Command] = []
+        # 指令目前套用的權限與添加的判定
+        self.__auths: Dict[str, CommandAuth] = {}
+        self.__checks: Dict[str, List[Callable]] = {}
+        CommandChecker.checkers[self.cog_name] = self
 
     def roleauth(self, func: app_commands.Command):
         '''斜線指令添加權限判定'''
+        self.commands.append(func)
+        self.__apply_auth(func, bot_setting.get_command_auth(self.cog_name, func.name))
+        return func
+
+    def refresh(self) -> List[str]:
+        '''依目前設定重建權限有變更的指令判定
+
+        指令的 checks 與 extras 由 cog 實例中的副本共用，會一併更新
+
+        Return
+        ----------
+        權限有變更的指令名稱
+        '''
+        changed_commands = []
+        for func in self.commands:
+            auth = bot_setting.get_command_auth(self.cog_name, func.name)
+            if auth != self.__auths.get(func.name):
+                self.__apply_auth(func, auth)
+                changed_commands.append(func.name)
+        return changed_commands
+
+    def __apply_auth(self, func: app_commands.Command, auth: CommandAuth) -> None:
+        '''移除先前添加的權限判定，再依 auth 添加'''
+        old_checks = self.__checks.get(func.name, [])
+        func.checks[:] = [check for check in func.checks if check not in old_checks]
+        func.extras.pop("roles", None)
+        func.extras.pop("permissions", None)
+        check_count = len(func.checks)
+
         # 身份組
-        roles = bot_setting.get_cog_command_roles(
-            self.cog_name, func.name)
-        if not roles:
-            roles = bot_setting.get_cog_roles(self.cog_name)
-        if roles == [None]:
-            # 拒絕所有身分組
+        if auth.roles == frozenset([None]):
+            # 只有 null 時拒絕所有身分組
             func = app_commands.checks.has_any_role()(func)
             func.extras["roles"] = [None]
-        elif roles:
+        elif auth.roles:
             # 添加身份組判定
-            func = app_commands.checks.has_any_role(*roles)(func)
-            func.extras["roles"] = roles
+            func = app_commands.checks.has_any_role(*auth.roles)(func)
+            func.extras["roles"] = auth.roles
 
         # 權限
-        permissions = bot_setting.get_cog_command_permissions(
-            self.cog_name, func.name)
-        if not permissions:
-            permissions = bot_setting.get_cog_permissions(self.cog_name)
-        if permissions:
+        if auth.permissions:
             # 添加權限判定
-            func = app_commands.checks.has_permissions(**permissions)(func)
-            func.extras["permissions"] = permissions
+            func = app_commands.checks.has_permissions(**auth.permissions)(func)
+            func.extras["permissions"] = auth.permissions
 
-        return func
\ No newline at end of file
+        self.__auths[func.name] = auth
+        self.__checks[func.name] = func.checks[check_count:]
@@ -8,8 +8,6 @@ if TYPE_CHECKING:
     from ..bot import Bot
 
 
-COG_PATH = bot_setting.get_cog_dir_path()
-
 class CogInfoInspector:
     '''檢查 cogs 的資訊'''
 
@@ -30,7 +28,7 @@ class CogInfoInspector:
     def get_unload_cogs(self) -> List[str]:
         '''獲取未載入的 cogs'''
         unload_cogs = []
-        for filename in os.listdir(COG_PATH):
+        for filename in os.listdir(bot_setting.get_cog_dir_path()):
             if filename.endswith('.py') and filename[:-3] not in self.get_load_cogs():
                 unload_cogs.append(filename[:-3])
         unload_cogs.sort()
@@ -39,7 +37,8 @@ class CogInfoInspector:
 
     def get_cog_doc(self, cog_name: str) -> str:
         '''獲取 cogs 說明資訊'''
-        with open(f"{COG_PATH}/{cog_name}" + ".py", "r", encoding="UTF-8") as f:
+        cog_path = bot_setting.get_cog_dir_path()
+        with open(f"{cog_path}/{cog_name}" + ".py", "r", encoding="UTF-8") as f:
             code = f.read()
         cog_info = re.search(r'__doc__.?=.?"(.+)"', code)
 
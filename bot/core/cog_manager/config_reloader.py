@@ -0,0 +1,121 @@
+import discord
+from discord import app_commands
+from utils.log_manager import bot_log
+from dao.bot_setting_dao import bot_setting
+from utils.converters import guild_ids_to_guilds
+from typing import Dict, List, Optional, Set, NamedTuple, TYPE_CHECKING
+from ..cog_helpers.command_checker import CommandChecker
+from .load_cog_contral_commands import LoadCogContralCommands
+
+if TYPE_CHECKING:
+    from ..bot import Bot
+
+
+class ReloadResult(NamedTuple):
+    '''重新載入設定的結果'''
+    # 權限判定有變更的指令 {cog 名稱: [指令名稱]}
+    changed_commands: Dict[str, List[str]]
+    # 綁定伺服器有變更的 cog，管理指令為 None
+    rebound_cogs: List[str | None]
+    # 有同步指令的伺服器 ID，全局為 None
+    synced_guilds: List[int | None]
+    # 同步失敗的 {伺服器 ID: 錯誤訊息}
+    sync_errors: Dict[int | None, str]
+
+
+class ConfigReloader:
+    '''不重啟機器人重新載入設定
+
+    比對載入前後的設定，原地重建有變更的指令權限判定與綁定伺服器，
+    只同步指令組成有變更的伺服器，權限判定在本地執行不需同步
+
+    DAO 的儲存設定 (dao_setting)、通知排程 (notification_scheduler) 與日誌 (log) 的設定需重啟後才會生效
+    '''
+
+    def __init__(self, bot: 'Bot') -> None:
+        self.bot = bot
+
+    async def reload(self) -> Optional[ReloadResult]:
+        '''重新載入設定，讀取失敗時返回 None'''
+        old_cog_guilds = self.__get_cog_guilds()
+        old_admin_guilds = list(bot_setting.get_admin_guilds())
+
+        if not await bot_setting.aread():
+            return None
+
+        # 重建權限判定
+        changed_commands: Dict[str, List[str]] = {}
+        for cog_name, checker in CommandChecker.checkers.items():
+            commands = checker.refresh()
+            if commands:
+                changed_commands[cog_name] = commands
+        LoadCogContralCommands.update_extras(self.bot.cog_contral_commands)
+
+        # 重新綁定伺服器
+        rebound_cogs: List[str | None] = []
+        changed_guilds: Set[int | None] = set()
+
+        new_cog_guilds = self.__get_cog_guilds()
+        for cog_name, cog in self.bot.cogs.items():
+            old_guilds = old_cog_guilds.get(cog_name, [])
+            new_guilds = new_cog_guilds[cog_name]
+            if set(old_guilds) != set(new_guilds):
+                changed_guilds |= self.__rebind_commands(
+                    cog.get_app_commands(), old_guilds, new_guilds)
+                rebound_cogs.append(cog_name)
+
+        new_admin_guilds = list(bot_setting.get_admin_guilds())
+        if set(old_admin_guilds) != set(new_admin_guilds):
+            changed_guilds |= self.__rebind_commands(
+                self.bot.cog_contral_commands, old_admin_guilds, new_admin_guilds)
+            rebound_cogs.append(None)
+
+        # 只同步指令組成有變更的伺服器
+        sync_errors: Dict[int | None, str] = {}
+        for guild_id in changed_guilds:
+            guild = None if guild_id is None else discord.Object(id=guild_id)
+            server_name = "Global" if guild_id is None else str(guild_id)
+            try:
+                await self.bot.tree.sync(guild=guild)
+            except Exception as e:
+                sync_errors[guild_id] = str(e)
+                bot_log.error_sync_command(server_name, e)
+
+        return ReloadResult(
+            changed_commands=changed_commands,
+            rebound_cogs=rebound_cogs,
+            synced_guilds=sorted(changed_guilds, key=lambda guild_id: guild_id or 0),
+            sync_errors=sync_errors
+        )
+
+    def __get_cog_guilds(self) -> Dict[str, List[int]]:
+        '''取得已載入 cog 目前綁定的伺服器'''
+        return {
+            cog_name: list(bot_setting.get_cog_guilds(cog_name))
+            for cog_name in self.bot.cogs
+        }
+
+    def __rebind_commands(
+        self,
+        commands: List[app_commands.Command | app_commands.Group],
+        old_guild_ids: List[int],
+        new_guild_ids: List[int]
+    ) -> Set[int | None]:
+        '''將指令從原本的伺服器移到新的伺服器，未設定伺服器時為全局指令
+
+        Return
+        ----------
+        指令組成有變更的伺服器 ID，全局為 None
+        '''
+        old_guilds: Set[int | None] = set(old_guild_ids) or {None}
+        new_guilds: Set[int | None] = set(new_guild_ids) or {None}
+
+        for command in commands:
+            for guild_id in old_guilds - new_guilds:
+                guild = None if guild_id is None else discord.Object(id=guild_id)
+                self.bot.tree.remove_command(command.name, guild=guild)
+
+            self.bot.tree.add_command(
+                command, guilds=guild_ids_to_guilds(new_guild_ids), override=True)
+
+        return old_guilds ^ new_guilds
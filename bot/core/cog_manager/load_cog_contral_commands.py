@@ -1,6 +1,6 @@
 import re
 import discord
-from typing import TYPE_CHECKING
+from typing import List, TYPE_CHECKING
 from discord import app_commands
 from utils.log_manager import bot_log
 from dao.bot_setting_dao import bot_setting
@@ -12,32 +12,57 @@ if TYPE_CHECKING:
     from ..bot import Bot
 
 
-ADMIN_ROLES = bot_setting.get_admin_roles()
-ADMIN_GUILD_IDS = bot_setting.get_admin_guilds()
-ADMIN_GUILDS = guild_ids_to_guilds(ADMIN_GUILD_IDS)
+class LoadCogContralCommands():
+    '''加載 Cog 控制指令
 
+    管理身份組在執行時依目前設定判定，管理伺服器變更時由 ConfigReloader 重新綁定
+    '''
 
-class LoadCogContralCommands():
-    '''加載 Cog 控制指令'''
+    @staticmethod
+    def is_admin(interaction: discord.Interaction) -> bool:
+        '''使用者是否屬於管理身份組，未設定管理身份組時皆可使用'''
+        admin_roles = bot_setting.get_admin_roles()
+        return not admin_roles or (
+            isinstance(interaction.user, discord.Member) and
+            any(role.id in admin_roles for role in interaction.user.roles)
+        )
+
+    @staticmethod
+    def __check_admin_roles(interaction: discord.Interaction) -> bool:
+        '''管理身份組判定，失敗時的錯誤與 has_any_role 相同'''
+        admin_roles = bot_setting.get_admin_roles()
+        if not admin_roles:
+            return True
+        if not isinstance(interaction.user, discord.Member):
+            raise app_commands.NoPrivateMessage()
+        if LoadCogContralCommands.is_admin(interaction):
+            return True
+        raise app_commands.MissingAnyRole(admin_roles)
 
     @staticmethod
     def check_roleauth(func):
         '''設置指令伺服器和身份組'''
-        if ADMIN_GUILDS:
-            func = app_commands.guilds(*ADMIN_GUILDS)(func)
-        if ADMIN_ROLES:
-            func = app_commands.checks.has_any_role(*ADMIN_ROLES)(func)
-        return func
+        admin_guilds = guild_ids_to_guilds(bot_setting.get_admin_guilds())
+        if admin_guilds:
+            func = app_commands.guilds(*admin_guilds)(func)
+        return app_commands.check(LoadCogContralCommands.__check_admin_roles)(func)
+
+    @staticmethod
+    def update_extras(commands: List[app_commands.Command]) -> None:
+        '''更新管理指令記錄的身份組，供 help 指令判斷'''
+        admin_roles = bot_setting.get_admin_roles()
+        for command in commands:
+            if admin_roles:
+                command.extras["roles"] = list(admin_roles)
+            else:
+                command.extras.pop("roles", None)
 
     def __init__(self, bot: 'Bot'):
         self.bot = bot
 
         async def unload_cogs_to_options(interaction: discord.Interaction, current: str = ""):
             '''轉換未載入 cogs 為命令選項'''
-            if ADMIN_ROLES and not (
-                isinstance(interaction.user, discord.Member) and
-                any(role.id in ADMIN_ROLES for role in interaction.user.roles)
-            ):
+            if not LoadCogContralCommands.is_admin(interaction):
                 return []
 
             cog_info_inspector = CogInfoInspector(self.bot)
@@ -52,10 +77,7 @@ class LoadCogContralCommands():
 
         async def load_cogs_to_options(interaction: discord.Interaction, current: str = ""):
             '''轉換載入 cogs 為命令選項'''
-            if ADMIN_ROLES and not (
-                isinstance(interaction.user, discord.Member) and
-                any(role.id in ADMIN_ROLES for role in interaction.user.roles)
-            ):
+            if not LoadCogContralCommands.is_admin(interaction):
                 return []
 
             cog_info_inspector = CogInfoInspector(self.bot)
@@ -70,10 +92,7 @@ class LoadCogContralCommands():
 
         async def get_bot_guilds_options(interaction: discord.Interaction, current: str):
             '''轉換伺服器為命令選項'''
-            if ADMIN_ROLES and not (
-                isinstance(interaction.user, discord.Member) and
-                any(role.id in ADMIN_ROLES for role in interaction.user.roles)
-            ):
+            if not LoadCogContralCommands.is_admin(interaction):
                 return []
 
             guilds = [app_commands.Choice(name="全部伺服器", value="全部伺服器")]
@@ -192,4 +211,8 @@ class LoadCogContralCommands():
             await interaction.response.send_message("開始同步")
             bot_log.info_cmd_sync_command(server, user, user_id)
 
-            await sync_message_handler.sync_message(interaction, guild_id=guild_id)
\ No newline at end of file
+            await sync_message_handler.sync_message(interaction, guild_id=guild_id)
+
+        self.bot.cog_contral_commands.extend(
+            [print_cogs, load_cog, reload_cog, unload_cog, sync_commands])
+        LoadCogContralCommands.update_extras(self.bot.cog_contral_commands)
@@ -0,0 +1,170 @@
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 延遲與耗時的分組上限 (秒)，超過最後一個值的歸入最後一組
+LATENESS_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_WINDOW = 3600
+METRICS_RESOLUTION = 60
+
+OUTCOMES = ("sent", "channel_missing", "forbidden", "rate_limited", "error")
+
+
+class RollingHistogram:
+    '''以固定分組統計數值分布，只保留最近 window 秒的資料
+
+    資料以 resolution 秒為一格存放，過期時整格移除
+    '''
+
+    def __init__(
+        self,
+        buckets: Sequence[float],
+        window: int = METRICS_WINDOW,
+        resolution: int = METRICS_RESOLUTION
+    ) -> None:
+        self.buckets = tuple(buckets)
+        self.window = window
+        self.resolution = resolution
+        # {格子編號: [各分組數量]}
+        self.__frames: Dict[int, List[int]] = {}
+
+    def add(self, value: float, now: Optional[float] = None) -> None:
+        '''加入一個數值'''
+        frame = self.__get_frame(now)
+        for index, upper in enumerate(self.buckets):
+            if value <= upper:
+                frame[index] += 1
+                return
+        frame[-1] += 1
+
+    def get_counts(self, now: Optional[float] = None) -> List[int]:
+        '''取得視窗內各分組的數量，最後一組為超過所有分組上限的數量'''
+        self.__prune(now)
+        counts = [0] * (len(self.buckets) + 1)
+        for frame in self.__frames.values():
+            for index, count in enumerate(frame):
+                counts[index] += count
+        return counts
+
+    def quantile(self, q: float, now: Optional[float] = None) -> Optional[float]:
+        '''估計視窗內的分位數，返回所在分組的上限，超過所有分組時返回 inf，沒有資料時返回 None'''
+        counts = self.get_counts(now)
+        total = sum(counts)
+        if total == 0:
+            return None
+
+        target = q * total
+        accumulated = 0
+        for index, count in enumerate(counts):
+            accumulated += count
+            if accumulated >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def __get_frame(self, now: Optional[float]) -> List[int]:
+        '''取得目前時間的格子'''
+        self.__prune(now)
+        frame_index = int((time.time() if now is None else now) // self.resolution)
+        return self.__frames.setdefault(frame_index, [0] * (len(self.buckets) + 1))
+
+    def __prune(self, now: Optional[float]) -> None:
+        '''移除超出視窗的格子'''
+        frame_index = int((time.time() if now is None else now) // self.resolution)
+        oldest = frame_index - self.window // self.resolution
+        for index in [index for index in self.__frames if index <= oldest]:
+            del self.__frames[index]
+
+
+class RollingCounter:
+    '''只保留最近 window 秒的計數'''
+
+    def __init__(self, window: int = METRICS_WINDOW, resolution: int = METRICS_RESOLUTION) -> None:
+        self.window = window
+        self.resolution = resolution
+        self.__frames: Dict[int, Counter] = {}
+
+    def add(self, key: str, now: Optional[float] = None) -> None:
+        '''計數加一'''
+        frame_index = self.__prune(now)
+        self.__frames.setdefault(frame_index, Counter())[key] += 1
+
+    def get_counts(self, now: Optional[float] = None) -> Counter:
+        '''取得視窗內的計數'''
+        self.__prune(now)
+        counts = Counter()
+        for frame in self.__frames.values():
+            counts.update(frame)
+        return counts
+
+    def __prune(self, now: Optional[float]) -> int:
+        '''移除超出視窗的格子，返回目前的格子編號'''
+        frame_index = int((time.time() if now is None else now) // self.resolution)
+        oldest = frame_index - self.window // self.resolution
+        for index in [index for index in self.__frames if index <= oldest]:
+            del self.__frames[index]
+        return frame_index
+
+
+class DeliveryMetrics:
+    """
+    通知發送統計
+    記錄每次發送的結果、實際發送時間與排程時間的延遲、發送耗時
+
+    結果
+    ------
+    sent: 發送成功
+    channel_missing: 頻道不存在或無法發送訊息
+    forbidden: 沒有發送權限
+    rate_limited: 重試後仍受速率限制
+    error: 其他錯誤
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW, resolution: int = METRICS_RESOLUTION) -> None:
+        self.window = window
+        self.totals: Counter = Counter()
+        self.outcomes = RollingCounter(window, resolution)
+        self.lateness = RollingHistogram(LATENESS_BUCKETS, window, resolution)
+        self.duration = RollingHistogram(DURATION_BUCKETS, window, resolution)
+
+    def record(
+        self,
+        outcome: str,
+        scheduled_time: float,
+        sent_time: float,
+        duration: float
+    ) -> None:
+        '''記錄一次發送，時間皆為 unix 時間戳 (秒)'''
+        self.totals[outcome] += 1
+        self.outcomes.add(outcome, sent_time)
+        self.lateness.add(max(sent_time - scheduled_time, 0.0), sent_time)
+        self.duration.add(duration, sent_time)
+
+    def get_summary(self, now: Optional[float] = None) -> dict:
+        '''取得視窗內的統計摘要'''
+        outcomes = self.outcomes.get_counts(now)
+        return {
+            "window": self.window,
+            "outcomes": {outcome: outcomes.get(outcome, 0) for outcome in OUTCOMES},
+            "totals": {outcome: self.totals.get(outcome, 0) for outcome in OUTCOMES},
+            "lateness": self.__get_quantiles(self.lateness, now),
+            "duration": self.__get_quantiles(self.duration, now)
+        }
+
+    @staticmethod
+    def __get_quantiles(histogram: RollingHistogram, now: Optional[float]) -> Dict[str, Optional[float]]:
+        '''取得中位數、p90、p99'''
+        return {
+            "p50": histogram.quantile(0.5, now),
+            "p90": histogram.quantile(0.9, now),
+            "p99": histogram.quantile(0.99, now)
+        }
+
+    @staticmethod
+    def format_histogram(histogram: RollingHistogram, unit: str = "s") -> List[Tuple[str, int]]:
+        '''將分組轉換為 (分組名稱, 數量)'''
+        counts = histogram.get_counts()
+        labels = [f"<={upper:g}{unit}" for upper in histogram.buckets]
+        labels.append(f">{histogram.buckets[-1]:g}{unit}")
+        return list(zip(labels, counts))
@@ -0,0 +1,185 @@
+import time
+import asyncio
+import discord
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+from utils.log_manager import bot_log
+from .delivery_metrics import DeliveryMetrics
+
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 3
+DEFAULT_RETRY_AFTER = 1.0
+LATENCY_SAMPLES = 1000
+
+
+class ChannelMissing(Exception):
+    '''頻道不存在或無法發送訊息'''
+
+    def __init__(self, channel_id: int) -> None:
+        super().__init__(f"Channel {channel_id} is missing or not messageable")
+        self.channel_id = channel_id
+
+
+class DeliveryPipeline:
+    """
+    通知發送管線
+    同一頻道的訊息依序發送，所有頻道同時發送的數量不超過 max_concurrency，
+    遇到速率限制時依 Retry-After 等待後重試
+
+    統計
+    ------
+    queue_depth: 等待發送的訊息數量
+    latency: 加入管線到發送完成的時間 (秒)
+    metrics: 每次發送的結果、與排程時間的延遲及耗時
+    """
+
+    def __init__(
+        self,
+        send_func: Callable[[int, str], Awaitable[None]],
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES
+    ) -> None:
+        self.send_func = send_func
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.__semaphore = asyncio.Semaphore(max_concurrency)
+
+        # {頻道 ID: [(訊息, 排程時間戳, 加入時間, 發送結果)]}
+        self.__queues: Dict[int, Deque[Tuple[str, float, float, asyncio.Future]]] = {}
+        self.__workers: Dict[int, asyncio.Task] = {}
+
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.delivered = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.metrics = DeliveryMetrics()
+
+    async def send(self, channel_id: int, message: str, scheduled_time: Optional[float] = None) -> None:
+        '''加入發送佇列，並等待發送完成，發送失敗時拋出例外
+
+        scheduled_time 為排程發送的 unix 時間戳，未設定時為加入佇列的時間
+        '''
+        if scheduled_time is None:
+            scheduled_time = time.time()
+
+        future = asyncio.get_running_loop().create_future()
+        self.__queues.setdefault(channel_id, deque()).append(
+            (message, scheduled_time, time.monotonic(), future))
+
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        if channel_id not in self.__workers:
+            self.__workers[channel_id] = asyncio.create_task(self.__run_channel(channel_id))
+
+        await future
+
+    async def close(self) -> None:
+        '''取消所有尚未發送的訊息'''
+        workers = list(self.__workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        '''取得發送統計'''
+        latencies = sorted(self.latencies)
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "channel_queues": len(self.__queues),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            "latency_max": latencies[-1] if latencies else 0.0
+        }
+
+    async def __run_channel(self, channel_id: int) -> None:
+        '''依序發送頻道佇列中的訊息，佇列清空後結束'''
+        queue = self.__queues[channel_id]
+        try:
+            while queue:
+                message, scheduled_time, enqueue_time, future = queue[0]
+                start_time = time.monotonic()
+                try:
+                    await self.__deliver(channel_id, message)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    self.failed += 1
+                    self.__record(self.__get_outcome(e), scheduled_time, start_time)
+                    bot_log.error_send_notification(channel_id, e)
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.delivered += 1
+                    self.__record("sent", scheduled_time, start_time)
+                    self.latencies.append(time.monotonic() - enqueue_time)
+                    if not future.done():
+                        future.set_result(None)
+                finally:
+                    queue.popleft()
+                    self.queue_depth -= 1
+        finally:
+            # 取消時捨棄尚未發送的訊息
+            for _, _, _, future in queue:
+                future.cancel()
+            self.queue_depth -= len(queue)
+            del self.__queues[channel_id]
+            del self.__workers[channel_id]
+
+    async def __deliver(self, channel_id: int, message: str) -> None:
+        '''發送一則訊息，遇到速率限制時等待 Retry-After 後重試'''
+        for retry in range(self.max_retries + 1):
+            async with self.__semaphore:
+                try:
+                    await self.send_func(channel_id, message)
+                    return
+                except discord.RateLimited as e:
+                    retry_after = e.retry_after
+                except discord.HTTPException as e:
+                    if e.status != 429:
+                        raise
+                    retry_after = self.__get_retry_after(e)
+
+            self.rate_limited += 1
+            if retry == self.max_retries:
+                break
+            # 等待時不佔用發送數量
+            await asyncio.sleep(retry_after)
+
+        raise discord.RateLimited(retry_after)
+
+    def __record(self, outcome: str, scheduled_time: float, start_time: float) -> None:
+        '''記錄發送結果，耗時包含速率限制的等待時間'''
+        self.metrics.record(
+            outcome,
+            scheduled_time=scheduled_time,
+            sent_time=time.time(),
+            duration=time.monotonic() - start_time
+        )
+
+    @staticmethod
+    def __get_outcome(error: Exception) -> str:
+        '''依例外判斷發送結果'''
+        if isinstance(error, (ChannelMissing, discord.NotFound)):
+            return "channel_missing"
+        if isinstance(error, discord.Forbidden):
+            return "forbidden"
+        if isinstance(error, discord.RateLimited):
+            return "rate_limited"
+        return "error"
+
+    @staticmethod
+    def __get_retry_after(error: discord.HTTPException) -> float:
+        '''從回應標頭取得 Retry-After 秒數'''
+        headers = getattr(error.response, "headers", None) or {}
+        try:
+            return float(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
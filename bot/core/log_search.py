@@ -0,0 +1,284 @@
+import os
+import re
+import gzip
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Iterator, List, NamedTuple, Optional, Tuple
+from .log_viewer import BLOCK_SIZE, get_log_segments
+
+# LogManager 的格式 "%(asctime)s - %(name)s - %(levelname)s:%(message)s"
+LOG_RECORD_PATTERN = re.compile(r"^(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}) - .+? - ([A-Z]+):")
+LOG_TIME_FORMAT = "%m/%d/%Y %H:%M:%S"
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+MAX_RESULTS = 200
+# 單行與單筆記錄的上限，超過時只保留開頭，避免異常的日誌佔用大量記憶體
+MAX_LINE_BYTES = 16 * 1024
+MAX_RECORD_CHARS = 16 * 1024
+
+
+class LogRecord(NamedTuple):
+    '''一筆日誌記錄，包含標頭行與之後的多行內容 (例如 traceback)'''
+    time: Optional[datetime]
+    level: Optional[str]
+    text: str
+
+
+class LogSearchResult(NamedTuple):
+    records: List[LogRecord]
+    # 是否因達到上限而提早停止
+    truncated: bool
+
+
+def iter_reversed_lines(
+    file_path: str,
+    block_size: int = BLOCK_SIZE,
+    max_line_bytes: int = MAX_LINE_BYTES
+) -> Iterator[bytes]:
+    '''從檔案末尾往前逐行讀取，超過 max_line_bytes 的行只保留開頭'''
+    with open(file_path, "rb") as file:
+        position = file.seek(0, os.SEEK_END)
+        carry = b""
+        while position > 0:
+            block_start = max(0, position - block_size)
+            file.seek(block_start)
+            lines = (file.read(position - block_start) + carry).split(b"\n")
+            position = block_start
+
+            # 第一行可能不完整，與前一個區塊合併
+            carry = lines[0][:max_line_bytes]
+            for line in reversed(lines[1:]):
+                yield line[:max_line_bytes]
+        yield carry
+
+
+def iter_lines(file_path: str, max_line_bytes: int = MAX_LINE_BYTES) -> Iterator[bytes]:
+    '''從檔案開頭往後逐行讀取，壓縮的分段邊讀邊解壓縮，超過 max_line_bytes 的行只保留開頭'''
+    opener = gzip.open if file_path.endswith(".gz") else open
+    with opener(file_path, "rb") as file:
+        while line := file.readline(max_line_bytes):
+            if not line.endswith(b"\n"):
+                # 略過超過上限的部分
+                rest = line
+                while len(rest) == max_line_bytes and not rest.endswith(b"\n"):
+                    rest = file.readline(max_line_bytes)
+            yield line.rstrip(b"\n")
+
+
+def create_log_record(match: Optional[re.Match], text: str) -> LogRecord:
+    '''以標頭行的比對結果建立日誌記錄，沒有標頭時時間與等級為 None'''
+    if match is None:
+        return LogRecord(None, None, text)
+
+    try:
+        record_time = datetime.strptime(match.group(1), LOG_TIME_FORMAT)
+    except ValueError:
+        record_time = None
+    return LogRecord(record_time, match.group(2), text)
+
+
+def iter_reversed_records(file_path: str, block_size: int = BLOCK_SIZE) -> Iterator[LogRecord]:
+    '''從檔案末尾往前逐筆讀取日誌記錄，檔案開頭沒有標頭的內容視為一筆沒有時間與等級的記錄'''
+    # 從末尾往前讀取時先讀到記錄的最後一行，以 appendleft 還原順序
+    lines: Deque[str] = deque()
+    length = 0
+    for raw_line in iter_reversed_lines(file_path, block_size):
+        line = raw_line.decode("utf-8", errors="replace").rstrip("\r")
+        lines.appendleft(line)
+        length += len(line) + 1
+        while length > MAX_RECORD_CHARS and len(lines) > 1:
+            length -= len(lines.pop()) + 1
+
+        match = LOG_RECORD_PATTERN.match(line)
+        if match is None:
+            continue
+
+        yield create_log_record(match, "\n".join(lines).rstrip())
+        lines.clear()
+        length = 0
+
+    text = "\n".join(lines).strip()
+    if text:
+        yield LogRecord(None, None, text)
+
+
+def iter_records(file_path: str) -> Iterator[LogRecord]:
+    '''從檔案開頭往後逐筆讀取日誌記錄，與 iter_reversed_records 的記錄相同但順序相反'''
+    lines: List[str] = []
+    length = 0
+    match: Optional[re.Match] = None
+    for raw_line in iter_lines(file_path):
+        line = raw_line.decode("utf-8", errors="replace").rstrip("\r")
+        line_match = LOG_RECORD_PATTERN.match(line)
+        if line_match is not None:
+            text = "\n".join(lines).rstrip() if match is not None else "\n".join(lines).strip()
+            if text:
+                yield create_log_record(match, text)
+            lines = []
+            length = 0
+            match = line_match
+
+        # 超過上限時只保留記錄開頭的行
+        if not lines or length + len(line) + 1 <= MAX_RECORD_CHARS:
+            lines.append(line)
+            length += len(line) + 1
+
+    text = "\n".join(lines).rstrip() if match is not None else "\n".join(lines).strip()
+    if text:
+        yield create_log_record(match, text)
+
+
+def search_reversed_records(
+    records: Iterator[LogRecord],
+    is_match: Callable[[LogRecord], bool],
+    since: Optional[datetime],
+    limit: int
+) -> Tuple[List[LogRecord], bool]:
+    '''從最新往前的記錄中搜尋，返回 (從新到舊的結果, 是否已停止)
+
+    讀到早於 since 的記錄或結果達到 limit 筆時停止
+    '''
+    matches: List[LogRecord] = []
+    for record in records:
+        if since is not None and record.time is not None and record.time < since:
+            return matches, True
+        if is_match(record):
+            matches.append(record)
+            if len(matches) >= limit:
+                return matches, True
+    return matches, False
+
+
+def search_forward_records(
+    records: Iterator[LogRecord],
+    is_match: Callable[[LogRecord], bool],
+    since: Optional[datetime],
+    limit: int
+) -> Tuple[List[LogRecord], bool]:
+    '''從最舊往後的記錄中搜尋，結果與 search_reversed_records 相同
+
+    只保留最新的 limit 筆結果，讀到早於 since 的記錄時捨棄之前的結果
+    '''
+    matches: Deque[LogRecord] = deque(maxlen=limit)
+    reached_since = False
+    for record in records:
+        if since is not None and record.time is not None and record.time < since:
+            matches.clear()
+            reached_since = True
+        elif is_match(record):
+            matches.append(record)
+    return list(reversed(matches)), reached_since or len(matches) >= limit
+
+
+def search_log(
+    file_path: str,
+    pattern: Optional[re.Pattern] = None,
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    max_results: int = MAX_RESULTS,
+    block_size: int = BLOCK_SIZE
+) -> LogSearchResult:
+    '''從最新的記錄往前搜尋符合條件的日誌，返回依時間排序的結果
+
+    目前的日誌搜尋完後接著搜尋輪替後的分段，從最新的分段往前，
+    壓縮的分段無法往前讀取，改為邊解壓縮邊往後讀取，只保留最新的結果，
+    level 為最低等級，since、until 為記錄時間的範圍 (包含)，有等級或時間條件時不包含沒有標頭的記錄，
+    讀到早於 since 的記錄或結果達到 max_results 筆時停止
+    '''
+    min_level = LOG_LEVELS[level] if level is not None else None
+
+    def is_match(record: LogRecord) -> bool:
+        if min_level is not None and LOG_LEVELS.get(record.level, -1) < min_level:
+            return False
+        if (since is not None or until is not None) and record.time is None:
+            return False
+        if until is not None and record.time > until:
+            return False
+        return pattern is None or pattern.search(record.text) is not None
+
+    # 從新到舊的結果
+    records: List[LogRecord] = []
+    for segment_path in reversed(get_log_segments(file_path)):
+        limit = max_results - len(records)
+        if segment_path.endswith(".gz"):
+            matches, stopped = search_forward_records(iter_records(segment_path), is_match, since, limit)
+        else:
+            matches, stopped = search_reversed_records(
+                iter_reversed_records(segment_path, block_size), is_match, since, limit)
+
+        records.extend(matches)
+        if stopped:
+            break
+
+    records.reverse()
+    return LogSearchResult(records, len(records) >= max_results)
+
+
+class LogSearchPageViewer:
+    """
+    日誌搜尋結果的分頁檢視器，介面與 LogPageViewer 相同
+    依時間排序的記錄以行為斷點分頁，每頁不超過 page_char_limit 字元，從最新一頁開始瀏覽
+    """
+
+    def __init__(self, result: LogSearchResult, page_char_limit: int) -> None:
+        self.result = result
+        self._pages = self.__split_lines_get_pages(
+            [line for record in result.records for line in record.text.split("\n")],
+            page_char_limit
+        ) or [""]
+        self._current_page = len(self._pages) - 1
+
+    @staticmethod
+    def __split_lines_get_pages(lines: List[str], char_limit: int) -> List[str]:
+        '''依序合併各行，每頁不超過 char_limit 字元，單行超過時直接切分'''
+        pages = []
+        current = ""
+        for line in lines:
+            while len(line) > char_limit:
+                if current:
+                    pages.append(current)
+                    current = ""
+                pages.append(line[:char_limit])
+                line = line[char_limit:]
+
+            if not current:
+                current = line
+            elif len(current) + 1 + len(line) <= char_limit:
+                current = f"{current}\n{line}"
+            else:
+                pages.append(current)
+                current = line
+
+        if current:
+            pages.append(current)
+        return pages
+
+    def get_page_content(self) -> str:
+        '''取得當前頁面內容'''
+        return self._pages[self._current_page]
+
+    def get_page_label(self) -> str:
+        '''取得當前頁數的顯示文字'''
+        label = f"第 {self._current_page + 1} / {len(self._pages)} 頁，{len(self.result.records)} 筆"
+        if self.result.truncated:
+            label += " (已達上限)"
+        return label
+
+    def is_first_page(self) -> bool:
+        '''是否為第一頁'''
+        return self._current_page == 0
+
+    def is_last_page(self) -> bool:
+        '''是否為最後一頁'''
+        return self._current_page == len(self._pages) - 1
+
+    def prev_page(self) -> None:
+        '''翻到上一頁'''
+        if self._current_page > 0:
+            self._current_page -= 1
+
+    def next_page(self) -> None:
+        '''翻到下一頁'''
+        if self._current_page < len(self._pages) - 1:
+            self._current_page += 1
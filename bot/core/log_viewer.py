@@ -1,58 +1,528 @@
-from typing import List
+import io
+import os
+import re
+import gzip
+import bisect
+import struct
+from typing import BinaryIO, List, Optional, Tuple
 
+BLOCK_SIZE = 64 * 1024
+LOG_INDEX_DIR_PATH = "./data/log_index"
+# 輪替後分段的副檔名：RotatingFileHandler 的編號或 TimedRotatingFileHandler 的時間，壓縮後加上 .gz
+LOG_SEGMENT_SUFFIX_PATTERN = re.compile(r"^\.(\d+|\d{4}-\d{2}-\d{2}(_\d{2}(-\d{2}){0,2})?)(\.gz)?$")
 
-class LogPageViewer:
 
-    def __init__(self, file_path: str, page_char_limit: int) -> None:
-        '''讀取檔案，並依照 page_char_limit 進行分頁，初始化頁數、當前頁數
-        '''
-        with open(file_path, "r", encoding="utf-8") as file:
-            log_content = file.read()
+def decode_log_text(raw: bytes, errors: str = "replace") -> str:
+    '''解碼日誌內容，與文字模式相同將 \\r\\n、\\r 視為換行'''
+    return raw.decode("utf-8", errors=errors).replace("\r\n", "\n").replace("\r", "\n")
 
-        self._pages = self.__split_string_get_pages(
-            log_content, page_char_limit)
-        self._page_count = len(self._pages)
-        self._current_page = len(self._pages) - 1
 
-    def __split_string_get_pages(self, string: str, char_limit: int) -> List[str]:
-        '''從末尾提取字串，依 char_limit 進行分頁，以行為斷點'''
-        pages = []
-        string = string.strip()
+def open_log_file(file_path: str) -> BinaryIO:
+    '''以二進位模式開啟日誌，壓縮的分段會解壓縮到記憶體中以便從末尾往前讀取'''
+    if file_path.endswith(".gz"):
+        with gzip.open(file_path, "rb") as file:
+            return io.BytesIO(file.read())
+    return open(file_path, "rb")
+
+
+def get_log_size(file_path: str) -> int:
+    '''取得日誌內容的大小，壓縮的分段從 gzip 檔尾讀取原始大小 (除以 2^32 的餘數)，不需解壓縮'''
+    if not file_path.endswith(".gz"):
+        return os.path.getsize(file_path)
+
+    with open(file_path, "rb") as file:
+        if file.seek(0, os.SEEK_END) < 4:
+            return 0
+        file.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", file.read(4))[0]
+
+
+def get_log_segments(file_path: str) -> List[str]:
+    '''取得日誌輪替後的分段與目前的日誌，從最舊到最新排序，目前的日誌在最後
+
+    分段為同目錄下的 "日誌檔名.編號"、"日誌檔名.時間"，壓縮的分段再加上 .gz，
+    例如 bot_info.log.1.gz、bot_info.log.2024-01-01.gz
+    '''
+    log_dir_path, filename = os.path.split(file_path)
+    if not os.path.isdir(log_dir_path or "."):
+        return [file_path]
+
+    segments = []
+    for name in os.listdir(log_dir_path or "."):
+        match = name.startswith(filename) and LOG_SEGMENT_SUFFIX_PATTERN.match(name[len(filename):])
+        if not match:
+            continue
+        # 輪替時以重新命名移動分段，修改時間即為分段內容的時間，相同時編號越大越舊
+        number = int(match.group(1)) if match.group(1).isdigit() else 0
+        path = os.path.join(log_dir_path, name)
+        segments.append((os.stat(path).st_mtime_ns, -number, name, path))
+
+    segments.sort()
+    return [segment[-1] for segment in segments] + [file_path]
+
+
+def is_log_segment(filename: str) -> bool:
+    '''檔名是否為日誌輪替後的分段'''
+    root, ext = os.path.splitext(filename)
+    if ext == ".gz":
+        root, ext = os.path.splitext(root)
+    return LOG_SEGMENT_SUFFIX_PATTERN.match(filename[len(root):]) is not None and bool(root)
+
+
+class ReversePageReader:
+    """
+    從檔案 [start, end) 的末尾以固定大小的區塊往前讀取並分頁，
+    每頁不超過 char_limit 字元並盡量以行為斷點，同時記錄每頁在檔案中的位元組範圍
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        char_limit: int,
+        start: int = 0,
+        end: Optional[int] = None,
+        block_size: int = BLOCK_SIZE
+    ) -> None:
+        self.file_path = file_path
+        self.char_limit = char_limit
+        self.block_size = block_size
+        self.exhausted = False
+
+        # 壓縮的分段解壓縮後保留在記憶體中，其他檔案每次讀取區塊時開啟
+        self.__file: Optional[BinaryIO] = None
+        if file_path.endswith(".gz"):
+            self.__file = open_log_file(file_path)
+            file_size = self.__file.seek(0, os.SEEK_END)
+        else:
+            file_size = os.path.getsize(file_path)
+
+        # 尚未分頁的內容：檔案中 [start, __position) 尚未讀取，
+        # __carry 為留待與前一個區塊合併的位元組，__buffer 為已解碼的文字，結束於 __end_offset
+        self.__start = start
+        self.__position = file_size if end is None else end
+        self.__end_offset = self.__position
+        self.__carry = b""
+        self.__buffer = ""
+
+        # 由 \r\n 轉換的換行位置 (從範圍末尾往前數的字元數)，用於換算位元組長度
+        self.__consumed = 0
+        self.__crlf: List[int] = []
+
+        self.__rstrip(None)
+
+    def read_page(self) -> Optional[Tuple[str, int, int]]:
+        '''從尚未分頁的內容末尾取出一頁 (內容, 開始位置, 結束位置)，已讀到範圍開頭時返回 None'''
+        if self.exhausted:
+            return None
+
+        char_limit = self.char_limit
+        self.__fill(char_limit)
+        string = self.__buffer
 
-        while len(string) > char_limit:
-            if string[-char_limit - 1] == "\n":
-                page = string[-char_limit:]
-                string = string[:-char_limit]
+        if len(string) <= char_limit:
+            page_end = self.__end_offset
+            page_start = page_end - self.__cut(len(string))
+            self.exhausted = True
+            return self.__to_display(string), page_start, page_end
 
+        if string[-char_limit - 1] == "\n":
+            page = string[-char_limit:]
+
+        else:
+            split_point = string.find("\n", -char_limit)
+            if split_point == -1:
+                split_point = -char_limit
             else:
-                split_point = string.find("\n", -char_limit)
-                if split_point == -1:
-                    split_point = -char_limit
-                else:
-                    split_point += 1
-                page = string[split_point:]
-                string = string[:split_point]
+                split_point += 1
+            page = string[split_point:]
+
+        page_end = self.__end_offset
+        page_start = page_end - self.__cut(len(page))
+        self.__rstrip(" \n")
+        return self.__to_display(page), page_start, page_end
+
+    @staticmethod
+    def __to_display(page: str) -> str:
+        '''將無法解碼的位元組替換為替代字元'''
+        return page.encode("utf-8", errors="surrogateescape").decode("utf-8", errors="replace")
+
+    def __cut(self, length: int) -> int:
+        '''移除尚未分頁內容末尾 length 個字元，返回對應的位元組數'''
+        if length == 0:
+            return 0
+
+        suffix = self.__buffer[-length:]
+        crlf_count = bisect.bisect_right(self.__crlf, self.__consumed + length)
+        del self.__crlf[:crlf_count]
+        raw_length = len(suffix.encode("utf-8", errors="surrogateescape")) + crlf_count
+
+        self.__buffer = self.__buffer[:-length]
+        self.__consumed += length
+        self.__end_offset -= raw_length
+        return raw_length
+
+    def __fill(self, size: int) -> None:
+        '''往前讀取區塊，直到尚未分頁的內容 (不含開頭空白) 超過 size 字元或讀到範圍開頭'''
+        while len(self.__buffer.lstrip()) <= size and self.__read_block():
+            pass
+
+        if self.__position == self.__start:
+            self.__buffer = self.__buffer.lstrip()
+
+    def __rstrip(self, chars: str | None) -> None:
+        '''移除尚未分頁內容末尾的空白，全部是空白時繼續往前讀取'''
+        while True:
+            self.__cut(len(self.__buffer) - len(self.__buffer.rstrip(chars)))
+            if self.__buffer or not self.__read_block():
+                break
+
+        if self.__position == self.__start:
+            self.__buffer = self.__buffer.lstrip()
+
+    def __read_block(self) -> bool:
+        '''往前讀取一個區塊並解碼到 __buffer 開頭，已讀到範圍開頭時返回 False'''
+        if self.__position == self.__start:
+            return False
+
+        block_start = max(self.__start, self.__position - self.block_size)
+        if self.__file is not None:
+            self.__file.seek(block_start)
+            raw = self.__file.read(self.__position - block_start) + self.__carry
+        else:
+            with open(self.file_path, "rb") as file:
+                file.seek(block_start)
+                raw = file.read(self.__position - block_start) + self.__carry
+        self.__position = block_start
+
+        if self.__position == self.__start:
+            # 讀完後釋放解壓縮的內容
+            self.__file = None
+
+        # 區塊開頭可能是不完整的 UTF-8 字元或 \r\n 中的 \n，留到與前一個區塊合併後再解碼
+        cut = 0
+        if block_start > self.__start:
+            while cut < len(raw) and 0x80 <= raw[cut] < 0xC0:
+                cut += 1
+            if cut == 0 and raw[:1] == b"\n":
+                cut = 1
+        self.__carry = raw[:cut]
+
+        decoded = raw[cut:].decode("utf-8", errors="surrogateescape")
+        text = decode_log_text(raw[cut:], errors="surrogateescape")
+
+        # 記錄 \r\n 轉換成的換行從範圍末尾往前數的位置，越前面的數字越大
+        crlf = []
+        index = decoded.find("\r\n")
+        while index != -1:
+            text_index = index - len(crlf)
+            crlf.append(self.__consumed + len(self.__buffer) + len(text) - text_index)
+            index = decoded.find("\r\n", index + 2)
+        self.__crlf.extend(reversed(crlf))
+
+        self.__buffer = text + self.__buffer
+        return True
+
+
+class LogPageIndex:
+    """
+    日誌的分頁索引
+    記錄每頁在日誌中的位元組範圍，以 (inode, 大小, 修改時間) 判斷日誌是否變更，
+    讀取任意一頁只需讀取一筆索引與該頁的內容
+
+    日誌變大時只從最後一頁的開頭重新分頁到新的結尾，
+    日誌被輪替、截斷或改寫時重建索引
+
+    檔案格式
+    ------
+    檔頭: 識別碼、每頁字元數上限、inode、日誌大小、修改時間 (ns)
+    之後每頁一筆 (開始位置, 結束位置)，依頁面順序排列
+    """
 
-            pages.append(page)
+    MAGIC = b"LOGPIDX1"
+    HEADER = struct.Struct("<8sIQQq")
+    RECORD = struct.Struct("<QQ")
 
-            while string[-1] in [" ", "\n"]:
-                string = string[:-1]
+    def __init__(self, index_path: str) -> None:
+        self.index_path = index_path
 
-        pages.append(string)
+    def update(self, file_path: str, char_limit: int, block_size: int = BLOCK_SIZE) -> int:
+        '''依日誌目前的狀態更新索引，返回頁數'''
+        stat = os.stat(file_path)
+        header = self.__read_header()
+        page_count = self.get_page_count()
+
+        if header is not None:
+            magic, index_char_limit, inode, size, mtime = header
+            unchanged = magic == self.MAGIC and index_char_limit == char_limit and inode == stat.st_ino
+            if unchanged and size == stat.st_size and mtime == stat.st_mtime_ns:
+                return page_count
+            if not unchanged or stat.st_size <= size:
+                header = None
+
+        if header is None:
+            # 重建索引
+            page_count = 0
+            scan_start = 0
+        elif page_count > 0:
+            # 最後一頁可能因新內容改變，從最後一頁的開頭重新分頁
+            page_count -= 1
+            scan_start = self.get_page_range(page_count)[0]
+        else:
+            scan_start = header[3]
+
+        reader = ReversePageReader(file_path, char_limit, scan_start, stat.st_size, block_size)
+        pages = []
+        while (page := reader.read_page()) is not None:
+            if page[1] < page[2]:
+                pages.append(page[1:])
         pages.reverse()
 
-        return pages
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        mode = "r+b" if os.path.exists(self.index_path) else "w+b"
+        with open(self.index_path, mode) as file:
+            file.truncate(self.HEADER.size + page_count * self.RECORD.size)
+            file.seek(0, os.SEEK_END)
+            file.write(b"".join(self.RECORD.pack(*page) for page in pages))
+
+            # 頁面寫入後才更新檔頭，中斷時下次會重建或重新分頁
+            file.seek(0)
+            file.write(self.HEADER.pack(
+                self.MAGIC, char_limit, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+
+        return page_count + len(pages)
+
+    def get_page_count(self) -> int:
+        '''取得索引中的頁數'''
+        if not os.path.exists(self.index_path):
+            return 0
+        return max(0, (os.path.getsize(self.index_path) - self.HEADER.size) // self.RECORD.size)
+
+    def get_page_range(self, page: int) -> Tuple[int, int]:
+        '''取得第 page 頁 (從 0 開始) 的位元組範圍'''
+        with open(self.index_path, "rb") as file:
+            file.seek(self.HEADER.size + page * self.RECORD.size)
+            return self.RECORD.unpack(file.read(self.RECORD.size))
+
+    def read_page(self, file_path: str, page: int) -> str:
+        '''讀取第 page 頁 (從 0 開始) 的內容'''
+        start, end = self.get_page_range(page)
+        with open(file_path, "rb") as file:
+            file.seek(start)
+            return decode_log_text(file.read(end - start))
+
+    def __read_header(self) -> Optional[tuple]:
+        '''讀取檔頭，索引不存在或不完整時返回 None'''
+        if not os.path.exists(self.index_path):
+            return None
+        with open(self.index_path, "rb") as file:
+            content = file.read(self.HEADER.size)
+        if len(content) < self.HEADER.size:
+            return None
+        return self.HEADER.unpack(content)
+
+
+class LogSegmentPages:
+    """
+    單一日誌分段的頁面，從最新一頁 (檔案末尾) 往前數
+
+    沒有 index_path 時從檔案末尾往前讀取，只建立實際翻到的頁面，讀到檔案開頭前不知道總頁數；
+    有 index_path 時使用 LogPageIndex，開啟與讀取任意一頁都只需讀取固定次數
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        page_char_limit: int,
+        block_size: int = BLOCK_SIZE,
+        index_path: Optional[str] = None
+    ) -> None:
+        self.file_path = file_path
+        self.page_char_limit = page_char_limit
+        # 頁數，讀到檔案開頭前為 None，空白的分段為 0
+        self.page_count: Optional[int] = None
+
+        # 從最新一頁往前的頁面 (未使用索引時)
+        self.__pages: List[str] = []
+        self.__reader: Optional[ReversePageReader] = None
+        self.__index: Optional[LogPageIndex] = None
+
+        if index_path is None:
+            self.__reader = ReversePageReader(file_path, page_char_limit, block_size=block_size)
+        else:
+            self.__index = LogPageIndex(index_path)
+            self.page_count = self.__index.update(file_path, page_char_limit, block_size)
+
+    @property
+    def has_index(self) -> bool:
+        return self.__index is not None
+
+    def get_page(self, page: int) -> Optional[str]:
+        '''取得從最新一頁往前數第 page 頁 (從 0 開始) 的內容，超出範圍時返回 None'''
+        if self.__index is not None:
+            if page >= self.page_count:
+                return None
+            return self.__index.read_page(self.file_path, self.page_count - 1 - page)
+
+        while len(self.__pages) <= page and self.__read_page():
+            pass
+        return self.__pages[page] if page < len(self.__pages) else None
+
+    def __read_page(self) -> bool:
+        '''往前讀取一頁，已讀到檔案開頭時返回 False'''
+        if self.__reader is None:
+            return False
+        page = self.__reader.read_page()
+        if page is None:
+            return False
+
+        # 空白的檔案沒有頁面
+        if page[0] or self.__pages or not self.__reader.exhausted:
+            self.__pages.append(page[0])
+        if self.__reader.exhausted:
+            self.page_count = len(self.__pages)
+            self.__reader = None
+        return True
+
+
+class LogPageViewer:
+    """
+    日誌分頁檢視器
+    頁面從最新一頁 (檔案末尾) 開始瀏覽，每頁不超過 page_char_limit 字元並盡量以行為斷點
+
+    日誌輪替後的分段 (包含 gzip 壓縮的分段) 與目前的日誌視為連續的內容，
+    翻過目前日誌的第一頁後接著瀏覽較舊的分段，分段只在翻到時才讀取或解壓縮
+
+    有 index_path 時目前的日誌使用 LogPageIndex，可顯示總頁數並跳到任意一頁，
+    壓縮的分段不會再變動，從末尾往前讀取即可
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        page_char_limit: int,
+        block_size: int = BLOCK_SIZE,
+        index_path: Optional[str] = None
+    ) -> None:
+        '''從目前日誌的末尾取出最新一頁，有 index_path 時先更新索引'''
+        self.file_path = file_path
+        self.page_char_limit = page_char_limit
+        self.block_size = block_size
+
+        # 從最新到最舊的分段，尚未讀取的分段為 None
+        self.__segment_paths = get_log_segments(file_path)[::-1]
+        self.__segments: List[Optional[LogSegmentPages]] = [None] * len(self.__segment_paths)
+        self.__segments[0] = LogSegmentPages(file_path, page_char_limit, block_size, index_path)
+
+        # 當前的分段與從該分段最新一頁往前數的頁數
+        self.__segment = 0
+        self.__current = 0
+        self.__page_content = ""
+
+        # 最新一頁所在的分段，目前的日誌是空的時為較舊的分段
+        self.__find_newest_page()
+        self.__newest_segment = self.__segment
 
     def get_page_content(self) -> str:
         '''取得當前頁面內容'''
-        return self._pages[self._current_page]
+        return self.__page_content
+
+    def get_page_label(self) -> str:
+        '''取得當前頁數的顯示文字，較舊的分段附上分段的檔名'''
+        page_count = self.__get_segment(self.__segment).page_count
+        if page_count is not None:
+            page_count = max(page_count, 1)
+            label = f"第 {page_count - self.__current} / {page_count} 頁"
+        else:
+            label = f"倒數第 {self.__current + 1} 頁"
+
+        if self.__segment > 0:
+            label += f" ({os.path.basename(self.__segment_paths[self.__segment])})"
+        return label
+
+    def is_first_page(self) -> bool:
+        '''是否為第一頁 (最舊分段的開頭)'''
+        page_count = self.__get_segment(self.__segment).page_count
+        if page_count is None or self.__current < max(page_count, 1) - 1:
+            return False
+        return not self.__has_older_segment()
+
+    def is_last_page(self) -> bool:
+        '''是否為最後一頁 (目前日誌的末尾)'''
+        return self.__segment == self.__newest_segment and self.__current == 0
 
     def prev_page(self) -> None:
-        '''翻到上一頁'''
-        if self._current_page > 0:
-            self._current_page -= 1
+        '''翻到上一頁，已是該分段的第一頁時翻到較舊分段的最後一頁'''
+        content = self.__get_segment(self.__segment).get_page(self.__current + 1)
+        if content is not None:
+            self.__current += 1
+            self.__page_content = content
+            return
+
+        segment = self.__find_older_segment()
+        if segment is not None:
+            self.__segment = segment
+            self.__current = 0
+            self.__page_content = self.__get_segment(segment).get_page(0)
 
     def next_page(self) -> None:
-        '''翻到下一頁'''
-        if self._current_page < self._page_count - 1:
-            self._current_page += 1
+        '''翻到下一頁，已是該分段的最後一頁時翻到較新分段的第一頁'''
+        if self.__current > 0:
+            self.__current -= 1
+            self.__page_content = self.__get_segment(self.__segment).get_page(self.__current)
+            return
+
+        for segment in range(self.__segment - 1, -1, -1):
+            # 較新的分段都已讀到開頭，頁數已知
+            page_count = self.__get_segment(segment).page_count
+            if page_count:
+                self.__segment = segment
+                self.__current = page_count - 1
+                self.__page_content = self.__get_segment(segment).get_page(self.__current)
+                return
+
+    def go_to_page(self, page: int) -> None:
+        '''跳到目前日誌的第 page 頁 (從 1 開始)，超出範圍時跳到最近的一頁，只能在使用索引時使用'''
+        segment_pages = self.__get_segment(0)
+        if not segment_pages.has_index:
+            raise ValueError("Jumping to a page requires a page index.")
+        if segment_pages.page_count == 0:
+            return
+
+        page = min(max(page, 1), segment_pages.page_count)
+        self.__segment = 0
+        self.__current = segment_pages.page_count - page
+        self.__page_content = segment_pages.get_page(self.__current)
+
+    def __get_segment(self, segment: int) -> LogSegmentPages:
+        '''取得第 segment 個分段 (從最新開始)，第一次使用時才建立'''
+        if self.__segments[segment] is None:
+            self.__segments[segment] = LogSegmentPages(
+                self.__segment_paths[segment], self.page_char_limit, self.block_size)
+        return self.__segments[segment]
+
+    def __has_older_segment(self) -> bool:
+        '''是否有比當前分段舊且有內容的分段，尚未讀取的分段只檢查內容大小，不解壓縮'''
+        for segment in range(self.__segment + 1, len(self.__segment_paths)):
+            segment_pages = self.__segments[segment]
+            if segment_pages is None:
+                if get_log_size(self.__segment_paths[segment]) > 0:
+                    return True
+            elif segment_pages.get_page(0) is not None:
+                return True
+        return False
+
+    def __find_older_segment(self) -> Optional[int]:
+        '''取得比當前分段舊且有內容的第一個分段，沒有時返回 None'''
+        for segment in range(self.__segment + 1, len(self.__segment_paths)):
+            if self.__get_segment(segment).get_page(0) is not None:
+                return segment
+        return None
+
+    def __find_newest_page(self) -> None:
+        '''找到最新一個有內容的分段並讀取其最新一頁，所有分段都是空的時停在目前的日誌'''
+        for segment in range(len(self.__segment_paths)):
+            content = self.__get_segment(segment).get_page(0)
+            if content is not None:
+                self.__segment = segment
+                self.__page_content = content
+                return
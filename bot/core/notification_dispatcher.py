@@ -0,0 +1,302 @@
+import bisect
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from apscheduler.schedulers.base import BaseScheduler
+from dao.notification_state_dao import NotificationStateDAO
+from .weekly_trigger import WeeklyTrigger
+
+DISPATCH_JOB_ID = "notification_dispatch"
+MISFIRE_POLICIES = ("coalesce", "drop")
+MESSAGE_CHAR_LIMIT = 2000
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# (user_id, message)
+NotificationKey = Tuple[int, str]
+
+
+def to_slot(weekday: int, hour: int, minute: int) -> int:
+    '''將星期 (1 ~ 7 對應星期一 ~ 星期日)、時、分轉換為一週中的第幾分鐘'''
+    return (weekday - 1) * MINUTES_PER_DAY + hour * 60 + minute
+
+
+def from_slot(slot: int) -> Tuple[int, int, int]:
+    '''將一週中的第幾分鐘轉換為 (星期, 時, 分)'''
+    day, minute_of_day = divmod(slot, MINUTES_PER_DAY)
+    return day + 1, minute_of_day // 60, minute_of_day % 60
+
+
+def merge_messages(messages: List[str], limit: int = MESSAGE_CHAR_LIMIT) -> List[str]:
+    '''以換行合併多則訊息，每則合併後的訊息不超過 limit 字元，單則超過時直接切分'''
+    merged: List[str] = []
+    current = ""
+    for message in messages:
+        while len(message) > limit:
+            if current:
+                merged.append(current)
+                current = ""
+            merged.append(message[:limit])
+            message = message[limit:]
+
+        if not current:
+            current = message
+        elif len(current) + 1 + len(message) <= limit:
+            current = f"{current}\n{message}"
+        else:
+            merged.append(current)
+            current = message
+
+    if current:
+        merged.append(current)
+    return merged
+
+
+class NotificationDispatcher:
+    """
+    通知分派器
+    以 (星期, 時, 分) 時段索引所有通知，排程中只保留一個以 WeeklyTrigger 觸發下一個非空時段的工作，
+    觸發時以 send_func(頻道 ID, 訊息, 排程時間戳) 一次發送該時段的所有通知
+
+    新增與刪除通知只更新該通知所在的時段
+
+    設定 state_dao 時會記錄最後分派的時段，啟動時依 misfire_policy 處理停機期間錯過的時段：
+    "coalesce" 將 misfire_grace_time 秒內錯過的通知各補發一次，"drop" 不補發
+
+    merge_channel_ids 中的頻道在同一時段的通知會合併成一則訊息，超過 2000 字元時分成多則
+    """
+
+    def __init__(
+        self,
+        scheduler: BaseScheduler,
+        send_func: Callable[[int, str, float], Awaitable[None]],
+        state_dao: Optional[NotificationStateDAO] = None,
+        misfire_policy: str = "drop",
+        misfire_grace_time: float = 3600,
+        merge_channel_ids: Iterable[int] = ()
+    ) -> None:
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f'Unknown misfire policy "{misfire_policy}".')
+
+        self.scheduler = scheduler
+        self.send_func = send_func
+        self.state_dao = state_dao
+        self.misfire_policy = misfire_policy
+        self.misfire_grace_time = misfire_grace_time
+        self.merge_channel_ids = set(merge_channel_ids)
+        self.is_started = False
+
+        # {時段: {(user_id, message): channel_id}}
+        self.slots: Dict[int, Dict[NotificationKey, int]] = {}
+        # {(user_id, message): [時段]}
+        self.notification_slots: Dict[NotificationKey, List[int]] = {}
+        # 排序的非空時段
+        self.__sorted_slots: List[int] = []
+        self.__armed_slot: Optional[int] = None
+
+    def start(self) -> None:
+        '''開始觸發通知，排程需已啟動'''
+        self.is_started = True
+        self.__handle_misfire()
+        self.__arm()
+
+    def stop(self) -> None:
+        '''停止觸發通知'''
+        self.is_started = False
+        self.__disarm()
+
+    def add(
+        self,
+        user_id: int,
+        message: str,
+        weekdays: List[int],
+        hour: int,
+        minute: int,
+        channel_id: int
+    ) -> None:
+        '''新增通知，已存在則覆蓋'''
+        key = (user_id, message)
+        if key in self.notification_slots:
+            self.remove(user_id, message)
+
+        slots = sorted({to_slot(weekday, hour, minute) for weekday in weekdays})
+        for slot in slots:
+            if slot not in self.slots:
+                self.slots[slot] = {}
+                bisect.insort(self.__sorted_slots, slot)
+            self.slots[slot][key] = channel_id
+        self.notification_slots[key] = slots
+
+        self.__arm()
+
+    def remove(self, user_id: int, message: str) -> None:
+        '''刪除通知，不存在時不處理'''
+        key = (user_id, message)
+        slots = self.notification_slots.pop(key, [])
+        for slot in slots:
+            del self.slots[slot][key]
+            if not self.slots[slot]:
+                del self.slots[slot]
+                index = bisect.bisect_left(self.__sorted_slots, slot)
+                del self.__sorted_slots[index]
+
+        if self.__armed_slot in slots:
+            self.__arm()
+
+    def get_notifications(self) -> Dict[NotificationKey, Tuple[List[int], int]]:
+        '''取得所有通知 {(user_id, message): ([時段], channel_id)}'''
+        return {
+            key: (slots, self.slots[slots[0]][key])
+            for key, slots in self.notification_slots.items()
+            if slots
+        }
+
+    def get_slot_notifications(self, weekday: int, hour: int, minute: int) -> Dict[NotificationKey, int]:
+        '''取得時段的所有通知 {(user_id, message): channel_id}'''
+        return dict(self.slots.get(to_slot(weekday, hour, minute), {}))
+
+    def get_next_run_time(self, now: datetime) -> Optional[Tuple[int, datetime]]:
+        '''取得 now 之後第一個非空時段與其時間，沒有通知時返回 None'''
+        if not self.__sorted_slots:
+            return None
+
+        week_start = (now - timedelta(days=now.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+        now_slot = (now - week_start) // timedelta(minutes=1)
+
+        index = bisect.bisect_right(self.__sorted_slots, now_slot)
+        if index < len(self.__sorted_slots):
+            slot = self.__sorted_slots[index]
+            return slot, week_start + timedelta(minutes=slot)
+
+        # 本週已無時段，取下週第一個時段
+        slot = self.__sorted_slots[0]
+        return slot, week_start + timedelta(minutes=slot + MINUTES_PER_WEEK)
+
+    @staticmethod
+    def get_slot_time(slot: int, now: datetime) -> datetime:
+        '''取得時段在 now 之前 (包含) 最近一次的時間'''
+        week_start = (now - timedelta(days=now.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+        slot_time = week_start + timedelta(minutes=slot)
+        if slot_time > now:
+            slot_time -= timedelta(weeks=1)
+        return slot_time
+
+    def get_slots_between(self, start: datetime, end: datetime) -> List[Tuple[int, datetime]]:
+        '''取得 start 之後到 end (包含) 之間的所有非空時段與其時間'''
+        slots = []
+        current = start
+        while True:
+            next_run = self.get_next_run_time(current)
+            if next_run is None or next_run[1] > end:
+                return slots
+            slots.append(next_run)
+            current = next_run[1]
+
+    def __handle_misfire(self) -> None:
+        '''依 misfire_policy 處理上次分派後錯過的時段'''
+        if self.state_dao is None:
+            return
+
+        now = datetime.now(self.scheduler.timezone)
+        last_dispatch_time = self.state_dao.get_last_dispatch_time()
+        self.state_dao.set_last_dispatch_time(now)
+        if last_dispatch_time is None or self.misfire_policy == "drop":
+            return
+
+        start = max(last_dispatch_time, now - timedelta(seconds=self.misfire_grace_time))
+        missed: Dict[NotificationKey, Tuple[int, datetime]] = {}
+        for slot, run_time in self.get_slots_between(start, now):
+            for key, channel_id in self.slots[slot].items():
+                missed.setdefault(key, (channel_id, run_time))
+        if not missed:
+            return
+
+        # 合併錯過的時段，每個通知只補發一次，排程時間為最早錯過的時段
+        self.scheduler.add_job(self.__send_batch, args=[[
+            (key, channel_id, run_time)
+            for key, (channel_id, run_time) in missed.items()
+        ]])
+
+    def __arm(self) -> None:
+        '''排程下一個非空時段，已排程相同時段時不處理'''
+        if not self.is_started:
+            return
+
+        next_run = self.get_next_run_time(datetime.now(self.scheduler.timezone))
+        if next_run is None:
+            self.__disarm()
+            return
+
+        slot, _ = next_run
+        if slot == self.__armed_slot:
+            return
+
+        weekday, hour, minute = from_slot(slot)
+        self.scheduler.add_job(
+            self.__dispatch,
+            WeeklyTrigger(1 << (weekday - 1), hour, minute, self.scheduler.timezone),
+            args=[slot],
+            id=DISPATCH_JOB_ID,
+            replace_existing=True,
+            misfire_grace_time=self.misfire_grace_time,
+            coalesce=True
+        )
+        self.__armed_slot = slot
+
+    def __disarm(self) -> None:
+        '''取消排程的時段'''
+        if self.__armed_slot is not None and self.scheduler.get_job(DISPATCH_JOB_ID):
+            self.scheduler.remove_job(DISPATCH_JOB_ID)
+        self.__armed_slot = None
+
+    async def __dispatch(self, slot: int) -> None:
+        '''發送時段的所有通知，並排程下一個時段
+
+        延遲執行時 (misfire_grace_time 內) 一併發送觸發時段之後到現在之間的非空時段，
+        避免延遲超過下一個時段時該時段被跳過一週
+        '''
+        now = datetime.now(self.scheduler.timezone)
+        run_time = self.get_slot_time(slot, now)
+        due = [(slot, run_time)]
+        if now - run_time <= timedelta(seconds=self.misfire_grace_time):
+            due += self.get_slots_between(run_time, now)
+
+        notifications = [
+            (key, channel_id, slot_time)
+            for due_slot, slot_time in due
+            for key, channel_id in self.slots.get(due_slot, {}).items()
+        ]
+        if self.state_dao is not None:
+            await self.state_dao.aset_last_dispatch_time(due[-1][1])
+
+        # 排程工作已執行完畢，從已發送的最後一個時段之後重新排程
+        self.__armed_slot = None
+        self.__arm()
+
+        await self.__send_batch(notifications)
+
+    async def __send_batch(self, notifications: List[Tuple[NotificationKey, int, datetime]]) -> None:
+        '''一次發送多個通知 [((user_id, message), 頻道 ID, 排程時間)]'''
+        sends: List[Tuple[int, str, datetime]] = []
+        # {頻道 ID: ([訊息], 最早的排程時間)}
+        merged: Dict[int, Tuple[List[str], datetime]] = {}
+
+        for (_, message), channel_id, run_time in notifications:
+            if channel_id not in self.merge_channel_ids:
+                sends.append((channel_id, message, run_time))
+                continue
+
+            messages, first_run_time = merged.setdefault(channel_id, ([], run_time))
+            messages.append(message)
+            merged[channel_id] = (messages, min(first_run_time, run_time))
+
+        for channel_id, (messages, run_time) in merged.items():
+            for message in merge_messages(messages):
+                sends.append((channel_id, message, run_time))
+
+        await asyncio.gather(*[
+            self.send_func(channel_id, message, run_time.timestamp())
+            for channel_id, message, run_time in sends
+        ], return_exceptions=True)
@@ -1,20 +1,62 @@
 import discord
-from typing import Callable, List
-from dao.notification_dao import notification_dao
+from dao.bot_setting_dao import bot_setting
+from dao.notification_dao_factory import notification_dao
+from dao.notification_state_dao import NotificationStateDAO, NOTIFICATION_STATE_FILE_PATH
+from .channel_resolver import ChannelResolver
+from .delivery_pipeline import DeliveryPipeline, ChannelMissing
+from .notification_dispatcher import NotificationDispatcher, to_slot
+from .shard_ownership import ShardOwnership
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 
 class NotificationManager:
     """
     通知管理器
-    載入通知資料後啟動通知排程
+    載入通知資料後啟動通知排程，所有通知由 NotificationDispatcher 依時段分派
+
+    多個程序運行時依 process_shard_id、process_shard_count 分配通知分區，
+    每個程序只排程持有分區的通知，並定期接手其他程序釋放的分區、同步其他程序寫入的通知，
+    原本的程序重啟後會取回被接手的分區
     """
 
     def __init__(self, bot: discord.Client):
         self.bot = bot
         self.is_started = False
-        self.notification_job_id = {}
         self.scheduler = AsyncIOScheduler(timezone="Asia/Taipei")
+        self.channel_resolver = ChannelResolver(bot)
+        self.delivery_pipeline = DeliveryPipeline(self.__send_message)
+
+        scheduler_setting = bot_setting.get_notification_scheduler_setting()
+        self.ownership = ShardOwnership(
+            scheduler_setting["process_shard_id"],
+            scheduler_setting["process_shard_count"]
+        )
+        self.takeover_interval = scheduler_setting["takeover_interval"]
+
+        # json、sharded 後端只以程序內的鎖保護讀取、修改、寫入，多個程序寫入同一個檔案會互相覆蓋
+        backend = bot_setting.get_dao_setting("notification")["backend"]
+        if self.ownership.shard_count > 1 and backend != "sqlite":
+            raise ValueError(
+                f'Running {self.ownership.shard_count} processes requires the "sqlite" '
+                f'notification backend, got "{backend}".')
+
+        state_dao = None
+        if scheduler_setting["persist_state"]:
+            state_file_path = NOTIFICATION_STATE_FILE_PATH
+            if self.ownership.shard_count > 1:
+                # 每個程序各自記錄分派狀態
+                state_file_path = state_file_path.replace(
+                    ".json", f"_{self.ownership.shard_id}.json")
+            state_dao = NotificationStateDAO(state_file_path)
+
+        self.dispatcher = NotificationDispatcher(
+            self.scheduler,
+            self.delivery_pipeline.send,
+            state_dao=state_dao,
+            misfire_policy=scheduler_setting["misfire_policy"],
+            misfire_grace_time=scheduler_setting["misfire_grace_time"],
+            merge_channel_ids=scheduler_setting["merge_channel_ids"]
+        )
 
     async def start(self):
         if self.is_started:
@@ -22,109 +64,107 @@ class NotificationManager:
 
         await self.bot.wait_until_ready()
 
-        self.__load_and_run_notification_job()
+        # 自己的分區被其他程序接手時，已要求歸還，在 __check_ownership 中重試
+        self.ownership.acquire_home()
+        self.ownership.try_takeover()
+        self.__load_notification_data()
         self.scheduler.start()
+        self.dispatcher.start()
+
+        if self.ownership.shard_count > 1:
+            self.scheduler.add_job(
+                self.__check_ownership, "interval", seconds=self.takeover_interval)
+
         self.is_started = True
         
 
     def stop(self):
         if self.is_started:
+            self.dispatcher.stop()
             self.scheduler.shutdown()
-
-    def __list_int_to_weekday(self, day_of_week: List[int]) -> str:
-        '''將數字轉換為星期幾'''
-        weekdays = {
-            1: 'mon',
-            2: 'tue',
-            3: 'wed',
-            4: 'thu',
-            5: 'fri',
-            6: 'sat',
-            7: 'sun'
-        }
-        return ", ".join([weekdays[day] for day in day_of_week])
-
-    def __add_weekly_job(
-            self,
-            func: Callable,
-            day_of_week: List[int],
-            hour: int,
-            minute: int,
-            second: int = 0
-    ) -> str:
-        '''新增每週排程執行'''
-        str_day_of_week = self.__list_int_to_weekday(day_of_week)
-
-        job = self.scheduler.add_job(
-            func,
-            "cron",
-            day_of_week=str_day_of_week,
-            hour=hour,
-            minute=minute,
-            second=second
-        )
-
-        return job.id
-    
-
-    def __get_send_message_func(self, channel_id: int, message: str)-> Callable:
-        '''取得發送訊息的函式'''
-
-        async def send_message():
-            channel = await self.bot.fetch_channel(channel_id)
-            if isinstance(channel, (discord.TextChannel, discord.DMChannel)):
-                await channel.send(message)
-
-        return send_message
+            self.ownership.release_all()
+
+    async def __send_message(self, channel_id: int, message: str) -> None:
+        '''發送通知訊息'''
+        channel = await self.channel_resolver.resolve(channel_id)
+        if not isinstance(channel, (discord.TextChannel, discord.DMChannel)):
+            raise ChannelMissing(channel_id)
+
+        try:
+            await channel.send(message)
+        except (discord.NotFound, discord.Forbidden):
+            # 頻道已刪除或無權限，下次重新取得
+            self.channel_resolver.evict(channel_id)
+            raise
         
 
-    def add_notification_job(self, user_id: int, message: str):
-        '''新增通知排程執行'''
-        data = notification_dao.get_weekly_notification(user_id, message)
-        if data is None:
+    async def add_notification_job(self, user_id: int, message: str):
+        '''新增通知排程執行，在 DAO 專用執行緒中讀取通知設定'''
+        data = await notification_dao.aget_weekly_notification(user_id, message)
+        if data is None or not self.ownership.owns(data.channel_id):
             return
 
-        job_id = self.__add_weekly_job(
-            func=self.__get_send_message_func(data.channel_id, message),
-            day_of_week=data.weekdays,
+        self.dispatcher.add(
+            user_id,
+            message,
+            weekdays=data.weekdays,
             hour=data.hour,
-            minute=data.minute
+            minute=data.minute,
+            channel_id=data.channel_id
         )
 
-        self.notification_job_id[user_id][message] = job_id
-
     def del_notification_job(self, user_id: int, message: str):
         '''刪除通知排程執行'''
-        job_id = self.notification_job_id[user_id][message]
-        self.scheduler.remove_job(job_id)
-        del self.notification_job_id[user_id][message]
-
-
-    def __load_user_notification_data(self):
-        '''載入所有使用者的通知設定'''
-        user_ids = notification_dao.get_all_user_id()
-        for user_id in user_ids:
-
-            if user_id not in self.notification_job_id:
-                self.notification_job_id[user_id] = {}
-
-            messages = notification_dao.get_user_notifications(user_id)
-            for message in messages:
-
-                if message not in self.notification_job_id[user_id]:
-                    self.notification_job_id[user_id][message] = None
-
-    def __run_notification_job(self):
-        '''啟動通知排程，已在排程中的不會重複新增'''
-        for user_id, messages in self.notification_job_id.items():
-            for message in messages:
-                if self.notification_job_id[user_id][message] is None:
-                    self.add_notification_job(user_id, message)
-
-    def __load_and_run_notification_job(self):
-        '''載入通知設定並啟動通知排程'''
-        self.__load_user_notification_data()
-        self.__run_notification_job()
+        self.dispatcher.remove(user_id, message)
+
+
+    def __load_notification_data(self):
+        '''一次讀取所有使用者的通知設定並加入排程，已在排程中的不會重複新增'''
+        for user_id, message, data in notification_dao.iter_notifications():
+            if (user_id, message) in self.dispatcher.notification_slots:
+                continue
+            if not self.ownership.owns(data.channel_id):
+                continue
+
+            self.dispatcher.add(
+                user_id,
+                message,
+                weekdays=data.weekdays,
+                hour=data.hour,
+                minute=data.minute,
+                channel_id=data.channel_id
+            )
+
+    async def __check_ownership(self):
+        '''歸還被要求取回的分區、重試取得自己的分區並接手其他程序釋放的分區，
+        再同步持有分區的通知，不再持有的分區的通知會一併移除'''
+        self.ownership.release_reclaimed()
+        self.ownership.acquire_home()
+        self.ownership.try_takeover()
+
+        notifications = {
+            (user_id, message): data
+            for user_id, message, data in await notification_dao.aiter_notifications()
+            if self.ownership.owns(data.channel_id)
+        }
+        current = self.dispatcher.get_notifications()
+
+        for user_id, message in current.keys() - notifications.keys():
+            self.dispatcher.remove(user_id, message)
+
+        for (user_id, message), data in notifications.items():
+            slots = sorted({to_slot(weekday, data.hour, data.minute) for weekday in data.weekdays})
+            if current.get((user_id, message)) == (slots, data.channel_id):
+                continue
+
+            self.dispatcher.add(
+                user_id,
+                message,
+                weekdays=data.weekdays,
+                hour=data.hour,
+                minute=data.minute,
+                channel_id=data.channel_id
+            )
 
 
 if __name__ == "__main__":
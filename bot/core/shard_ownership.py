@@ -0,0 +1,143 @@
+import os
+import zlib
+from typing import Dict, List, Set, TextIO
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOCK_DIR_PATH = "./data/locks"
+
+
+class ShardOwnership:
+    """
+    通知分區的擁有權
+    依頻道 ID 的雜湊將通知分到 shard_count 個分區，每個程序以鎖檔持有自己的分區，
+    只排程持有分區的通知
+
+    程序結束時作業系統會釋放鎖檔，其他程序在 try_takeover 時接手沒有程序持有的分區，
+    shard_count 為 1 時不使用鎖檔並持有所有通知
+
+    重啟的程序取得自己的分區失敗時，會持有該分區的歸還鎖檔，
+    接手的程序在 release_reclaimed 時歸還分區，其他程序也不會再接手該分區
+    """
+
+    def __init__(self, shard_id: int = 0, shard_count: int = 1, lock_dir: str = LOCK_DIR_PATH) -> None:
+        if not 0 <= shard_id < shard_count:
+            raise ValueError(f"Shard id {shard_id} is out of range for {shard_count} shards.")
+        if shard_count > 1 and fcntl is None:
+            raise ImportError("Multi-process notification shards require fcntl.")
+
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.lock_dir = lock_dir
+        self.owned: Set[int] = set()
+        self.__lock_files: Dict[int, TextIO] = {}
+        self.__reclaim_file: TextIO | None = None
+
+    def get_shard(self, channel_id: int) -> int:
+        '''取得頻道所在的分區'''
+        if self.shard_count == 1:
+            return 0
+        return zlib.crc32(int(channel_id).to_bytes(8, "big")) % self.shard_count
+
+    def owns(self, channel_id: int) -> bool:
+        '''是否持有頻道所在的分區'''
+        return self.get_shard(channel_id) in self.owned
+
+    def acquire_home(self) -> bool:
+        '''取得自己的分區，已被其他程序持有時要求歸還並返回 False，需定期重試'''
+        if self.__acquire(self.shard_id):
+            if self.__reclaim_file is not None:
+                self.__reclaim_file.close()
+                self.__reclaim_file = None
+            return True
+
+        if self.__reclaim_file is None:
+            self.__reclaim_file = self.__lock(self.__get_reclaim_path(self.shard_id))
+        return False
+
+    def try_takeover(self) -> List[int]:
+        '''接手沒有程序持有且沒有被要求歸還的分區，返回新取得的分區'''
+        return [
+            shard for shard in range(self.shard_count)
+            if shard not in self.owned and not self.__is_reclaimed(shard) and self.__acquire(shard)
+        ]
+
+    def release_reclaimed(self) -> List[int]:
+        '''歸還原本的程序要求取回的分區，返回歸還的分區'''
+        released = [
+            shard for shard in sorted(self.owned)
+            if shard != self.shard_id and self.__is_reclaimed(shard)
+        ]
+        for shard in released:
+            self.__lock_files.pop(shard).close()
+            self.owned.discard(shard)
+        return released
+
+    def release_all(self) -> None:
+        '''釋放所有分區'''
+        for lock_file in self.__lock_files.values():
+            lock_file.close()
+        self.__lock_files.clear()
+        self.owned.clear()
+        if self.__reclaim_file is not None:
+            self.__reclaim_file.close()
+            self.__reclaim_file = None
+
+    def __get_lock_path(self, shard: int) -> str:
+        '''取得分區的鎖檔路徑'''
+        return os.path.join(self.lock_dir, f"notification_shard_{shard:03d}.lock")
+
+    def __get_reclaim_path(self, shard: int) -> str:
+        '''取得分區的歸還鎖檔路徑'''
+        return os.path.join(self.lock_dir, f"notification_shard_{shard:03d}.reclaim")
+
+    def __lock(self, lock_path: str) -> TextIO | None:
+        '''以不阻塞的檔案鎖開啟鎖檔，已被其他程序鎖住時返回 None'''
+        os.makedirs(self.lock_dir, exist_ok=True)
+        lock_file = open(lock_path, "a+", encoding="utf8")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+
+        # 記錄持有的程序，方便除錯
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        return lock_file
+
+    def __is_reclaimed(self, shard: int) -> bool:
+        '''分區原本的程序是否正在要求取回，程序結束時作業系統會釋放歸還鎖檔'''
+        if self.shard_count == 1:
+            return False
+
+        reclaim_path = self.__get_reclaim_path(shard)
+        if not os.path.exists(reclaim_path):
+            return False
+
+        lock_file = self.__lock(reclaim_path)
+        if lock_file is None:
+            return True
+        lock_file.close()
+        return False
+
+    def __acquire(self, shard: int) -> bool:
+        '''以不阻塞的檔案鎖取得分區'''
+        if shard in self.owned:
+            return True
+        if self.shard_count == 1:
+            self.owned.add(shard)
+            return True
+
+        lock_file = self.__lock(self.__get_lock_path(shard))
+        if lock_file is None:
+            return False
+
+        self.__lock_files[shard] = lock_file
+        self.owned.add(shard)
+        return True
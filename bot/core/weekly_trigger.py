@@ -0,0 +1,73 @@
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import List
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.util import astimezone, localize
+
+WEEKDAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class WeeklyTrigger(BaseTrigger):
+    '''每週在指定星期的固定時分觸發
+
+    星期以 7 位元遮罩記錄，第 0 位為星期一，
+    下次觸發時間以位元運算直接算出，不需逐欄位比對 cron 表達式
+    '''
+
+    __slots__ = ("weekday_mask", "hour", "minute", "timezone")
+
+    def __init__(self, weekday_mask: int, hour: int, minute: int, timezone: tzinfo | str) -> None:
+        if not 0 < weekday_mask < 1 << 7:
+            raise ValueError(f"Invalid weekday mask {weekday_mask}.")
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"Invalid time {hour}:{minute}.")
+
+        self.weekday_mask = weekday_mask
+        self.hour = hour
+        self.minute = minute
+        self.timezone = astimezone(timezone)
+
+    @classmethod
+    def from_weekdays(cls, weekdays: List[int], hour: int, minute: int, timezone: tzinfo | str) -> 'WeeklyTrigger':
+        '''以星期列表 (1 ~ 7 對應星期一 ~ 星期日) 建立'''
+        weekday_mask = 0
+        for weekday in weekdays:
+            weekday_mask |= 1 << (weekday - 1)
+        return cls(weekday_mask, hour, minute, timezone)
+
+    def get_next_fire_time(self, previous_fire_time: datetime | None, now: datetime) -> datetime | None:
+        '''取得 previous_fire_time 之後且不早於 now 的第一個觸發時間'''
+        if previous_fire_time is not None:
+            start = min(now, previous_fire_time + timedelta(microseconds=1))
+            if start == previous_fire_time:
+                start += timedelta(microseconds=1)
+        else:
+            start = now
+
+        local_start = start.astimezone(self.timezone)
+        today = local_start.date()
+        today_fire_time = self.__localize(today)
+
+        # 將遮罩旋轉為以今天為第 0 位，並接上下一週，今天的時間已過時從明天找起
+        weekday = today.weekday()
+        rotated = ((self.weekday_mask >> weekday) | (self.weekday_mask << (7 - weekday))) & 0x7F
+        rotated |= rotated << 7
+        offset = 0 if today_fire_time >= local_start else 1
+        remain = rotated >> offset
+        days = offset + (remain & -remain).bit_length() - 1
+
+        return self.__localize(today + timedelta(days=days))
+
+    def __localize(self, day: date) -> datetime:
+        '''取得該日的觸發時間，pytz 時區需以 localize 取得正確的偏移，不可直接指定 tzinfo'''
+        return localize(datetime.combine(day, time(self.hour, self.minute)), self.timezone)
+
+    def __str__(self) -> str:
+        weekdays = ",".join(
+            name for index, name in enumerate(WEEKDAY_NAMES) if self.weekday_mask >> index & 1)
+        return f"weekly[{weekdays} {self.hour:02d}:{self.minute:02d}]"
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} (weekday_mask={self.weekday_mask:#09b}, "
+            f"hour={self.hour}, minute={self.minute}, timezone='{self.timezone}')>"
+        )
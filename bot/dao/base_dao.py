@@ -1,24 +1,106 @@
 import os
 import json
+import tempfile
+import threading
+from typing import Any, List, Tuple
+from contextlib import contextmanager, asynccontextmanager
+from dao.dao_executor import async_variant, run_in_dao_executor
+from dao.serializers import get_serializer, detect_serializer
 
 INDENT = 2
+FLUSH_INTERVAL = 1.0
+JOURNAL_MAX_RECORDS = 1000
+JOURNAL_MAX_BYTES = 1024 * 1024
+
+
+class PendingBatch:
+    '''abatch 區塊中的寫入，只記錄操作，離開區塊時才套用到 DAO'''
+
+    def __init__(self) -> None:
+        # [(操作, path, 值)]
+        self.operations: List[Tuple[str, List[str], Any]] = []
+
+    def set(self, path: List[str], value: Any) -> None:
+        '''記錄設定 path 位置的值'''
+        self.operations.append(("set", path, value))
+
+    def delete(self, path: List[str]) -> None:
+        '''記錄刪除 path 位置的值'''
+        self.operations.append(("del", path, None))
 
 
 class BaseDAO:
-    def __init__(self, file_path: str, format: dict | None = None, indent: int = INDENT) -> None:
-        '''創建 json 檔案，有非 json 格式內容則不處理'''
+    def __init__(
+        self,
+        file_path: str,
+        format: dict | None = None,
+        indent: int = INDENT,
+        write_behind: bool = False,
+        flush_interval: float = FLUSH_INTERVAL,
+        journal: bool = False,
+        journal_max_records: int = JOURNAL_MAX_RECORDS,
+        journal_max_bytes: int = JOURNAL_MAX_BYTES,
+        serializer: str = "json"
+    ) -> None:
+        '''創建 json 檔案，有非 json 格式內容則不處理
+
+        write_behind 為 True 時，寫入只標記為待寫入，
+        由背景執行緒每 flush_interval 秒合併寫入一次
+
+        journal 為 True 時，set / delete 只在日誌檔附加一行紀錄，
+        日誌超過 journal_max_records 筆或 journal_max_bytes 位元組時壓縮回快照
+
+        serializer 為寫入時使用的格式，讀取時自動判斷檔案格式，
+        格式不同時會轉換為 serializer 的格式
+        '''
         self.jdata: dict = {}
         self.file_path = file_path
         self.indent = indent
+        self.serializer = get_serializer(serializer, indent)
+        self.lock = threading.RLock()
+        self.is_dirty = False
+        self.flush_interval = flush_interval
+        self.cache_hits = 0
+        self.cache_reloads = 0
+        self.__fingerprint: tuple | None = None
+
+        self.journal = journal
+        self.journal_path = f"{file_path}.journal"
+        self.journal_max_records = journal_max_records
+        self.journal_max_bytes = journal_max_bytes
+        self.journal_records = 0
+        self.journal_bytes = 0
+
+        # 批次寫入的狀態，savepoints 記錄每層批次開始時 undo 紀錄的數量
+        self.__batch_savepoints: List[int] = []
+        self.__batch_undo: List[Tuple[List[str], bool, Any]] = []
+        self.__batch_records: List[dict] = []
+        self.__batch_pending = False
+
+        # 初始化期間同步寫入，完成後再切換模式
+        self.write_behind = False
+        self.__write_lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__flusher: threading.Thread | None = None
+
+        self.__init_file(format)
+
+        if write_behind:
+            self.write_behind = True
+            self.__start_flusher()
+
+    def __init_file(self, format: dict | None) -> None:
+        '''初始化檔案內容與格式'''
+        file_path = self.file_path
 
         # 檢查檔案存在
         if not os.path.exists(file_path):
             self.write()
 
         # 初始化空，避免讀取錯誤
-        with open(file_path, 'r', encoding='utf8') as f:
-            f_content = f.read().strip()
-        if not f_content:
+        with open(file_path, 'rb') as f:
+            f_content = f.read()
+        if not f_content.strip():
             self.write()
 
         # 檢查格式
@@ -27,6 +109,9 @@ class BaseDAO:
 
         # 無須初始化格式
         if format is None:
+            # 檔案格式與設定不同時轉換格式，orjson 與標準函式庫 json 的輸出不完全相同，切換時也會改寫一次
+            if f_content.strip() and f_content != self.serializer.dumps(self.jdata):
+                self.write()
             return
 
         # 全空
@@ -42,15 +127,357 @@ class BaseDAO:
         self.write()
 
     def write(self):
-        '''寫入檔案'''
-        with open(self.file_path, 'w', encoding='utf8') as jfile:
-            json.dump(self.jdata, jfile, indent=self.indent)
+        '''寫入檔案，寫入延遲模式下僅標記為待寫入
+
+        日誌模式下會寫入完整快照並清空日誌，批次中延後到批次結束時寫入
+        '''
+        if self.__batch_savepoints:
+            self.__batch_pending = True
+            return
+
+        if self.write_behind:
+            with self.lock:
+                self.is_dirty = True
+            return
+
+        self.__dump()
+
+    def flush(self) -> None:
+        '''立即寫入尚未寫入的變更'''
+        if self.is_dirty:
+            self.__dump()
+
+    def close(self) -> None:
+        '''停止背景寫入，並寫入剩餘的變更'''
+        self.__stop_event.set()
+        if self.__flusher is not None:
+            self.__flusher.join()
+            self.__flusher = None
+        self.flush()
 
     def read(self) -> bool:
-        '''讀取檔案'''
+        '''讀取檔案，日誌模式下會再重播日誌'''
         try:
-            with open(self.file_path, 'r', encoding='utf8') as jfile:
-                self.jdata = json.load(jfile)
+            with self.lock:
+                fingerprint = self.__get_fingerprint()
+                with open(self.file_path, 'rb') as jfile:
+                    content = jfile.read()
+                self.jdata = detect_serializer(content, self.indent).loads(content)
+                if self.journal:
+                    self.__replay_journal()
+                self.__fingerprint = fingerprint
                 return True
         except:
             return False
+
+    def refresh(self) -> bool:
+        '''檔案的 (inode, size, mtime_ns) 改變時才重新讀取，否則沿用記憶體資料
+
+        有待寫入的變更時以記憶體資料為準
+
+        Return
+        ----------
+        是否重新讀取檔案
+        '''
+        with self.lock:
+            if self.is_dirty or self.__batch_savepoints or (
+                self.__fingerprint is not None and
+                self.__fingerprint == self.__get_fingerprint()
+            ):
+                self.cache_hits += 1
+                return False
+
+            self.cache_reloads += 1
+            self.read()
+            return True
+
+    def set(self, path: List[str], value: Any) -> None:
+        '''設定 path 位置的值，不存在的上層鍵會自動創建'''
+        record = {"op": "set", "path": path, "value": value}
+        with self.lock:
+            self.__save_undo(path)
+            self.__apply(record)
+            self.__save_record(record)
+
+    def delete(self, path: List[str]) -> None:
+        '''刪除 path 位置的值，不存在時不處理'''
+        record = {"op": "del", "path": path}
+        with self.lock:
+            self.__save_undo(path)
+            self.__apply(record)
+            self.__save_record(record)
+
+    def compact(self) -> None:
+        '''將目前資料寫入快照並清空日誌'''
+        self.__dump()
+
+    @contextmanager
+    def batch(self):
+        '''批次寫入，區塊中的寫入延後到離開最外層區塊時一次寫入
+
+        區塊中發生例外時，還原該區塊經由 set / delete 做的變更，
+        區塊執行期間持有 lock，區塊中請使用同步方法
+        '''
+        with self.lock:
+            self.__begin_batch()
+            try:
+                yield self
+            except BaseException:
+                self.__rollback_batch()
+                raise
+            self.__commit_batch()
+
+    @asynccontextmanager
+    async def abatch(self):
+        '''batch 的非同步版本，返回 PendingBatch
+
+        區塊中的寫入只記錄在 PendingBatch，離開區塊時才在 DAO 專用執行緒中以 batch 一次套用，
+        其他協程在區塊期間的寫入不屬於這個批次；區塊中發生例外時不套用任何變更
+        '''
+        pending = PendingBatch()
+        yield pending
+        await run_in_dao_executor(self.__apply_pending_batch, pending)
+
+    aread = async_variant(read)
+    awrite = async_variant(write)
+    aflush = async_variant(flush)
+    aset = async_variant(set)
+    adelete = async_variant(delete)
+
+    def __apply_pending_batch(self, pending: 'PendingBatch') -> None:
+        '''以 batch 套用 abatch 區塊中記錄的寫入'''
+        with self.batch():
+            for op, path, value in pending.operations:
+                if op == "set":
+                    self.set(path, value)
+                else:
+                    self.delete(path)
+
+    def __begin_batch(self) -> None:
+        '''開始一層批次'''
+        with self.lock:
+            self.__batch_savepoints.append(len(self.__batch_undo))
+
+    def __rollback_batch(self) -> None:
+        '''還原這層批次的變更，最外層時捨棄尚未寫入的紀錄'''
+        with self.lock:
+            savepoint = self.__batch_savepoints.pop()
+            while len(self.__batch_undo) > savepoint:
+                path, existed, value = self.__batch_undo.pop()
+                if existed:
+                    self.__apply({"op": "set", "path": path, "value": value})
+                else:
+                    self.__apply({"op": "del", "path": path})
+                if self.__batch_records:
+                    self.__batch_records.pop()
+
+            if not self.__batch_savepoints:
+                self.__end_batch()
+
+    def __commit_batch(self) -> None:
+        '''結束一層批次，最外層時一次寫入所有變更'''
+        with self.lock:
+            self.__batch_savepoints.pop()
+            if self.__batch_savepoints:
+                return
+
+            records, pending = self.__batch_records, self.__batch_pending
+            self.__end_batch()
+
+            if pending:
+                self.write()
+            elif len(records) == 1:
+                self.__save_record(records[0])
+            elif records:
+                # 整批寫成一行，寫入中斷時整批捨棄
+                self.__save_record({"op": "batch", "records": records})
+
+    def __end_batch(self) -> None:
+        '''清除批次狀態'''
+        self.__batch_undo = []
+        self.__batch_records = []
+        self.__batch_pending = False
+
+    def __save_undo(self, path: List[str]) -> None:
+        '''批次中記錄 path 變更前的狀態，用於還原'''
+        if not self.__batch_savepoints:
+            return
+
+        node: Any = self.jdata
+        for i, key in enumerate(path):
+            if not isinstance(node, dict) or key not in node:
+                # 從第一個不存在的鍵開始刪除
+                self.__batch_undo.append((path[:i + 1], False, None))
+                return
+            if i == len(path) - 1:
+                self.__batch_undo.append((path, True, node[key]))
+                return
+            node = node[key]
+
+    def __apply(self, record: dict) -> None:
+        '''將一筆 set / delete / batch 紀錄套用到記憶體資料'''
+        if record["op"] == "batch":
+            for sub_record in record["records"]:
+                self.__apply(sub_record)
+            return
+
+        *parents, key = record["path"]
+        node = self.jdata
+
+        if record["op"] == "set":
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[key] = record["value"]
+            return
+
+        for parent in parents:
+            node = node.get(parent)
+            if not isinstance(node, dict):
+                return
+        node.pop(key, None)
+
+    def __save_record(self, record: dict) -> None:
+        '''保存一筆變更，日誌模式下附加到日誌檔，否則寫入檔案
+
+        批次中只暫存紀錄，批次結束時才保存
+        '''
+        if self.__batch_savepoints:
+            if self.journal:
+                self.__batch_records.append(record)
+            else:
+                self.__batch_pending = True
+            return
+
+        if not self.journal:
+            self.write()
+            return
+
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with open(self.journal_path, 'a', encoding='utf8') as jfile:
+            jfile.write(line)
+            jfile.flush()
+            os.fsync(jfile.fileno())
+
+        self.journal_records += 1
+        self.journal_bytes += len(line.encode('utf8'))
+        self.__fingerprint = self.__get_fingerprint()
+
+        if self.journal_records >= self.journal_max_records or \
+                self.journal_bytes >= self.journal_max_bytes:
+            self.compact()
+
+    def __replay_journal(self) -> None:
+        '''依序重播日誌，遇到不完整的紀錄 (寫入中斷) 即停止'''
+        self.journal_records = 0
+        self.journal_bytes = 0
+
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, 'rb') as jfile:
+            for line in jfile:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+
+                self.__apply(record)
+                self.journal_records += 1
+                self.journal_bytes += len(line)
+
+        # 截掉不完整的紀錄，避免之後附加的紀錄接在其後
+        if os.path.getsize(self.journal_path) > self.journal_bytes:
+            with open(self.journal_path, 'r+b') as jfile:
+                jfile.truncate(self.journal_bytes)
+
+    def __get_fingerprint(self) -> tuple | None:
+        '''取得檔案指紋，檔案不存在時返回 None，日誌模式下包含日誌檔'''
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        fingerprint = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+        if self.journal:
+            try:
+                stat = os.stat(self.journal_path)
+                fingerprint += (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                pass
+
+        return fingerprint
+
+    def __dump(self) -> None:
+        '''序列化資料並以原子方式寫入檔案'''
+        with self.__write_lock:
+            if self.journal:
+                # 快照與清空日誌需在同一把鎖內完成，避免新紀錄遺失
+                with self.lock:
+                    self.is_dirty = False
+                    self.__atomic_write(self.serializer.dumps(self.jdata))
+                    with open(self.journal_path, 'w', encoding='utf8'):
+                        pass
+                    self.journal_records = 0
+                    self.journal_bytes = 0
+                    self.__fingerprint = self.__get_fingerprint()
+                return
+
+            with self.lock:
+                content = self.serializer.dumps(self.jdata)
+                self.is_dirty = False
+
+            try:
+                self.__atomic_write(content)
+            except:
+                with self.lock:
+                    self.is_dirty = True
+                raise
+
+            # 自身寫入不需重新讀取
+            with self.lock:
+                if not self.is_dirty:
+                    self.__fingerprint = self.__get_fingerprint()
+
+    def __atomic_write(self, content: bytes) -> None:
+        '''寫入暫存檔後 fsync 再取代原檔，避免寫入中斷造成檔案損毀'''
+        dir_path = os.path.dirname(os.path.abspath(self.file_path))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=dir_path, prefix=f".{os.path.basename(self.file_path)}.", suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, 'wb') as jfile:
+                jfile.write(content)
+                jfile.flush()
+                os.fsync(jfile.fileno())
+
+            if os.path.exists(self.file_path):
+                os.chmod(tmp_path, os.stat(self.file_path).st_mode)
+            else:
+                os.chmod(tmp_path, 0o644)
+
+            os.replace(tmp_path, self.file_path)
+        except:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def __start_flusher(self) -> None:
+        '''啟動背景寫入執行緒'''
+        self.__stop_event.clear()
+        self.__flusher = threading.Thread(
+            target=self.__flush_loop,
+            name=f"dao-flusher-{os.path.basename(self.file_path)}",
+            daemon=True
+        )
+        self.__flusher.start()
+
+    def __flush_loop(self) -> None:
+        '''每隔 flush_interval 秒合併寫入一次'''
+        while not self.__stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                # 保留待寫入標記，下次重試
+                pass
@@ -1,6 +1,8 @@
 import os
+from types import MappingProxyType
 from dao.base_dao import BaseDAO
-from typing import List, Dict
+from dao.dao_executor import async_variant
+from typing import List, Dict, Set, Mapping, Tuple, FrozenSet, NamedTuple
 from utils.utils import get_config_file_path
 from utils.converters import pascal_to_snake
 
@@ -11,13 +13,86 @@ bot_setting_config_format = {
     "cog_dir_path": "./bot/cogs",
     "admin_guild_ids": [],
     "admin_role_ids": [],
-    "cog_auth": {}
+    "cog_auth": {},
+    "dao_setting": {},
+    "notification_scheduler": {},
+    "log": {}
 }
 
+dao_setting_format = {
+    "notification": {
+        "backend": "json",
+        "format": "json",
+        "shard_layout": "hash",
+        "shard_count": 16,
+        "write_behind": False,
+        "flush_interval": 1.0,
+        "journal": False,
+        "journal_max_records": 1000,
+        "journal_max_bytes": 1048576
+    }
+}
+
+notification_scheduler_setting_format = {
+    "persist_state": False,
+    "misfire_policy": "drop",
+    "misfire_grace_time": 3600,
+    "merge_channel_ids": [],
+    "process_shard_id": 0,
+    "process_shard_count": 1,
+    "takeover_interval": 30
+}
+
+log_setting_format = {
+    "queue": False,
+    "queue_size": 10000,
+    "overflow_policy": "block",
+    "rotation": "size",
+    "max_bytes": 10 * 1024 * 1024,
+    "when": "midnight",
+    "backup_count": 10,
+    "compress": True
+}
+
+
+class CogAuth(NamedTuple):
+    '''cog 的使用權'''
+    guilds: Tuple[int, ...]
+    roles: FrozenSet[int | None]
+    permissions: Mapping[str, bool]
+
+
+class CommandAuth(NamedTuple):
+    '''command 的有效使用權，未單獨設定時沿用 cog 的設定'''
+    roles: FrozenSet[int | None]
+    permissions: Mapping[str, bool]
+
+
+class AuthSnapshot(NamedTuple):
+    '''解析後不可變的權限快照'''
+    cogs: Mapping[str, CogAuth]
+    commands: Mapping[Tuple[str, str], CommandAuth]
+
+
+EMPTY_COG_AUTH = CogAuth((), frozenset(), MappingProxyType({}))
+
 
 class BotSettingDAO(BaseDAO):
     def __init__(self, file_path: str) -> None:
+        self.auth_snapshot = AuthSnapshot(MappingProxyType({}), MappingProxyType({}))
+        # 尚未寫入設定檔的 cog 與 command 權限位
+        self.__missing_auth: Dict[str, Set[str]] = {}
         super().__init__(file_path, bot_setting_config_format)
+        self.__build_auth_snapshot()
+
+    def read(self) -> bool:
+        '''讀取檔案，並重建權限快照'''
+        result = super().read()
+        if result:
+            self.__build_auth_snapshot()
+        return result
+
+    aread = async_variant(read)
 
     def get_log_dir_path(self) -> str:
         '''獲取日誌文件的目錄'''
@@ -37,6 +112,26 @@ class BotSettingDAO(BaseDAO):
         '''獲取可使用管理命令的身份組'''
         return self.jdata["admin_role_ids"]
 
+    def get_dao_setting(self, dao_name: str) -> Dict:
+        '''獲取 DAO 的存取設定，未設定的項目使用預設值'''
+        setting = dao_setting_format.get(dao_name, {}).copy()
+        setting.update(self.jdata["dao_setting"].get(dao_name, {}))
+        return setting
+
+    def get_notification_scheduler_setting(self) -> Dict:
+        '''獲取通知排程的設定，未設定的項目使用預設值'''
+        return self.__get_section_setting("notification_scheduler", notification_scheduler_setting_format)
+
+    def get_log_setting(self) -> Dict:
+        '''獲取日誌記錄的設定，未設定的項目使用預設值'''
+        return self.__get_section_setting("log", log_setting_format)
+
+    def __get_section_setting(self, key: str, setting_format: Dict) -> Dict:
+        '''獲取頂層的設定區塊，未設定的項目使用預設值'''
+        setting = setting_format.copy()
+        setting.update(self.jdata[key])
+        return setting
+
     @staticmethod
     def __normalize_cog_name(func):
         '''規範 cog 的名稱'''
@@ -47,76 +142,110 @@ class BotSettingDAO(BaseDAO):
             return func(self, cog_name, *args, **kwargs)
         return wrapper
 
+    def __build_auth_snapshot(self) -> None:
+        '''解析 cog_auth 為不可變的權限快照，查詢時不再存取檔案'''
+        cogs: Dict[str, CogAuth] = {}
+        commands: Dict[Tuple[str, str], CommandAuth] = {}
+
+        for cog_name, cog in self.jdata.get("cog_auth", {}).items():
+            cog_auth = CogAuth(
+                guilds=tuple(cog.get("guilds", [])),
+                roles=frozenset(cog.get("roles", [])),
+                permissions=MappingProxyType(dict(cog.get("permissions", {})))
+            )
+            cogs[cog_name] = cog_auth
+
+            for command, command_setting in cog.get("commands", {}).items():
+                if "roles" not in command_setting or "permissions" not in command_setting:
+                    self.__missing_auth.setdefault(cog_name, set()).add(command)
+
+                roles = command_setting.get("roles")
+                permissions = command_setting.get("permissions")
+                commands[(cog_name, command)] = CommandAuth(
+                    roles=frozenset(roles) if roles else cog_auth.roles,
+                    permissions=MappingProxyType(dict(permissions))
+                    if permissions else cog_auth.permissions
+                )
+
+        self.auth_snapshot = AuthSnapshot(
+            MappingProxyType(cogs), MappingProxyType(commands))
+
     @__normalize_cog_name
     def create_cog(self, cog_name: str) -> None:
         '''創建 cog 權限位'''
         if cog_name not in self.jdata["cog_auth"]:
-            self.jdata["cog_auth"][cog_name] = {}
-            self.jdata["cog_auth"][cog_name]["guilds"] = []
-            self.jdata["cog_auth"][cog_name]["roles"] = []
-            self.jdata["cog_auth"][cog_name]["permissions"] = {}
-            self.jdata["cog_auth"][cog_name]["commands"] = {}
-            self.write()
+            self.set(["cog_auth", cog_name], {
+                "guilds": [],
+                "roles": [],
+                "permissions": {},
+                "commands": {}
+            })
+            self.__build_auth_snapshot()
 
     @__normalize_cog_name
+    def register_cog(self, cog_name: str) -> None:
+        '''登記 cog，缺少的權限位在 save_missing_auth 時一次寫入'''
+        if cog_name not in self.auth_snapshot.cogs:
+            self.__missing_auth.setdefault(cog_name, set())
+
+    @__normalize_cog_name
+    def get_cog_auth(self, cog_name: str) -> CogAuth:
+        '''獲取 cog 的使用權'''
+        return self.auth_snapshot.cogs.get(cog_name, EMPTY_COG_AUTH)
+
     def get_cog_guilds(self, cog_name: str) -> List[int]:
         '''獲取可使用該 cog 的伺服器'''
-        try:
-            return self.jdata["cog_auth"][cog_name]["guilds"]
-        except:
-            return []
+        return list(self.get_cog_auth(cog_name).guilds)
 
-    @__normalize_cog_name
-    def get_cog_roles(self, cog_name: str) -> List[int]:
+    def get_cog_roles(self, cog_name: str) -> List[int | None]:
         '''獲取可使用該 cog 的身份組'''
-        try:
-            return self.jdata["cog_auth"][cog_name]["roles"]
-        except:
-            return []
+        return list(self.get_cog_auth(cog_name).roles)
 
-    @__normalize_cog_name
     def get_cog_permissions(self, cog_name: str) -> Dict:
         '''獲取可使用該 cog 的權限'''
-        try:
-            return self.jdata["cog_auth"][cog_name]["permissions"]
-        except:
-            return {}
-
-    @__normalize_cog_name
-    def __create_cog_command_roles(self, cog_name: str, command: str):
-        '''創建 cog 中 command 身份組位'''
-        if command not in self.jdata["cog_auth"][cog_name]["commands"]:
-            self.jdata["cog_auth"][cog_name]["commands"][command] = {}
-
-        self.jdata["cog_auth"][cog_name]["commands"][command]["roles"] = []
-        self.write()
-
-    @__normalize_cog_name
-    def get_cog_command_roles(self, cog_name: str, command: str) -> List[int]:
-        '''獲取可使用該 cog 中 command 的身份組'''
-        try:
-            return self.jdata["cog_auth"][cog_name]["commands"][command]["roles"]
-        except:
-            self.__create_cog_command_roles(cog_name, command)
-            return []
-
-    @__normalize_cog_name
-    def __create_cog_command_permissions(self, cog_name: str, command: str):
-        '''創建 cog 中 command 權限位'''
-        if command not in self.jdata["cog_auth"][cog_name]["commands"]:
-            self.jdata["cog_auth"][cog_name]["commands"][command] = {}
-
-        self.jdata["cog_auth"][cog_name]["commands"][command]["permissions"] = {}
-        self.write()
+        return dict(self.get_cog_auth(cog_name).permissions)
 
     @__normalize_cog_name
-    def get_cog_command_permissions(self, cog_name: str, command: str) -> Dict:
-        '''獲取可使用該 cog 中 command 的權限'''
-        try:
-            return self.jdata["cog_auth"][cog_name]["commands"][command]["permissions"]
-        except:
-            self.__create_cog_command_permissions(cog_name, command)
-            return {}
+    def get_command_auth(self, cog_name: str, command: str) -> CommandAuth:
+        '''獲取 cog 中 command 的有效使用權
+
+        設定檔缺少該 command 的權限位時先沿用 cog 的設定，
+        並在 save_missing_auth 時一次寫入
+        '''
+        command_auth = self.auth_snapshot.commands.get((cog_name, command))
+        if command_auth is not None:
+            return command_auth
+
+        self.__missing_auth.setdefault(cog_name, set()).add(command)
+        cog_auth = self.get_cog_auth(cog_name)
+        return CommandAuth(cog_auth.roles, cog_auth.permissions)
+
+    def save_missing_auth(self) -> None:
+        '''將缺少的 cog、command 權限位一次寫入設定檔'''
+        if not self.__missing_auth:
+            return
+
+        with self.lock:
+            missing_auth, self.__missing_auth = self.__missing_auth, {}
+
+            with self.batch():
+                for cog_name, commands in missing_auth.items():
+                    if cog_name not in self.jdata["cog_auth"]:
+                        self.set(["cog_auth", cog_name], {
+                            "guilds": [],
+                            "roles": [],
+                            "permissions": {},
+                            "commands": {}
+                        })
+
+                    cog_commands = self.jdata["cog_auth"][cog_name].get("commands", {})
+                    for command in commands:
+                        command_setting = cog_commands.get(command, {})
+                        for key, default in (("roles", []), ("permissions", {})):
+                            if key not in command_setting:
+                                self.set(["cog_auth", cog_name, "commands", command, key], default)
+
+            self.__build_auth_snapshot()
 
 
 bot_setting = BotSettingDAO(BOT_SETTING_FILE_PATH)
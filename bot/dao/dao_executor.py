@@ -0,0 +1,21 @@
+import asyncio
+import functools
+from typing import Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+
+# 只有一個執行緒，所有 DAO 操作依提交順序執行
+dao_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dao")
+
+
+async def run_in_dao_executor(func: Callable, *args, **kwargs) -> Any:
+    '''在 DAO 專用執行緒中執行 func，避免檔案 I/O 阻塞事件迴圈'''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(dao_executor, functools.partial(func, *args, **kwargs))
+
+
+def async_variant(func: Callable) -> Callable:
+    '''將同步的 DAO 方法轉換為在 DAO 專用執行緒中執行的非同步方法'''
+
+    async def wrapper(*args, **kwargs):
+        return await run_in_dao_executor(func, *args, **kwargs)
+    return wrapper
@@ -1,46 +1,51 @@
-from typing import List
+from typing import List, Iterator, Tuple
 from dao.base_dao import BaseDAO
-from utils.utils import get_config_file_path
-
-NOTIFICATION_FILE_PATH = get_config_file_path("./data/notification.json")
-
-
-class UserNotificationDataStruct:
-    def __init__(self, hour: int, minute: int, weekdays: List[int], channel_id: int) -> None:
-        self.hour = hour
-        self.minute = minute
-        self.weekdays = weekdays
-        self.channel_id = channel_id
+from dao.dao_executor import async_variant
+from dao.notification_struct import UserNotificationDataStruct
 
 
 class NotificationDAO(BaseDAO):
-    def __init__(self, file_path: str) -> None:
-        super().__init__(file_path)
+    def __init__(
+        self,
+        file_path: str,
+        write_behind: bool = False,
+        flush_interval: float = 1.0,
+        journal: bool = False,
+        journal_max_records: int = 1000,
+        journal_max_bytes: int = 1024 * 1024,
+        serializer: str = "json"
+    ) -> None:
+        super().__init__(
+            file_path,
+            write_behind=write_behind,
+            flush_interval=flush_interval,
+            journal=journal,
+            journal_max_records=journal_max_records,
+            journal_max_bytes=journal_max_bytes,
+            serializer=serializer
+        )
 
     @staticmethod
     def __auto_save(func):
-        '''自動讀取、寫入檔案'''
+        '''檔案變更時重新讀取，函式中的變更以一個批次寫入檔案或日誌'''
 
         def wrapper(self, *args, **kwargs):
-            self.read()
-            result = func(self, *args, **kwargs)
-            self.write()
-            return result
+            with self.lock:
+                self.refresh()
+                with self.batch():
+                    return func(self, *args, **kwargs)
         return wrapper
 
     @staticmethod
     def __auto_read(func):
-        '''自動讀取檔案'''
+        '''檔案變更時才重新讀取，否則使用記憶體中的資料'''
 
         def wrapper(self, *args, **kwargs):
-            self.read()
-            return func(self, *args, **kwargs)
+            with self.lock:
+                self.refresh()
+                return func(self, *args, **kwargs)
         return wrapper
 
-    @__auto_save
-    def __create_user(self, user_id: str) -> None:
-        self.jdata[user_id] = {}
-
     @__auto_save
     def add_weekly_notification(
         self,
@@ -53,16 +58,12 @@ class NotificationDAO(BaseDAO):
     ) -> None:
         '''添加記錄用戶設定的每周提醒'''
 
-        str_user_id = str(user_id)
-        if str_user_id not in self.jdata:
-            self.__create_user(str_user_id)
-
-        self.jdata[str_user_id][message] = {
+        self.set([str(user_id), message], {
             "hour": hour,
             "minute": minute,
             "weekdays": weekdays,
             "channel_id": channel_id
-        }
+        })
 
     @__auto_read
     def get_weekly_notification(self, user_id: int, message: str) -> UserNotificationDataStruct | None:
@@ -99,9 +100,33 @@ class NotificationDAO(BaseDAO):
         '''刪除用戶設定的通知'''
         str_user_id = str(user_id)
         if str_user_id in self.jdata and message in self.jdata[str_user_id]:
-            del self.jdata[str_user_id][message]
-            if not self.jdata[str_user_id]:
-                del self.jdata[str_user_id]
+            if len(self.jdata[str_user_id]) == 1:
+                self.delete([str_user_id])
+            else:
+                self.delete([str_user_id, message])
+
+    @__auto_read
+    def iter_notifications(self) -> Iterator[Tuple[int, str, UserNotificationDataStruct]]:
+        '''一次讀取所有用戶的通知 (user_id, message, 通知設定)'''
+        return iter([
+            (
+                int(user_id),
+                message,
+                UserNotificationDataStruct(
+                    hour=data["hour"],
+                    minute=data["minute"],
+                    weekdays=data["weekdays"].copy(),
+                    channel_id=data["channel_id"]
+                )
+            )
+            for user_id, notifications in self.jdata.items()
+            for message, data in notifications.items()
+        ])
 
+    aadd_weekly_notification = async_variant(add_weekly_notification)
+    aget_weekly_notification = async_variant(get_weekly_notification)
+    aget_all_user_id = async_variant(get_all_user_id)
+    aget_user_notifications = async_variant(get_user_notifications)
+    adel_user_notification = async_variant(del_user_notification)
+    aiter_notifications = async_variant(iter_notifications)
 
-notification_dao = NotificationDAO(NOTIFICATION_FILE_PATH)
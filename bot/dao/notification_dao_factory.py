@@ -0,0 +1,58 @@
+import os
+from typing import Dict
+from dao.bot_setting_dao import bot_setting
+from utils.utils import get_config_file_path
+from dao.notification_dao import NotificationDAO
+from dao.sharded_notification_dao import ShardedNotificationDAO
+from dao.sqlite_notification_dao import SQLiteNotificationDAO, migrate_json_to_sqlite
+
+NOTIFICATION_FILE_PATH = get_config_file_path("./data/notification.json")
+NOTIFICATION_DB_FILE_PATH = get_config_file_path("./data/notification.db")
+NOTIFICATION_SHARD_DIR_PATH = "./data/notification"
+
+
+def create_notification_dao(setting: Dict):
+    '''依設定的儲存後端建立通知 DAO
+
+    backend 為 "sqlite" 或 "sharded" 且資料尚未建立時，會先從 json 檔案遷移資料
+    '''
+    backend = setting["backend"]
+    json_options = {
+        "journal": setting["journal"],
+        "journal_max_records": setting["journal_max_records"],
+        "journal_max_bytes": setting["journal_max_bytes"],
+        "serializer": setting["format"]
+    }
+
+    if backend == "json":
+        return NotificationDAO(
+            NOTIFICATION_FILE_PATH,
+            write_behind=setting["write_behind"],
+            flush_interval=setting["flush_interval"],
+            **json_options
+        )
+
+    if backend == "sharded":
+        need_migrate = not os.path.exists(NOTIFICATION_SHARD_DIR_PATH) and \
+            os.path.exists(NOTIFICATION_FILE_PATH)
+
+        sharded_dao = ShardedNotificationDAO(
+            NOTIFICATION_SHARD_DIR_PATH,
+            layout=setting["shard_layout"],
+            shard_count=setting["shard_count"],
+            **json_options
+        )
+        if need_migrate:
+            # 以目前的設定開啟，包含日誌中尚未寫回快照的通知
+            sharded_dao.import_json_data(NotificationDAO(NOTIFICATION_FILE_PATH, **json_options).jdata)
+        return sharded_dao
+
+    if backend == "sqlite":
+        if not os.path.exists(NOTIFICATION_DB_FILE_PATH) and os.path.exists(NOTIFICATION_FILE_PATH):
+            migrate_json_to_sqlite(NOTIFICATION_FILE_PATH, NOTIFICATION_DB_FILE_PATH, setting["format"])
+        return SQLiteNotificationDAO(NOTIFICATION_DB_FILE_PATH)
+
+    raise ValueError(f'Unknown notification backend "{backend}".')
+
+
+notification_dao = create_notification_dao(bot_setting.get_dao_setting("notification"))
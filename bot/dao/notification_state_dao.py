@@ -0,0 +1,30 @@
+from datetime import datetime
+from dao.base_dao import BaseDAO
+from dao.dao_executor import async_variant
+from utils.utils import get_config_file_path
+
+NOTIFICATION_STATE_FILE_PATH = get_config_file_path("./data/notification_state.json")
+
+notification_state_format = {
+    "last_dispatch_time": None
+}
+
+
+class NotificationStateDAO(BaseDAO):
+    '''記錄通知排程的狀態，重啟後用於補發停機期間錯過的通知'''
+
+    def __init__(self, file_path: str) -> None:
+        super().__init__(file_path, notification_state_format)
+
+    def get_last_dispatch_time(self) -> datetime | None:
+        '''取得最後一次分派的時段時間'''
+        last_dispatch_time = self.jdata.get("last_dispatch_time")
+        if last_dispatch_time is None:
+            return None
+        return datetime.fromisoformat(last_dispatch_time)
+
+    def set_last_dispatch_time(self, dispatch_time: datetime) -> None:
+        '''記錄最後一次分派的時段時間'''
+        self.set(["last_dispatch_time"], dispatch_time.isoformat())
+
+    aset_last_dispatch_time = async_variant(set_last_dispatch_time)
@@ -0,0 +1,9 @@
+from typing import List
+
+
+class UserNotificationDataStruct:
+    def __init__(self, hour: int, minute: int, weekdays: List[int], channel_id: int) -> None:
+        self.hour = hour
+        self.minute = minute
+        self.weekdays = weekdays
+        self.channel_id = channel_id
@@ -0,0 +1,98 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Serializer(ABC):
+    '''資料檔的序列化格式'''
+    name = ""
+
+    @abstractmethod
+    def dumps(self, data: dict) -> bytes:
+        '''將資料轉換為檔案內容'''
+
+    @abstractmethod
+    def loads(self, content: bytes) -> dict:
+        '''將檔案內容轉換為資料'''
+
+
+class JsonSerializer(Serializer):
+    '''縮排的 json，已安裝 orjson 且縮排為 2 時使用 orjson'''
+    name = "json"
+
+    def __init__(self, indent: int = 2) -> None:
+        self.indent = indent
+
+    def dumps(self, data: dict) -> bytes:
+        if orjson is not None and self.indent == 2:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        return json.dumps(data, indent=self.indent).encode('utf8')
+
+    def loads(self, content: bytes) -> dict:
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+
+
+class CompactJsonSerializer(JsonSerializer):
+    '''無縮排、無多餘空白的 json'''
+    name = "compact_json"
+
+    def dumps(self, data: dict) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(',', ':')).encode('utf8')
+
+
+class OrjsonSerializer(CompactJsonSerializer):
+    '''使用 orjson 的緊湊 json，未安裝 orjson 時等同 compact_json'''
+    name = "orjson"
+
+
+class MsgpackSerializer(Serializer):
+    '''msgpack 二進位格式，需安裝 msgpack'''
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ImportError('Serializer "msgpack" requires the msgpack package.')
+
+    def dumps(self, data: dict) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, content: bytes) -> dict:
+        return msgpack.unpackb(content, raw=False, strict_map_key=False)
+
+
+SERIALIZERS: Dict[str, type] = {
+    JsonSerializer.name: JsonSerializer,
+    CompactJsonSerializer.name: CompactJsonSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer
+}
+
+
+def get_serializer(name: str, indent: int = 2) -> Serializer:
+    '''依名稱取得序列化格式'''
+    if name not in SERIALIZERS:
+        raise ValueError(f'Unknown serializer "{name}".')
+    if name == JsonSerializer.name:
+        return JsonSerializer(indent)
+    return SERIALIZERS[name]()
+
+
+def detect_serializer(content: bytes, indent: int = 2) -> Serializer:
+    '''依檔案內容判斷格式，json 以 { 或 [ 開頭，其餘視為 msgpack'''
+    if content.lstrip()[:1] in (b"{", b"["):
+        return JsonSerializer(indent)
+    return MsgpackSerializer()
@@ -0,0 +1,230 @@
+import os
+import re
+import threading
+from typing import Dict, List, Iterable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dao.base_dao import BaseDAO
+from dao.dao_executor import async_variant
+from dao.notification_dao import NotificationDAO
+from dao.notification_struct import UserNotificationDataStruct
+
+MANIFEST_FILENAME = "manifest.json"
+LOAD_WORKERS = 8
+
+HASH_SHARD_PATTERN = re.compile(r"^shard_(\d+)\.json$")
+USER_SHARD_PATTERN = re.compile(r"^(\d+)\.json$")
+
+
+class ShardedNotificationDAO:
+    '''將用戶通知分散存放在多個 NotificationDAO 檔案，公開方法與 NotificationDAO 相同
+
+    layout 為 "hash" 時依 user_id % shard_count 分配到固定數量的檔案，
+    layout 為 "per_user" 時每個用戶一個檔案
+
+    目錄中的 manifest.json 記錄所有用戶 ID 與其所在的分片，讀寫都先依 manifest 找到分片，
+    只有新用戶才依 layout 分配，因此修改 shard_count 不影響已有的用戶。
+    分片在第一次存取時才開啟，寫入只會改寫該用戶所在的分片
+    '''
+
+    def __init__(
+        self,
+        dir_path: str,
+        layout: str = "hash",
+        shard_count: int = 16,
+        journal: bool = False,
+        journal_max_records: int = 1000,
+        journal_max_bytes: int = 1024 * 1024,
+        serializer: str = "json"
+    ) -> None:
+        if layout not in ("hash", "per_user"):
+            raise ValueError(f'Unknown shard layout "{layout}".')
+
+        self.dir_path = dir_path
+        self.layout = layout
+        self.shard_count = shard_count
+        self.lock = threading.RLock()
+        self.shard_options = {
+            "journal": journal,
+            "journal_max_records": journal_max_records,
+            "journal_max_bytes": journal_max_bytes,
+            "serializer": serializer
+        }
+
+        os.makedirs(dir_path, exist_ok=True)
+        self.manifest = BaseDAO(os.path.join(dir_path, MANIFEST_FILENAME))
+        self.shards: Dict[str, NotificationDAO] = {}
+
+        self.__check_manifest()
+
+    def __get_shard_name(self, user_id: int) -> str:
+        '''取得用戶所在的分片名稱，已在 manifest 中的用戶依其記錄，新用戶才依 layout 分配'''
+        shard_name = self.manifest.jdata.get(str(user_id))
+        if shard_name is not None:
+            return shard_name
+        if self.layout == "hash":
+            return f"shard_{int(user_id) % self.shard_count:03d}"
+        return str(user_id)
+
+    def __open_shard(self, shard_name: str) -> NotificationDAO:
+        '''開啟分片檔案'''
+        file_path = os.path.join(self.dir_path, f"{shard_name}.json")
+        return NotificationDAO(file_path, **self.shard_options)
+
+    def __open_shards(self, shard_names: Iterable[str]) -> None:
+        '''以執行緒池平行開啟尚未開啟的分片'''
+        shard_names = [shard_name for shard_name in shard_names if shard_name not in self.shards]
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+            shards = list(executor.map(self.__open_shard, shard_names))
+        self.shards.update(zip(shard_names, shards))
+
+    def __get_shard(self, user_id: int, create: bool = False) -> NotificationDAO | None:
+        '''取得用戶所在的分片，分片在第一次存取時才開啟
+
+        用戶不在 manifest 中時返回 None，create 為 True 時則開啟新用戶應分配的分片
+        '''
+        with self.lock:
+            if not create and str(user_id) not in self.manifest.jdata:
+                return None
+
+            shard_name = self.__get_shard_name(user_id)
+            self.__open_shards([shard_name])
+            return self.shards[shard_name]
+
+    def __check_manifest(self) -> None:
+        '''manifest 記錄的分片與目錄中的分片檔案不一致時，讀取所有分片重建 manifest
+
+        一致時只讀取 manifest，不需讀取分片
+        '''
+        pattern = HASH_SHARD_PATTERN if self.layout == "hash" else USER_SHARD_PATTERN
+        shard_names = {
+            filename[:-len(".json")]
+            for filename in os.listdir(self.dir_path)
+            if pattern.match(filename)
+        }
+        if shard_names == set(self.manifest.jdata.values()):
+            return
+
+        self.__open_shards(shard_names)
+        user_shards = {
+            user_id: shard_name
+            for shard_name in shard_names
+            for user_id in self.shards[shard_name].jdata
+        }
+        if user_shards != self.manifest.jdata:
+            self.manifest.jdata = user_shards
+            self.manifest.write()
+
+    def add_weekly_notification(
+        self,
+        user_id: int,
+        message: str,
+        hour: int,
+        minute: int,
+        weekdays: List[int],
+        channel_id: int
+    ) -> None:
+        '''添加記錄用戶設定的每周提醒'''
+        with self.lock:
+            shard = self.__get_shard(user_id, create=True)
+            assert shard is not None
+            # 先記錄到 manifest，寫入分片前中斷時只會留下沒有通知的用戶
+            if str(user_id) not in self.manifest.jdata:
+                self.manifest.set([str(user_id)], self.__get_shard_name(user_id))
+        shard.add_weekly_notification(user_id, message, hour, minute, weekdays, channel_id)
+
+    def get_weekly_notification(self, user_id: int, message: str) -> UserNotificationDataStruct | None:
+        '''取得用戶設定的每周提醒'''
+        shard = self.__get_shard(user_id)
+        if shard is None:
+            return None
+        return shard.get_weekly_notification(user_id, message)
+
+    def get_all_user_id(self) -> List[int]:
+        '''取得所有用戶 ID，由 manifest 提供，不需讀取分片'''
+        with self.lock:
+            return [int(user_id) for user_id in self.manifest.jdata.keys()]
+
+    def get_user_notifications(self, user_id: int) -> List[str]:
+        '''取得用戶設定的所有通知'''
+        shard = self.__get_shard(user_id)
+        if shard is None:
+            return []
+        return shard.get_user_notifications(user_id)
+
+    def del_user_notification(self, user_id: int, message: str) -> None:
+        '''刪除用戶設定的通知'''
+        shard = self.__get_shard(user_id)
+        if shard is None:
+            return
+        shard.del_user_notification(user_id, message)
+
+        with self.lock:
+            if shard.get_user_notifications(user_id):
+                return
+
+            shard_name = self.__get_shard_name(user_id)
+            self.manifest.delete([str(user_id)])
+
+            # 刪除沒有用戶的分片，避免 manifest 與分片檔案不一致
+            if not shard.jdata:
+                shard.close()
+                for file_path in (shard.file_path, shard.journal_path):
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                del self.shards[shard_name]
+
+    def iter_notifications(self) -> Iterator[Tuple[int, str, UserNotificationDataStruct]]:
+        '''依序讀取所有分片的通知 (user_id, message, 通知設定)'''
+        with self.lock:
+            shard_names = set(self.manifest.jdata.values())
+            self.__open_shards(shard_names)
+            shards = [self.shards[shard_name] for shard_name in shard_names]
+        return iter([
+            record
+            for shard in shards
+            for record in shard.iter_notifications()
+        ])
+
+    aadd_weekly_notification = async_variant(add_weekly_notification)
+    aget_weekly_notification = async_variant(get_weekly_notification)
+    aget_all_user_id = async_variant(get_all_user_id)
+    aget_user_notifications = async_variant(get_user_notifications)
+    adel_user_notification = async_variant(del_user_notification)
+    aiter_notifications = async_variant(iter_notifications)
+
+    def flush(self) -> None:
+        '''寫入所有分片尚未寫入的變更'''
+        with self.lock:
+            for shard in self.shards.values():
+                shard.flush()
+            self.manifest.flush()
+
+    def close(self) -> None:
+        '''關閉所有分片'''
+        with self.lock:
+            for shard in self.shards.values():
+                shard.close()
+            self.manifest.close()
+
+    def import_json_data(self, jdata: dict) -> int:
+        '''將 NotificationDAO 的 json 資料分散寫入分片，每個分片只寫入一次
+
+        Return
+        ----------
+        寫入的通知數量
+        '''
+        count = 0
+        with self.lock:
+            for str_user_id, notifications in jdata.items():
+                user_id = int(str_user_id)
+                shard = self.__get_shard(user_id, create=True)
+                assert shard is not None
+                shard.jdata[str_user_id] = notifications
+                self.manifest.jdata[str_user_id] = self.__get_shard_name(user_id)
+                count += len(notifications)
+
+            for shard in self.shards.values():
+                shard.write()
+            self.manifest.write()
+
+        return count
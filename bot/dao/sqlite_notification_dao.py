@@ -0,0 +1,252 @@
+import os
+import sys
+import sqlite3
+import threading
+from typing import List, Iterator, Tuple
+from dao.base_dao import BaseDAO
+from dao.dao_executor import async_variant
+from dao.serializers import detect_serializer
+from dao.notification_struct import UserNotificationDataStruct
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notification (
+    user_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, message)
+);
+
+CREATE TABLE IF NOT EXISTS notification_weekday (
+    user_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    weekday INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    PRIMARY KEY (user_id, message, weekday),
+    FOREIGN KEY (user_id, message)
+        REFERENCES notification (user_id, message) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_weekday_slot
+    ON notification_weekday (weekday, hour, minute);
+"""
+
+
+class SQLiteNotificationDAO:
+    '''以 SQLite 儲存用戶通知，公開方法與 NotificationDAO 相同
+
+    notification 表以 (user_id, message) 為主鍵，
+    notification_weekday 表每個星期一列，並以 (weekday, hour, minute) 建立索引
+    '''
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.lock = threading.RLock()
+
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def add_weekly_notification(
+        self,
+        user_id: int,
+        message: str,
+        hour: int,
+        minute: int,
+        weekdays: List[int],
+        channel_id: int
+    ) -> None:
+        '''添加記錄用戶設定的每周提醒'''
+        with self.lock, self.conn:
+            self.__insert_notification(
+                self.conn, user_id, message, hour, minute, weekdays, channel_id)
+
+    def get_weekly_notification(self, user_id: int, message: str) -> UserNotificationDataStruct | None:
+        '''取得用戶設定的每周提醒'''
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT hour, minute, channel_id FROM notification WHERE user_id = ? AND message = ?",
+                (user_id, message)
+            ).fetchone()
+            if row is None:
+                return None
+
+            weekdays = [
+                weekday for weekday, in self.conn.execute(
+                    "SELECT weekday FROM notification_weekday "
+                    "WHERE user_id = ? AND message = ? ORDER BY weekday",
+                    (user_id, message)
+                )
+            ]
+
+        return UserNotificationDataStruct(
+            hour=row[0],
+            minute=row[1],
+            weekdays=weekdays,
+            channel_id=row[2]
+        )
+
+    def get_all_user_id(self) -> List[int]:
+        '''取得所有用戶 ID'''
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT user_id FROM notification ORDER BY user_id").fetchall()
+        return [user_id for user_id, in rows]
+
+    def get_user_notifications(self, user_id: int) -> List[str]:
+        '''取得用戶設定的所有通知'''
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT message FROM notification WHERE user_id = ? ORDER BY rowid",
+                (user_id,)
+            ).fetchall()
+        return [message for message, in rows]
+
+    def del_user_notification(self, user_id: int, message: str) -> None:
+        '''刪除用戶設定的通知'''
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM notification WHERE user_id = ? AND message = ?",
+                (user_id, message)
+            )
+
+    def iter_notifications(self) -> Iterator[Tuple[int, str, UserNotificationDataStruct]]:
+        '''一次查詢所有用戶的通知 (user_id, message, 通知設定)'''
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT n.user_id, n.message, n.hour, n.minute, n.channel_id, "
+                "GROUP_CONCAT(w.weekday) "
+                "FROM notification AS n LEFT JOIN notification_weekday AS w "
+                "ON n.user_id = w.user_id AND n.message = w.message "
+                "GROUP BY n.user_id, n.message ORDER BY n.rowid"
+            ).fetchall()
+
+        return iter([
+            (
+                user_id,
+                message,
+                UserNotificationDataStruct(
+                    hour=hour,
+                    minute=minute,
+                    weekdays=sorted(int(weekday) for weekday in weekdays.split(",")) if weekdays else [],
+                    channel_id=channel_id
+                )
+            )
+            for user_id, message, hour, minute, channel_id, weekdays in rows
+        ])
+
+    aadd_weekly_notification = async_variant(add_weekly_notification)
+    aget_weekly_notification = async_variant(get_weekly_notification)
+    aget_all_user_id = async_variant(get_all_user_id)
+    aget_user_notifications = async_variant(get_user_notifications)
+    adel_user_notification = async_variant(del_user_notification)
+    aiter_notifications = async_variant(iter_notifications)
+
+    def flush(self) -> None:
+        '''SQLite 每次變更皆已提交，無須額外寫入'''
+        pass
+
+    def close(self) -> None:
+        '''關閉資料庫連線'''
+        with self.lock:
+            self.conn.close()
+
+    @staticmethod
+    def __insert_notification(
+        conn: sqlite3.Connection,
+        user_id: int,
+        message: str,
+        hour: int,
+        minute: int,
+        weekdays: List[int],
+        channel_id: int
+    ) -> None:
+        '''寫入一筆通知，已存在則覆蓋'''
+        conn.execute(
+            "INSERT INTO notification (user_id, message, hour, minute, channel_id) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id, message) DO UPDATE SET "
+            "hour = excluded.hour, minute = excluded.minute, channel_id = excluded.channel_id",
+            (user_id, message, hour, minute, channel_id)
+        )
+        conn.execute(
+            "DELETE FROM notification_weekday WHERE user_id = ? AND message = ?",
+            (user_id, message)
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO notification_weekday (user_id, message, weekday, hour, minute) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(user_id, message, weekday, hour, minute) for weekday in weekdays]
+        )
+
+    @classmethod
+    def import_json_data(cls, conn: sqlite3.Connection, jdata: dict) -> int:
+        '''將 NotificationDAO 的 json 資料寫入資料庫，返回寫入的通知數量'''
+        count = 0
+        for str_user_id, notifications in jdata.items():
+            for message, data in notifications.items():
+                cls.__insert_notification(
+                    conn,
+                    int(str_user_id),
+                    message,
+                    data["hour"],
+                    data["minute"],
+                    data["weekdays"],
+                    data["channel_id"]
+                )
+                count += 1
+        return count
+
+
+def migrate_json_to_sqlite(json_file_path: str, db_file_path: str, serializer: str | None = None) -> int:
+    '''將 notification.json 的資料一次性遷移到 SQLite 資料庫
+
+    json 檔案以日誌模式開啟，包含日誌中尚未寫回快照的通知，
+    serializer 為檔案使用的格式，None 時依檔案內容判斷，避免開啟時轉換檔案格式，
+    所有資料在同一個交易中寫入暫存的資料庫，成功後才取代 db_file_path，失敗時不會留下資料庫
+
+    Return
+    ----------
+    遷移的通知數量
+    '''
+    if serializer is None:
+        with open(json_file_path, 'rb') as jfile:
+            content = jfile.read()
+        serializer = detect_serializer(content).name if content.strip() else "json"
+    jdata = BaseDAO(json_file_path, journal=True, serializer=serializer).jdata
+
+    # 先寫入暫存的資料庫，成功後才取代，失敗時不會留下空的資料庫而在下次啟動時略過遷移
+    tmp_file_path = f"{db_file_path}.tmp"
+    tmp_file_paths = [tmp_file_path, f"{tmp_file_path}-wal", f"{tmp_file_path}-shm"]
+    for file_path in tmp_file_paths:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    try:
+        dao = SQLiteNotificationDAO(tmp_file_path)
+        try:
+            with dao.lock, dao.conn:
+                count = SQLiteNotificationDAO.import_json_data(dao.conn, jdata)
+        finally:
+            dao.close()
+        os.replace(tmp_file_path, db_file_path)
+    except:
+        for file_path in tmp_file_paths:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python sqlite_notification_dao.py <notification.json> <notification.db>")
+        sys.exit(1)
+
+    count = migrate_json_to_sqlite(sys.argv[1], sys.argv[2])
+    print(f"Migrated {count} notifications")
@@ -1,5 +1,7 @@
+import asyncio
 import discord
 from core.log_viewer import LogPageViewer
+from core.log_search import LogSearchPageViewer
 
 
 class PageNum(discord.ui.Select):
@@ -17,16 +19,17 @@ class PreviousButton(discord.ui.Button):
         super().__init__(label="上一頁", style=discord.ButtonStyle.blurple)
 
     async def callback(self, interaction: discord.Interaction):
-        self.view.log_page_viewer.prev_page()
+        # 翻頁可能需要讀取檔案或解壓縮較舊的分段，在背景執行緒中執行
+        async with self.view.lock:
+            await asyncio.to_thread(self.view.log_page_viewer.prev_page)
 
         # 更新頁數顯示
-        self.view.children[0].placeholder = f"第 {self.view.log_page_viewer._current_page + 1} 頁"
+        self.view.children[0].placeholder = self.view.log_page_viewer.get_page_label()
 
         # 調整按鈕狀態
-        if self.view.log_page_viewer._current_page == 0:
+        if self.view.log_page_viewer.is_first_page():
             self.disabled = True
-        if self.view.children[2].disabled and \
-                self.view.log_page_viewer._current_page != self.view.log_page_viewer._page_count - 1:
+        if self.view.children[2].disabled and not self.view.log_page_viewer.is_last_page():
             self.view.children[2].disabled = False
 
         # 更新訊息內容
@@ -40,15 +43,17 @@ class NextButton(discord.ui.Button):
         super().__init__(label="下一頁", style=discord.ButtonStyle.blurple, disabled=True)
 
     async def callback(self, interaction: discord.Interaction):
-        self.view.log_page_viewer.next_page()
+        # 翻頁可能需要讀取檔案或解壓縮較舊的分段，在背景執行緒中執行
+        async with self.view.lock:
+            await asyncio.to_thread(self.view.log_page_viewer.next_page)
 
         # 更新頁數顯示
-        self.view.children[0].placeholder = f"第 {self.view.log_page_viewer._current_page + 1} 頁"
+        self.view.children[0].placeholder = self.view.log_page_viewer.get_page_label()
 
         # 更新按鈕狀態
-        if self.view.log_page_viewer._current_page == self.view.log_page_viewer._page_count - 1:
+        if self.view.log_page_viewer.is_last_page():
             self.disabled = True
-        if self.view.children[1].disabled and self.view.log_page_viewer._current_page == 1:
+        if self.view.children[1].disabled and not self.view.log_page_viewer.is_first_page():
             self.view.children[1].disabled = False
 
         # 更新訊息內容
@@ -57,9 +62,11 @@ class NextButton(discord.ui.Button):
 
 
 class LogViewerView(discord.ui.View):
-    def __init__(self, log_page_viewer: LogPageViewer, timeout: float | None = 300):
+    def __init__(self, log_page_viewer: LogPageViewer | LogSearchPageViewer, timeout: float | None = 300):
         super().__init__(timeout=timeout)
         self.log_page_viewer = log_page_viewer
+        # 避免同時翻頁
+        self.lock = asyncio.Lock()
 
         self.add_item(PageNum())
         self.add_item(PreviousButton())
@@ -67,4 +74,6 @@ class LogViewerView(discord.ui.View):
 
         # 更新頁數顯示
         self.children: list
-        self.children[0].placeholder = f"第 {self.log_page_viewer._current_page + 1} 頁"
+        self.children[0].placeholder = self.log_page_viewer.get_page_label()
+        self.children[1].disabled = self.log_page_viewer.is_first_page()
+        self.children[2].disabled = self.log_page_viewer.is_last_page()
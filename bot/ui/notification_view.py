@@ -2,7 +2,8 @@ import discord
 from typing import cast
 from typing import List
 from core.bot import Bot
-from dao.notification_dao import notification_dao
+from dao.notification_dao_factory import notification_dao
+from dao.notification_struct import UserNotificationDataStruct
 
 
 def get_original_content(func):
@@ -159,7 +160,7 @@ class SaveButton(discord.ui.Button):
             await interaction.response.edit_message(content=content, view=self.view)
             return
 
-        notification_dao.add_weekly_notification(
+        await notification_dao.aadd_weekly_notification(
             user_id=interaction.user.id,
             message=self.view.message,
             hour=int(self.view.hours_select),
@@ -175,13 +176,13 @@ class SaveButton(discord.ui.Button):
                 self.view.user_id,
                 self.view.message
             )
-            bot.notification_manager.add_notification_job(
+            await bot.notification_manager.add_notification_job(
                 self.view.user_id,
                 self.view.message
             )
         else:
             # 新增通知
-            bot.notification_manager.add_notification_job(
+            await bot.notification_manager.add_notification_job(
                 self.view.user_id,
                 self.view.message
             )
@@ -203,7 +204,13 @@ class CancelButton(discord.ui.Button):
 
 
 class NotificationView(discord.ui.View):
-    def __init__(self, message: str, user_id: int,  timeout: float | None = 300):
+    def __init__(
+        self,
+        message: str,
+        user_id: int,
+        notification: UserNotificationDataStruct | None = None,
+        timeout: float | None = 300
+    ):
         super().__init__(timeout=timeout)
 
         self.message: str = message
@@ -215,18 +222,13 @@ class NotificationView(discord.ui.View):
 
         # ========== 判定編輯或新增通知 ==========
         self.need_edit: bool = False
-        
-        notifications = notification_dao.get_user_notifications(user_id)
-        if message in notifications:
 
-            notification = notification_dao.get_weekly_notification(user_id, message)
-            if notification is not None:
+        if notification is not None:
+            self.hours_select = str(notification.hour)
+            self.minutes_select = str(notification.minute)
+            self.days_select = [str(day) for day in notification.weekdays]
 
-                self.hours_select = str(notification.hour)
-                self.minutes_select = str(notification.minute)
-                self.days_select = [str(day) for day in notification.weekdays]
-
-                self.need_edit = True
+            self.need_edit = True
         # =======================================
 
         self.add_item(HoursSelect(self.hours_select))
@@ -236,3 +238,9 @@ class NotificationView(discord.ui.View):
         self.add_item(CancelButton())
 
         self.children: list
+
+    @classmethod
+    async def create(cls, message: str, user_id: int) -> 'NotificationView':
+        '''非同步讀取用戶已有的通知設定後建立 View'''
+        notification = await notification_dao.aget_weekly_notification(user_id, message)
+        return cls(message, user_id, notification)
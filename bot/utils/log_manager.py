@@ -1,10 +1,109 @@
 import os
+import gzip
+import queue
+import shutil
+import atexit
 import logging
+from typing import List
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 from dao.bot_setting_dao import bot_setting
 
+OVERFLOW_POLICIES = ("block", "drop_new", "drop_old")
+ROTATIONS = ("none", "size", "time")
+
+
+def gzip_namer(name: str) -> str:
+    '''輪替後的分段加上 .gz 副檔名'''
+    return f"{name}.gz"
+
+
+def gzip_rotator(source: str, dest: str) -> None:
+    '''將輪替的日誌壓縮成 dest 並刪除原檔案'''
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+def create_file_handler(file_path: str, log_setting: dict) -> logging.FileHandler:
+    '''依 log 設定建立文件處理器
+
+    "size" 在檔案超過 max_bytes 時輪替成 file_path.1、file_path.2 ...，
+    "time" 依 when 輪替成 file_path.時間，兩者都只保留 backup_count 個分段，
+    compress 時以 gzip 壓縮輪替後的分段
+    '''
+    rotation = log_setting["rotation"]
+    if rotation not in ROTATIONS:
+        raise ValueError(f'Unknown log rotation "{rotation}".')
+
+    if rotation == "size":
+        file_handler = RotatingFileHandler(
+            file_path, mode='a', maxBytes=log_setting["max_bytes"],
+            backupCount=log_setting["backup_count"], encoding='utf-8')
+    elif rotation == "time":
+        file_handler = TimedRotatingFileHandler(
+            file_path, when=log_setting["when"],
+            backupCount=log_setting["backup_count"], encoding='utf-8')
+    else:
+        return logging.FileHandler(file_path, mode='a', encoding='utf-8')
+
+    if log_setting["compress"]:
+        file_handler.namer = gzip_namer
+        file_handler.rotator = gzip_rotator
+    return file_handler
+
+
+class OverflowQueueHandler(QueueHandler):
+    """
+    將日誌放入有上限的佇列，由 QueueListener 在背景執行緒格式化並寫入
+
+    佇列已滿時依 overflow_policy 處理：
+    "block" 等待佇列有空位，"drop_new" 捨棄新的日誌，"drop_old" 捨棄佇列中最舊的日誌
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow_policy: str = "block") -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy "{overflow_policy}".')
+
+        super().__init__(log_queue)
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        '''不在呼叫端格式化，交由背景執行緒的處理器格式化'''
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        '''依 overflow_policy 放入佇列'''
+        if self.overflow_policy == "block":
+            self.queue.put(record)
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                self.dropped += 1
+                if self.overflow_policy == "drop_new":
+                    return
+
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class DrainingQueueListener(QueueListener):
+    '''停止時等待佇列有空位放入結束標記，確保結束前的日誌都已寫入'''
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
 
 class LogManager:
     _handlers_added = set()
+    # 使用佇列模式的日誌管理器，關閉時需停止背景執行緒
+    _queue_managers: List['LogManager'] = []
 
     def __init__(self, name: str, level=logging.INFO):
         # 避免重複相同日誌
@@ -34,12 +133,49 @@ class LogManager:
         self.logger.addHandler(console_handler)
 
         # 創建文件處理器並設置級別和格式化器
+        log_setting = bot_setting.get_log_setting()
         log_file_path = os.path.join(log_path, name)
-        file_handler = logging.FileHandler(
-            f"{log_file_path}.log", mode='a', encoding='utf-8')
+        file_handler = create_file_handler(f"{log_file_path}.log", log_setting)
         file_handler.setLevel(level)
         file_handler.setFormatter(self.formatter)
-        self.logger.addHandler(file_handler)
+
+        self.handlers: List[logging.Handler] = [console_handler, file_handler]
+        self.queue_handler: OverflowQueueHandler | None = None
+        self.listener: DrainingQueueListener | None = None
+
+        if not log_setting["queue"]:
+            for handler in self.handlers:
+                self.logger.addHandler(handler)
+            return
+
+        # 格式化與寫入檔案在背景執行緒進行，呼叫端只放入佇列
+        log_queue = queue.Queue(log_setting["queue_size"])
+        self.queue_handler = OverflowQueueHandler(log_queue, log_setting["overflow_policy"])
+        self.listener = DrainingQueueListener(log_queue, *self.handlers, respect_handler_level=True)
+        self.logger.addHandler(self.queue_handler)
+        self.listener.start()
+
+        if not LogManager._queue_managers:
+            atexit.register(LogManager.shutdown)
+        LogManager._queue_managers.append(self)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        '''停止所有背景日誌執行緒，寫入佇列中剩餘的日誌，之後的日誌直接寫入'''
+        for manager in cls._queue_managers:
+            manager.__stop_listener()
+        cls._queue_managers.clear()
+
+    def __stop_listener(self) -> None:
+        '''停止背景日誌執行緒並改為直接寫入'''
+        if self.queue_handler.dropped:
+            self.logger.warning(
+                f"Dropped {self.queue_handler.dropped} log records because the log queue was full")
+        self.listener.stop()
+
+        self.logger.removeHandler(self.queue_handler)
+        for handler in self.handlers:
+            self.logger.addHandler(handler)
 
 
 class BotLogManager(LogManager):
@@ -145,6 +281,9 @@ class BotLogManager(LogManager):
         self.logger.info(
             f"Command 'update_bot' to update Bot by {user}({user_id})")
 
+    def error_send_notification(self, channel_id, error):
+        self.logger.error(f"Failed to send notification to channel {channel_id}\n{error}")
+
 
 bot_log = BotLogManager("bot_info")
 
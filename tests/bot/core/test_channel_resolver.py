@@ -0,0 +1,102 @@
+import asyncio
+import unittest
+from unittest import mock
+import discord
+from bot.core.channel_resolver import ChannelResolver
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild_id=None):
+        self.id = channel_id
+        self.guild = FakeGuild(guild_id) if guild_id else None
+
+
+class FakeBot:
+    def __init__(self):
+        self.cached_channels = {}
+        self.fetch_count = 0
+        self.fetch_error = None
+
+    def get_channel(self, channel_id):
+        return self.cached_channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        self.fetch_count += 1
+        if self.fetch_error is not None:
+            raise self.fetch_error
+        return FakeChannel(channel_id, guild_id=1)
+
+
+class TestChannelResolver(unittest.TestCase):
+    def setUp(self):
+        self.bot = FakeBot()
+
+    def resolve(self, resolver, channel_id):
+        return asyncio.run(resolver.resolve(channel_id))
+
+    def test_get_channel_first(self):
+        '''測試 bot 快取中的頻道不需 REST'''
+        self.bot.cached_channels[1] = FakeChannel(1)
+        resolver = ChannelResolver(self.bot)
+
+        self.assertIs(self.resolve(resolver, 1), self.bot.cached_channels[1])
+        self.assertEqual(self.bot.fetch_count, 0)
+        self.assertEqual((resolver.hits, resolver.misses), (1, 0))
+
+    def test_fetch_once(self):
+        '''測試 REST 取得的頻道會被快取'''
+        resolver = ChannelResolver(self.bot)
+        channel = self.resolve(resolver, 2)
+
+        self.assertIs(self.resolve(resolver, 2), channel)
+        self.assertEqual(self.bot.fetch_count, 1)
+        self.assertEqual((resolver.hits, resolver.misses), (1, 1))
+
+    def test_ttl_expire(self):
+        '''測試過期的快取會重新取得'''
+        resolver = ChannelResolver(self.bot, ttl=0)
+        self.resolve(resolver, 2)
+        self.resolve(resolver, 2)
+        self.assertEqual(self.bot.fetch_count, 2)
+
+    def test_lru_evict(self):
+        '''測試超過上限時移除最久未使用的頻道'''
+        resolver = ChannelResolver(self.bot, max_size=2)
+        self.resolve(resolver, 1)
+        self.resolve(resolver, 2)
+        self.resolve(resolver, 1)
+        self.resolve(resolver, 3)
+
+        self.resolve(resolver, 1)
+        self.assertEqual(self.bot.fetch_count, 3)
+        self.resolve(resolver, 2)
+        self.assertEqual(self.bot.fetch_count, 4)
+
+    def test_evict(self):
+        '''測試頻道刪除與離開伺服器時移除快取'''
+        resolver = ChannelResolver(self.bot)
+        self.resolve(resolver, 1)
+        self.resolve(resolver, 2)
+
+        resolver.evict(1)
+        self.assertEqual(resolver.get_stats()["size"], 1)
+        resolver.evict_guild(1)
+        self.assertEqual(resolver.get_stats()["size"], 0)
+
+    def test_fetch_error(self):
+        '''測試頻道不存在時返回 None，無權限時拋出 Forbidden，兩者都不快取'''
+        resolver = ChannelResolver(self.bot)
+        response = mock.Mock(status=404, reason="Not Found")
+        self.bot.fetch_error = discord.NotFound(response, "Unknown Channel")
+        self.assertIsNone(self.resolve(resolver, 1))
+
+        response = mock.Mock(status=403, reason="Forbidden")
+        self.bot.fetch_error = discord.Forbidden(response, "Missing Access")
+        with self.assertRaises(discord.Forbidden):
+            self.resolve(resolver, 1)
+        self.assertEqual(resolver.get_stats()["size"], 0)
@@ -0,0 +1,93 @@
+import unittest
+from unittest import mock
+from types import SimpleNamespace
+import discord
+from discord import app_commands
+from bot.core.cog_helpers import command_checker
+from bot.core.cog_helpers.command_checker import CommandChecker
+from bot.core.cog_manager.config_reloader import ConfigReloader
+from bot.dao.bot_setting_dao import CommandAuth
+
+
+def create_command(name):
+    async def callback(interaction: discord.Interaction):
+        pass
+    return app_commands.Command(name=name, description=name, callback=callback)
+
+
+class TestConfigReloader(unittest.TestCase):
+    def setUp(self):
+        self.auths = {}
+        self.patches = [
+            mock.patch.object(command_checker.bot_setting, "register_cog"),
+            mock.patch.object(
+                command_checker.bot_setting, "get_command_auth",
+                side_effect=lambda cog_name, command: self.auths[command]
+            )
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        CommandChecker.checkers.pop("test_config_reloader", None)
+
+    def test_refresh_changed_commands(self):
+        '''測試只替換權限有變更的指令判定'''
+        self.auths = {
+            "a": CommandAuth(frozenset([1]), {}),
+            "b": CommandAuth(frozenset([2]), {"administrator": True})
+        }
+        checker = CommandChecker()
+        command_a = checker.roleauth(create_command("a"))
+        command_b = checker.roleauth(create_command("b"))
+        self.assertEqual(len(command_a.checks), 1)
+        self.assertEqual(len(command_b.checks), 2)
+        checks_a = list(command_a.checks)
+        checks_b = list(command_b.checks)
+
+        self.assertEqual(checker.refresh(), [])
+
+        self.auths["a"] = CommandAuth(frozenset([None]), {})
+        self.assertEqual(checker.refresh(), ["a"])
+        self.assertEqual(len(command_a.checks), 1)
+        self.assertIsNot(command_a.checks[0], checks_a[0])
+        self.assertEqual(command_a.extras["roles"], [None])
+        self.assertEqual(command_b.checks, checks_b)
+
+        self.auths["b"] = CommandAuth(frozenset(), {})
+        self.assertEqual(checker.refresh(), ["b"])
+        self.assertEqual(command_b.checks, [])
+        self.assertNotIn("roles", command_b.extras)
+
+    def test_deny_roles(self):
+        '''測試身份組只有 null 時拒絕所有身份組，與其他身份組並列時只判定其他身份組'''
+        self.auths = {
+            "deny": CommandAuth(frozenset([None]), {}),
+            "mixed": CommandAuth(frozenset([None, 1]), {})
+        }
+        checker = CommandChecker()
+        command_deny = checker.roleauth(create_command("deny"))
+        command_mixed = checker.roleauth(create_command("mixed"))
+
+        self.assertEqual(command_deny.extras["roles"], [None])
+        self.assertEqual(command_mixed.extras["roles"], frozenset([None, 1]))
+        self.assertEqual(len(command_mixed.checks), 1)
+
+    def test_rebind_commands(self):
+        '''測試重新綁定伺服器返回指令組成有變更的伺服器'''
+        tree = mock.Mock()
+        reloader = ConfigReloader(SimpleNamespace(tree=tree))
+        rebind = reloader._ConfigReloader__rebind_commands
+        command = create_command("a")
+
+        self.assertEqual(rebind([command], [1, 2], [2, 3]), {1, 3})
+        tree.remove_command.assert_called_once()
+        self.assertEqual(tree.remove_command.call_args.kwargs["guild"].id, 1)
+
+        tree.reset_mock()
+        self.assertEqual(rebind([command], [], [5]), {None, 5})
+        tree.remove_command.assert_called_once_with("a", guild=None)
+        self.assertEqual(
+            [guild.id for guild in tree.add_command.call_args.kwargs["guilds"]], [5])
@@ -0,0 +1,45 @@
+import unittest
+from bot.core.delivery_metrics import DeliveryMetrics, RollingHistogram, RollingCounter
+
+
+class TestDeliveryMetrics(unittest.TestCase):
+    def test_histogram_quantile(self):
+        '''測試分組統計與分位數'''
+        histogram = RollingHistogram((1, 2, 5), window=60, resolution=10)
+        for value in (0.5, 0.5, 1.5, 3, 100):
+            histogram.add(value, now=0)
+
+        self.assertEqual(histogram.get_counts(now=0), [2, 1, 1, 1])
+        self.assertEqual(histogram.quantile(0.5, now=0), 2)
+        self.assertEqual(histogram.quantile(0.99, now=0), float("inf"))
+
+    def test_histogram_window(self):
+        '''測試超出視窗的資料會被移除'''
+        histogram = RollingHistogram((1,), window=60, resolution=10)
+        histogram.add(0.5, now=0)
+        histogram.add(0.5, now=55)
+
+        self.assertEqual(histogram.get_counts(now=59), [2, 0])
+        self.assertEqual(histogram.get_counts(now=65), [1, 0])
+        self.assertIsNone(histogram.quantile(0.5, now=200))
+
+    def test_counter_window(self):
+        '''測試計數只保留視窗內的資料'''
+        counter = RollingCounter(window=60, resolution=10)
+        counter.add("sent", now=0)
+        counter.add("sent", now=30)
+        self.assertEqual(counter.get_counts(now=30)["sent"], 2)
+        self.assertEqual(counter.get_counts(now=70)["sent"], 1)
+
+    def test_record(self):
+        '''測試記錄發送結果與延遲'''
+        metrics = DeliveryMetrics()
+        metrics.record("sent", scheduled_time=100, sent_time=100.3, duration=0.2)
+        metrics.record("forbidden", scheduled_time=100, sent_time=103, duration=0.1)
+
+        summary = metrics.get_summary(now=103)
+        self.assertEqual(summary["outcomes"]["sent"], 1)
+        self.assertEqual(summary["outcomes"]["forbidden"], 1)
+        self.assertEqual(summary["totals"]["error"], 0)
+        self.assertEqual(summary["lateness"]["p50"], 0.5)
+        self.assertEqual(summary["lateness"]["p99"], 5.0)
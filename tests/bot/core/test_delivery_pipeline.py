@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+import discord
+from bot.core.delivery_pipeline import DeliveryPipeline, ChannelMissing
+
+
+class TestDeliveryPipeline(unittest.TestCase):
+    def test_concurrency_limit(self):
+        '''測試同時發送數量不超過上限，同頻道依序發送'''
+        sent = []
+        running = 0
+        max_running = 0
+
+        async def send(channel_id, message):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            sent.append((channel_id, message))
+            running -= 1
+
+        async def run():
+            pipeline = DeliveryPipeline(send, max_concurrency=3)
+            await asyncio.gather(*[
+                pipeline.send(i % 5, str(i)) for i in range(20)
+            ])
+            return pipeline.get_stats()
+
+        stats = asyncio.run(run())
+        self.assertLessEqual(max_running, 3)
+        self.assertEqual(stats["delivered"], 20)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(
+            [message for channel_id, message in sent if channel_id == 0],
+            ["0", "5", "10", "15"]
+        )
+
+    def test_retry_after(self):
+        '''測試速率限制時依 Retry-After 重試'''
+        attempts = []
+
+        async def send(channel_id, message):
+            attempts.append(message)
+            if len(attempts) < 3:
+                raise discord.RateLimited(0.01)
+
+        async def run():
+            pipeline = DeliveryPipeline(send)
+            await pipeline.send(1, "a")
+            return pipeline.get_stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(stats["rate_limited"], 2)
+        self.assertEqual(stats["delivered"], 1)
+
+    def test_failure(self):
+        '''測試發送失敗時拋出例外且不影響其他訊息'''
+        async def send(channel_id, message):
+            if message == "bad":
+                raise ValueError(message)
+
+        async def run():
+            pipeline = DeliveryPipeline(send)
+            results = await asyncio.gather(
+                pipeline.send(1, "bad"), pipeline.send(1, "good"), return_exceptions=True)
+            return results, pipeline.get_stats()
+
+        results, stats = asyncio.run(run())
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIsNone(results[1])
+        self.assertEqual((stats["delivered"], stats["failed"]), (1, 1))
+
+    def test_outcome_metrics(self):
+        '''測試依例外記錄發送結果'''
+        async def send(channel_id, message):
+            if message == "missing":
+                raise ChannelMissing(channel_id)
+            if message == "error":
+                raise ValueError(message)
+
+        async def run():
+            pipeline = DeliveryPipeline(send)
+            await asyncio.gather(
+                pipeline.send(1, "sent"),
+                pipeline.send(2, "missing"),
+                pipeline.send(3, "error"),
+                return_exceptions=True
+            )
+            return pipeline.metrics.get_summary()
+
+        summary = asyncio.run(run())
+        self.assertEqual(summary["outcomes"]["sent"], 1)
+        self.assertEqual(summary["outcomes"]["channel_missing"], 1)
+        self.assertEqual(summary["outcomes"]["error"], 1)
@@ -0,0 +1,122 @@
+import os
+import re
+import gzip
+import unittest
+from datetime import datetime
+from bot.core.log_search import (
+    LogSearchPageViewer, iter_records, iter_reversed_lines, iter_reversed_records, search_log
+)
+
+TMP_DIR = "test_log_search_dir"
+
+LOG_CONTENT = """\
+01/01/2024 10:00:00 - bot - INFO:Bot is start
+01/01/2024 10:05:00 - bot - ERROR:Load cog 'admin'
+Traceback (most recent call last):
+  ValueError: bad value
+01/01/2024 11:00:00 - bot - WARNING:User 'a(1)' lacks role
+01/01/2024 12:00:00 - bot - INFO:Load cog 'admin'
+01/01/2024 13:00:00 - bot - ERROR:Failed to sync commands
+"""
+
+
+class TestLogSearch(unittest.TestCase):
+    def setUp(self):
+        if not os.path.exists(TMP_DIR):
+            os.makedirs(TMP_DIR)
+        self.file_path = os.path.join(TMP_DIR, "bot.log")
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            f.write(LOG_CONTENT)
+
+    def tearDown(self):
+        if os.path.exists(TMP_DIR):
+            for file in os.listdir(TMP_DIR):
+                os.remove(os.path.join(TMP_DIR, file))
+            os.rmdir(TMP_DIR)
+
+    def test_reversed_lines(self):
+        '''測試從末尾往前逐行讀取'''
+        lines = [line.decode() for line in iter_reversed_lines(self.file_path, block_size=7)]
+        self.assertEqual(LOG_CONTENT.split("\n")[::-1], lines)
+
+    def test_search_pattern(self):
+        '''測試以正規表達式搜尋，多行記錄整筆返回'''
+        result = search_log(self.file_path, re.compile(r"ValueError|sync"), block_size=16)
+        self.assertEqual(2, len(result.records))
+        self.assertEqual("ERROR", result.records[0].level)
+        self.assertTrue(result.records[0].text.endswith("ValueError: bad value"))
+        self.assertIn("Failed to sync", result.records[1].text)
+        self.assertFalse(result.truncated)
+
+    def test_search_level_and_time(self):
+        '''測試最低等級與時間範圍'''
+        result = search_log(self.file_path, level="WARNING")
+        self.assertEqual(["ERROR", "WARNING", "ERROR"], [record.level for record in result.records])
+
+        result = search_log(
+            self.file_path,
+            since=datetime(2024, 1, 1, 10, 30),
+            until=datetime(2024, 1, 1, 12, 0)
+        )
+        self.assertEqual(
+            [datetime(2024, 1, 1, 11), datetime(2024, 1, 1, 12)],
+            [record.time for record in result.records]
+        )
+
+    def test_max_results(self):
+        '''測試達到上限時提早停止，保留最新的結果'''
+        result = search_log(self.file_path, re.compile("cog"), max_results=1)
+        self.assertTrue(result.truncated)
+        self.assertEqual(1, len(result.records))
+        self.assertIn("12:00:00", result.records[0].text)
+
+    def test_page_viewer(self):
+        '''測試搜尋結果分頁'''
+        result = search_log(self.file_path)
+        log_viewer = LogSearchPageViewer(result, 60)
+        self.assertTrue(all(len(page) <= 60 for page in log_viewer._pages))
+        self.assertEqual(LOG_CONTENT.strip(), "\n".join(log_viewer._pages))
+        self.assertTrue(log_viewer.is_last_page())
+        self.assertIn("Failed to sync", log_viewer.get_page_content())
+
+        log_viewer.prev_page()
+        self.assertFalse(log_viewer.is_last_page())
+
+    def test_search_rotated_segments(self):
+        '''測試接著搜尋輪替後壓縮的分段'''
+        with gzip.open(f"{self.file_path}.1.gz", "wt", encoding="utf-8") as f:
+            f.write("12/31/2023 23:00:00 - bot - ERROR:Old error\n")
+
+        result = search_log(self.file_path, level="ERROR")
+        self.assertEqual(3, len(result.records))
+        self.assertEqual(datetime(2023, 12, 31, 23), result.records[0].time)
+
+        result = search_log(self.file_path, level="ERROR", since=datetime(2024, 1, 1))
+        self.assertEqual(2, len(result.records))
+
+    def test_forward_records(self):
+        '''測試往後讀取與往前讀取的記錄相同'''
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            f.write("  leading text\n" + LOG_CONTENT)
+        gz_path = f"{self.file_path}.1.gz"
+        with gzip.open(gz_path, "wt", encoding="utf-8") as f:
+            f.write("  leading text\n" + LOG_CONTENT)
+
+        expected = list(iter_reversed_records(self.file_path, block_size=16))[::-1]
+        self.assertEqual(expected, list(iter_records(self.file_path)))
+        self.assertEqual(expected, list(iter_records(gz_path)))
+
+    def test_search_rotated_segments_limits(self):
+        '''測試壓縮的分段只保留最新的結果，並在早於 since 的記錄停止'''
+        with gzip.open(f"{self.file_path}.1.gz", "wt", encoding="utf-8") as f:
+            for hour in range(24):
+                f.write(f"12/31/2023 {hour:02d}:00:00 - bot - INFO:Old {hour}\n")
+
+        result = search_log(self.file_path, re.compile("Old"), max_results=3)
+        self.assertTrue(result.truncated)
+        self.assertEqual(["Old 21", "Old 22", "Old 23"], [record.text.split(":")[-1] for record in result.records])
+
+        result = search_log(self.file_path, since=datetime(2023, 12, 31, 22))
+        self.assertEqual(7, len(result.records))
+        self.assertEqual(datetime(2023, 12, 31, 22), result.records[0].time)
+        self.assertFalse(result.truncated)
@@ -1,10 +1,23 @@
 import os
+import gzip
 import unittest
-from bot.core.log_viewer import LogPageViewer
+from unittest import mock
+from bot.core.log_viewer import LogPageViewer, get_log_segments, is_log_segment
 
 TMP_DIR = "test_log_viewer_dir"
 
 
+def read_all_pages(log_viewer):
+    '''從最新一頁往前翻到第一頁取得所有頁面 (從第一頁開始)，再翻回最新一頁'''
+    pages = [log_viewer.get_page_content()]
+    while not log_viewer.is_first_page():
+        log_viewer.prev_page()
+        pages.append(log_viewer.get_page_content())
+    while not log_viewer.is_last_page():
+        log_viewer.next_page()
+    return pages[::-1]
+
+
 class TestLogViewer(unittest.TestCase):
     def setUp(self):
         if not os.path.exists(TMP_DIR):
@@ -60,6 +73,155 @@ class TestLogViewer(unittest.TestCase):
             self.create_file(tmp_file, data[0])
 
             log_viewer = LogPageViewer(tmp_file, data[1])
-            self.assertEqual(data[2], log_viewer._pages)
+            self.assertEqual(data[2], read_all_pages(log_viewer))
 
             self.delete_file(tmp_file)
+
+    def test_block_size(self):
+        '''測試不同區塊大小、多位元組字元與 \\r\\n 的分頁結果相同'''
+        tmp_file = os.path.join(TMP_DIR, "test_file")
+        content = "中文日誌 123\r\n\r\n  第二行 4567890\r\n第三行\n" * 20
+        with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+
+        expected = read_all_pages(LogPageViewer(tmp_file, 15))
+        self.assertEqual("中文日誌 123", expected[0])
+        for block_size in [1, 2, 3, 7, 64]:
+            self.assertEqual(expected, read_all_pages(LogPageViewer(tmp_file, 15, block_size)))
+
+    def test_page_navigation(self):
+        '''測試從最新一頁往前翻頁'''
+        tmp_file = os.path.join(TMP_DIR, "test_file")
+        self.create_file(tmp_file, "\n".join(f"line {i:03d}" for i in range(100)))
+
+        log_viewer = LogPageViewer(tmp_file, 20, block_size=16)
+        self.assertEqual("line 098\nline 099", log_viewer.get_page_content())
+        self.assertEqual("倒數第 1 頁", log_viewer.get_page_label())
+        self.assertTrue(log_viewer.is_last_page())
+        self.assertFalse(log_viewer.is_first_page())
+
+        log_viewer.next_page()
+        self.assertEqual("line 098\nline 099", log_viewer.get_page_content())
+
+        log_viewer.prev_page()
+        self.assertEqual("line 096\nline 097", log_viewer.get_page_content())
+        self.assertEqual("倒數第 2 頁", log_viewer.get_page_label())
+
+        for _ in range(60):
+            log_viewer.prev_page()
+        self.assertEqual("line 000\nline 001", log_viewer.get_page_content())
+        self.assertTrue(log_viewer.is_first_page())
+        self.assertEqual("第 1 / 50 頁", log_viewer.get_page_label())
+
+        log_viewer.next_page()
+        self.assertEqual("第 2 / 50 頁", log_viewer.get_page_label())
+
+    def test_page_index(self):
+        '''測試分頁索引與直接分頁的結果相同，並可跳到任意一頁'''
+        tmp_file = os.path.join(TMP_DIR, "test_file")
+        index_file = os.path.join(TMP_DIR, "test_file.idx")
+        content = "中文日誌 123\r\n\r\n  第二行 4567890\r\n第三行\n" * 20
+        with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+
+        expected = read_all_pages(LogPageViewer(tmp_file, 15))
+        log_viewer = LogPageViewer(tmp_file, 15, block_size=7, index_path=index_file)
+        self.assertEqual(expected, read_all_pages(log_viewer))
+        self.assertEqual(expected[-1], log_viewer.get_page_content())
+        self.assertEqual(f"第 {len(expected)} / {len(expected)} 頁", log_viewer.get_page_label())
+
+        log_viewer.go_to_page(3)
+        self.assertEqual(expected[2], log_viewer.get_page_content())
+        log_viewer.prev_page()
+        self.assertEqual(expected[1], log_viewer.get_page_content())
+        log_viewer.go_to_page(0)
+        self.assertTrue(log_viewer.is_first_page())
+
+    def test_page_index_update(self):
+        '''測試日誌變大時只重新分頁最後一頁之後的內容，輪替後重建索引'''
+        tmp_file = os.path.join(TMP_DIR, "test_file")
+        index_file = os.path.join(TMP_DIR, "test_file.idx")
+        self.create_file(tmp_file, "".join(f"line {i:03d}\n" for i in range(10)))
+
+        log_viewer = LogPageViewer(tmp_file, 20, index_path=index_file)
+        self.assertEqual(5, len(read_all_pages(log_viewer)))
+
+        with open(tmp_file, "a") as f:
+            f.write("".join(f"line {i:03d}\n" for i in range(10, 13)))
+        os.utime(tmp_file, ns=(0, 1))
+
+        log_viewer = LogPageViewer(tmp_file, 20, index_path=index_file)
+        pages = read_all_pages(log_viewer)
+        self.assertEqual(["line 000\nline 001", "line 002\nline 003"], pages[:2])
+        self.assertEqual("line 011\nline 012", log_viewer.get_page_content())
+        self.assertEqual([f"line {i:03d}" for i in range(13)], "\n".join(pages).split("\n"))
+
+        # 輪替後的新檔案
+        os.remove(tmp_file)
+        self.create_file(tmp_file, "new line\n")
+        log_viewer = LogPageViewer(tmp_file, 20, index_path=index_file)
+        self.assertEqual(["new line"], read_all_pages(log_viewer))
+
+    def test_rotated_segments(self):
+        '''測試輪替後的分段 (包含壓縮的分段) 與目前的日誌視為連續的內容'''
+        tmp_file = os.path.join(TMP_DIR, "test_file")
+        index_file = os.path.join(TMP_DIR, "test_file.idx")
+        with open(f"{tmp_file}.2", "w") as f:
+            f.write("line 000\nline 001\n")
+        os.utime(f"{tmp_file}.2", ns=(0, 1))
+        with gzip.open(f"{tmp_file}.1.gz", "wt") as f:
+            f.write("line 002\nline 003\nline 004\n")
+        os.utime(f"{tmp_file}.1.gz", ns=(0, 2))
+        self.create_file(tmp_file, "line 005\n")
+
+        self.assertEqual([f"{tmp_file}.2", f"{tmp_file}.1.gz", tmp_file], get_log_segments(tmp_file))
+        self.assertTrue(is_log_segment("test_file.1.gz"))
+        self.assertFalse(is_log_segment("test_file.idx"))
+
+        log_viewer = LogPageViewer(tmp_file, 20, index_path=index_file)
+        self.assertEqual(
+            ["line 000\nline 001", "line 002", "line 003\nline 004", "line 005"],
+            read_all_pages(log_viewer)
+        )
+        self.assertEqual("第 1 / 1 頁", log_viewer.get_page_label())
+        self.assertFalse(log_viewer.is_first_page())
+
+        log_viewer.prev_page()
+        self.assertEqual("line 003\nline 004", log_viewer.get_page_content())
+        self.assertEqual("第 2 / 2 頁 (test_file.1.gz)", log_viewer.get_page_label())
+        log_viewer.prev_page()
+        log_viewer.prev_page()
+        self.assertEqual("line 000\nline 001", log_viewer.get_page_content())
+        self.assertTrue(log_viewer.is_first_page())
+
+        log_viewer.next_page()
+        self.assertEqual("line 002", log_viewer.get_page_content())
+        self.assertEqual("第 1 / 2 頁 (test_file.1.gz)", log_viewer.get_page_label())
+        log_viewer.next_page()
+        log_viewer.next_page()
+        self.assertEqual("line 005", log_viewer.get_page_content())
+        self.assertTrue(log_viewer.is_last_page())
+
+        # 剛輪替完目前的日誌是空的，從最新的分段開始
+        self.create_file(tmp_file, "")
+        log_viewer = LogPageViewer(tmp_file, 20, index_path=index_file)
+        self.assertEqual("line 003\nline 004", log_viewer.get_page_content())
+        self.assertTrue(log_viewer.is_last_page())
+
+    def test_rotated_segments_not_decompressed(self):
+        '''測試未翻到壓縮的分段前不會解壓縮'''
+        tmp_file = os.path.join(TMP_DIR, "test_file")
+        with gzip.open(f"{tmp_file}.1.gz", "wt") as f:
+            f.write("old line\n")
+        with gzip.open(f"{tmp_file}.2.gz", "wt") as f:
+            pass
+        self.create_file(tmp_file, "new line\n")
+
+        with mock.patch("bot.core.log_viewer.open_log_file", side_effect=AssertionError):
+            log_viewer = LogPageViewer(tmp_file, 20)
+            self.assertFalse(log_viewer.is_first_page())
+            self.assertTrue(log_viewer.is_last_page())
+
+        log_viewer.prev_page()
+        self.assertEqual("old line", log_viewer.get_page_content())
+        self.assertTrue(log_viewer.is_first_page())
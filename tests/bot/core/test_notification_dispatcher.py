@@ -0,0 +1,181 @@
+import os
+import asyncio
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from bot.core.notification_dispatcher import NotificationDispatcher, to_slot, from_slot, merge_messages
+from bot.dao.notification_state_dao import NotificationStateDAO
+
+TIMEZONE = ZoneInfo("Asia/Taipei")
+TMP_DIR = "test_notification_dispatcher_dir"
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+
+        async def send(channel_id, message, scheduled_time):
+            self.sent.append((channel_id, message))
+
+        self.scheduler = AsyncIOScheduler(timezone=TIMEZONE)
+        self.dispatcher = NotificationDispatcher(self.scheduler, send)
+
+        if not os.path.exists(TMP_DIR):
+            os.makedirs(TMP_DIR)
+
+    def tearDown(self):
+        if os.path.exists(TMP_DIR):
+            for file in os.listdir(TMP_DIR):
+                os.remove(os.path.join(TMP_DIR, file))
+            os.rmdir(TMP_DIR)
+
+    def create_state_dispatcher(self, misfire_policy, last_dispatch_time):
+        '''建立記錄狀態的分派器'''
+        state_dao = NotificationStateDAO(os.path.join(TMP_DIR, "state.json"))
+        state_dao.set_last_dispatch_time(last_dispatch_time)
+        return NotificationDispatcher(
+            self.scheduler,
+            self.dispatcher.send_func,
+            state_dao=state_dao,
+            misfire_policy=misfire_policy,
+            misfire_grace_time=7 * 24 * 3600
+        ), state_dao
+
+    def test_slot_convert(self):
+        '''測試時段轉換'''
+        self.assertEqual(to_slot(1, 0, 0), 0)
+        self.assertEqual(from_slot(to_slot(7, 23, 59)), (7, 23, 59))
+
+    def test_add_and_remove(self):
+        '''測試新增與刪除通知只更新所在時段'''
+        self.dispatcher.add(1, "a", [1, 3], 8, 0, 100)
+        self.dispatcher.add(2, "b", [1], 8, 0, 200)
+        self.assertEqual(
+            self.dispatcher.get_slot_notifications(1, 8, 0),
+            {(1, "a"): 100, (2, "b"): 200}
+        )
+
+        self.dispatcher.add(1, "a", [2], 9, 30, 100)
+        self.assertEqual(self.dispatcher.get_slot_notifications(1, 8, 0), {(2, "b"): 200})
+        self.assertEqual(self.dispatcher.get_slot_notifications(3, 8, 0), {})
+
+        self.dispatcher.remove(2, "b")
+        self.dispatcher.remove(3, "not exist")
+        self.assertEqual(sorted(self.dispatcher.slots), [to_slot(2, 9, 30)])
+
+    def test_next_run_time(self):
+        '''測試取得下一個非空時段，本週沒有時段時取下週'''
+        now = datetime(2024, 1, 3, 12, 0, 30, tzinfo=TIMEZONE)  # 星期三
+        self.assertIsNone(self.dispatcher.get_next_run_time(now))
+
+        self.dispatcher.add(1, "a", [1, 3], 12, 0, 100)
+        slot, run_time = self.dispatcher.get_next_run_time(now)
+        self.assertEqual(slot, to_slot(1, 12, 0))
+        self.assertEqual(run_time, datetime(2024, 1, 8, 12, 0, tzinfo=TIMEZONE))
+
+        self.dispatcher.add(2, "b", [5], 7, 15, 200)
+        slot, run_time = self.dispatcher.get_next_run_time(now)
+        self.assertEqual(slot, to_slot(5, 7, 15))
+        self.assertEqual(run_time, datetime(2024, 1, 5, 7, 15, tzinfo=TIMEZONE))
+
+    def test_single_job(self):
+        '''測試排程中只有一個工作，並在觸發時發送整個時段'''
+        async def run():
+            self.scheduler.start()
+            self.dispatcher.start()
+            for i in range(10):
+                self.dispatcher.add(i, "a", [1, 2, 3, 4, 5, 6, 7], i, 0, i)
+            jobs = self.scheduler.get_jobs()
+
+            await jobs[0].func(*jobs[0].args)
+            self.scheduler.shutdown(wait=False)
+            return jobs
+
+        jobs = asyncio.run(run())
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(len(self.sent), 1)
+
+    def test_late_dispatch(self):
+        '''測試延遲執行超過下一個時段時一併發送，不會跳過該時段'''
+        clock = {"now": datetime(2024, 1, 8, 8, 29, tzinfo=TIMEZONE)}  # 星期一
+
+        class FakeDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock["now"].astimezone(tz)
+
+        async def run():
+            self.scheduler.start()
+            self.dispatcher.start()
+            self.dispatcher.add(1, "a", [1], 8, 30, 100)
+            self.dispatcher.add(2, "b", [1], 8, 31, 200)
+            self.dispatcher.add(3, "c", [1], 8, 35, 300)
+            job = self.scheduler.get_jobs()[0]
+            self.assertEqual(job.args, (to_slot(1, 8, 30),))
+
+            clock["now"] = datetime(2024, 1, 8, 8, 31, 10, tzinfo=TIMEZONE)
+            await job.func(*job.args)
+            jobs = self.scheduler.get_jobs()
+            self.scheduler.shutdown(wait=False)
+            return jobs
+
+        with mock.patch("bot.core.notification_dispatcher.datetime", FakeDatetime):
+            jobs = asyncio.run(run())
+        self.assertEqual(sorted(self.sent), [(100, "a"), (200, "b")])
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].args, (to_slot(1, 8, 35),))
+
+    def test_merge_messages(self):
+        '''測試合併訊息不超過字數上限'''
+        self.assertEqual(merge_messages(["a", "b", "c"], limit=3), ["a\nb", "c"])
+        self.assertEqual(merge_messages(["abcdefg", "h"], limit=3), ["abc", "def", "g\nh"])
+        self.assertEqual(merge_messages([]), [])
+
+    def test_merge_channel(self):
+        '''測試設定合併的頻道在同一時段只發送一則訊息'''
+        dispatcher = NotificationDispatcher(
+            self.scheduler, self.dispatcher.send_func, merge_channel_ids=[100])
+
+        async def run():
+            self.scheduler.start()
+            dispatcher.start()
+            for i in range(3):
+                dispatcher.add(i, f"m{i}", [1, 2, 3, 4, 5, 6, 7], 12, 0, 100)
+                dispatcher.add(i, f"n{i}", [1, 2, 3, 4, 5, 6, 7], 12, 0, 200)
+            job = self.scheduler.get_jobs()[0]
+            await job.func(*job.args)
+            self.scheduler.shutdown(wait=False)
+
+        asyncio.run(run())
+        self.assertIn((100, "m0\nm1\nm2"), self.sent)
+        self.assertEqual(len([channel for channel, _ in self.sent if channel == 200]), 3)
+        self.assertEqual(len(self.sent), 4)
+
+    def run_misfire(self, misfire_policy):
+        '''上次分派時間為兩天前，每個通知在這段期間各錯過一或多次'''
+        now = datetime.now(TIMEZONE)
+        dispatcher, state_dao = self.create_state_dispatcher(
+            misfire_policy, now - timedelta(days=2))
+        dispatcher.add(1, "every_day", [1, 2, 3, 4, 5, 6, 7], now.hour, now.minute, 100)
+
+        async def run():
+            self.scheduler.start()
+            dispatcher.start()
+            await asyncio.sleep(0.1)
+            self.scheduler.shutdown(wait=False)
+
+        asyncio.run(run())
+        return now, state_dao
+
+    def test_misfire_coalesce(self):
+        '''測試錯過的通知合併後只補發一次'''
+        now, state_dao = self.run_misfire("coalesce")
+        self.assertEqual(self.sent, [(100, "every_day")])
+        self.assertGreaterEqual(state_dao.get_last_dispatch_time(), now)
+
+    def test_misfire_drop(self):
+        '''測試 drop 時不補發'''
+        self.run_misfire("drop")
+        self.assertEqual(self.sent, [])
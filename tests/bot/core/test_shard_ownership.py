@@ -0,0 +1,78 @@
+import os
+import unittest
+from bot.core.shard_ownership import ShardOwnership
+
+TMP_DIR = "test_shard_ownership_dir"
+
+
+class TestShardOwnership(unittest.TestCase):
+    def tearDown(self):
+        if os.path.exists(TMP_DIR):
+            for file in os.listdir(TMP_DIR):
+                os.remove(os.path.join(TMP_DIR, file))
+            os.rmdir(TMP_DIR)
+
+    def test_single_process(self):
+        '''測試只有一個程序時持有所有通知且不建立鎖檔'''
+        ownership = ShardOwnership(lock_dir=TMP_DIR)
+        self.assertTrue(ownership.acquire_home())
+        self.assertTrue(all(ownership.owns(channel_id) for channel_id in range(100)))
+        self.assertFalse(os.path.exists(TMP_DIR))
+
+    def test_partition(self):
+        '''測試每個頻道只屬於一個程序'''
+        ownerships = [ShardOwnership(i, 3, TMP_DIR) for i in range(3)]
+        for ownership in ownerships:
+            self.assertTrue(ownership.acquire_home())
+
+        for channel_id in range(1000, 1100):
+            owners = [ownership for ownership in ownerships if ownership.owns(channel_id)]
+            self.assertEqual(len(owners), 1)
+
+        for ownership in ownerships:
+            ownership.release_all()
+
+    def test_takeover(self):
+        '''測試程序釋放分區後由其他程序接手'''
+        first = ShardOwnership(0, 2, TMP_DIR)
+        second = ShardOwnership(1, 2, TMP_DIR)
+        first.acquire_home()
+        second.acquire_home()
+        self.assertEqual(second.try_takeover(), [])
+
+        first.release_all()
+        self.assertEqual(second.try_takeover(), [0])
+        self.assertEqual(second.owned, {0, 1})
+
+        second.release_all()
+
+    def test_reclaim(self):
+        '''測試重啟的程序取回被接手的分區，等待歸還時其他程序不會接手'''
+        ownerships = [ShardOwnership(i, 3, TMP_DIR) for i in range(3)]
+        for ownership in ownerships:
+            ownership.acquire_home()
+        ownerships[0].release_all()
+        self.assertEqual(ownerships[1].try_takeover(), [0])
+
+        restarted = ShardOwnership(0, 3, TMP_DIR)
+        self.assertFalse(restarted.acquire_home())
+        self.assertEqual(ownerships[2].release_reclaimed(), [])
+        self.assertEqual(ownerships[1].release_reclaimed(), [0])
+        self.assertEqual(ownerships[1].owned, {1})
+        self.assertEqual(ownerships[2].try_takeover(), [])
+
+        self.assertTrue(restarted.acquire_home())
+        self.assertEqual(restarted.owned, {0})
+        self.assertEqual(ownerships[1].release_reclaimed(), [])
+
+        # 等待歸還的程序結束後，不再要求歸還
+        restarted.release_all()
+        self.assertEqual(ownerships[2].try_takeover(), [0])
+        waiting = ShardOwnership(0, 3, TMP_DIR)
+        self.assertFalse(waiting.acquire_home())
+        waiting.release_all()
+        self.assertEqual(ownerships[2].release_reclaimed(), [])
+        self.assertEqual(ownerships[2].owned, {0, 2})
+
+        for ownership in ownerships:
+            ownership.release_all()
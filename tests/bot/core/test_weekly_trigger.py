@@ -0,0 +1,69 @@
+import random
+import unittest
+import pytz
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from apscheduler.triggers.cron import CronTrigger
+from bot.core.weekly_trigger import WeeklyTrigger, WEEKDAY_NAMES
+
+TIMEZONE = ZoneInfo("Asia/Taipei")
+
+
+class TestWeeklyTrigger(unittest.TestCase):
+    def test_next_fire_time(self):
+        '''測試下次觸發時間'''
+        trigger = WeeklyTrigger.from_weekdays([1, 3], 8, 30, TIMEZONE)
+        now = datetime(2024, 1, 3, 8, 30, tzinfo=TIMEZONE)  # 星期三
+
+        self.assertEqual(trigger.get_next_fire_time(None, now), now)
+        self.assertEqual(
+            trigger.get_next_fire_time(now, now),
+            datetime(2024, 1, 8, 8, 30, tzinfo=TIMEZONE)
+        )
+        self.assertEqual(str(trigger), "weekly[mon,wed 08:30]")
+
+    def test_same_as_cron(self):
+        '''測試與 CronTrigger 的結果相同'''
+        rng = random.Random(0)
+        start = datetime(2024, 1, 1, tzinfo=TIMEZONE)
+        for _ in range(500):
+            weekdays = sorted(rng.sample(range(1, 8), rng.randint(1, 7)))
+            hour, minute = rng.randrange(24), rng.randrange(60)
+            now = start + timedelta(minutes=rng.randrange(60 * 24 * 14))
+
+            weekly_trigger = WeeklyTrigger.from_weekdays(weekdays, hour, minute, TIMEZONE)
+            cron_trigger = CronTrigger(
+                day_of_week=",".join(WEEKDAY_NAMES[day - 1] for day in weekdays),
+                hour=hour,
+                minute=minute,
+                timezone=TIMEZONE
+            )
+
+            previous = None
+            for _ in range(3):
+                expected = cron_trigger.get_next_fire_time(previous, now)
+                self.assertEqual(weekly_trigger.get_next_fire_time(previous, now), expected)
+                previous = now = expected
+
+    def test_pytz_timezone(self):
+        '''測試 pytz 時區 (APScheduler 3.10 的排程器時區) 不會使用 LMT 偏移'''
+        timezone = pytz.timezone("Asia/Taipei")
+        trigger = WeeklyTrigger.from_weekdays([2], 8, 0, timezone)
+        # APScheduler 3.10 的 astimezone 會保留 pytz 時區
+        trigger.timezone = timezone
+        now = timezone.localize(datetime(2026, 10, 19, 12, 0))  # 星期一
+
+        fire_time = trigger.get_next_fire_time(None, now)
+        self.assertEqual(fire_time, datetime(2026, 10, 20, 0, 0, tzinfo=pytz.utc))
+        self.assertEqual(fire_time.utcoffset(), timedelta(hours=8))
+        self.assertEqual(
+            trigger.get_next_fire_time(fire_time, fire_time),
+            datetime(2026, 10, 27, 0, 0, tzinfo=pytz.utc)
+        )
+
+    def test_invalid(self):
+        '''測試無效的設定'''
+        with self.assertRaises(ValueError):
+            WeeklyTrigger(0, 8, 0, TIMEZONE)
+        with self.assertRaises(ValueError):
+            WeeklyTrigger(1, 24, 0, TIMEZONE)
@@ -1,4 +1,7 @@
 import os
+import json
+import asyncio
+import time
 import unittest
 from bot.dao.base_dao import BaseDAO
 
@@ -111,3 +114,251 @@ class TestBaseDAO(unittest.TestCase):
         self.assertEqual(base_dao.jdata, self.format)
 
         os.remove(self.file_path)
+
+    def test_write_behind_defer_write(self):
+        '''測試延遲寫入模式不會立即寫入檔案'''
+        base_dao = BaseDAO(self.file_path, write_behind=True, flush_interval=60)
+        base_dao.jdata["test"] = 1
+        base_dao.write()
+
+        self.assertTrue(base_dao.is_dirty)
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {})
+
+        base_dao.flush()
+        self.assertFalse(base_dao.is_dirty)
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"test": 1})
+
+        base_dao.close()
+
+    def test_write_behind_close_flush(self):
+        '''測試延遲寫入模式關閉時寫入剩餘變更'''
+        base_dao = BaseDAO(self.file_path, write_behind=True, flush_interval=60)
+        for i in range(10):
+            base_dao.jdata[str(i)] = i
+            base_dao.write()
+        base_dao.close()
+
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {str(i): i for i in range(10)})
+
+    def test_write_behind_background_flush(self):
+        '''測試延遲寫入模式由背景執行緒合併寫入'''
+        base_dao = BaseDAO(self.file_path, write_behind=True, flush_interval=0.01)
+        base_dao.jdata["test"] = 1
+        base_dao.write()
+
+        content = {}
+        for _ in range(100):
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content:
+                break
+            time.sleep(0.01)
+
+        base_dao.close()
+        self.assertEqual(content, {"test": 1})
+
+    def test_atomic_write_no_tmp_file(self):
+        '''測試寫入後不殘留暫存檔'''
+        base_dao = BaseDAO(self.file_path, self.format)
+        base_dao.jdata["test1"] = 2
+        base_dao.write()
+
+        self.assertEqual(os.listdir(TMP_DIR), ["test.json"])
+
+    def test_refresh_use_cache(self):
+        '''測試檔案未變更時不重新讀取'''
+        base_dao = BaseDAO(self.file_path, self.format)
+        base_dao.jdata["test1"] = 2
+        base_dao.write()
+
+        self.assertFalse(base_dao.refresh())
+        self.assertFalse(base_dao.refresh())
+        self.assertEqual(base_dao.cache_hits, 2)
+        self.assertEqual(base_dao.cache_reloads, 0)
+        self.assertEqual(base_dao.jdata["test1"], 2)
+
+    def test_refresh_external_change(self):
+        '''測試檔案被外部修改時重新讀取'''
+        base_dao = BaseDAO(self.file_path, self.format)
+
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump({"external": "change"}, f)
+
+        self.assertTrue(base_dao.refresh())
+        self.assertEqual(base_dao.cache_reloads, 1)
+        self.assertEqual(base_dao.jdata, {"external": "change"})
+        self.assertFalse(base_dao.refresh())
+
+    def test_refresh_keep_dirty_data(self):
+        '''測試有待寫入變更時不重新讀取'''
+        base_dao = BaseDAO(self.file_path, write_behind=True, flush_interval=60)
+
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump({"external": "change"}, f)
+
+        base_dao.jdata["test"] = 1
+        base_dao.write()
+        self.assertFalse(base_dao.refresh())
+        self.assertEqual(base_dao.jdata, {"test": 1})
+
+        base_dao.close()
+
+    def test_set_and_delete(self):
+        '''測試以路徑設定與刪除資料'''
+        base_dao = BaseDAO(self.file_path)
+        base_dao.set(["a", "b", "c"], 1)
+        base_dao.set(["a", "d"], [1, 2])
+        base_dao.delete(["a", "b"])
+        base_dao.delete(["not", "exist"])
+
+        self.assertEqual(base_dao.jdata, {"a": {"d": [1, 2]}})
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"a": {"d": [1, 2]}})
+
+    def test_journal_append_only(self):
+        '''測試日誌模式只附加紀錄，不改寫快照'''
+        base_dao = BaseDAO(self.file_path, journal=True)
+        base_dao.set(["a"], 1)
+        base_dao.set(["b"], {"c": 2})
+        base_dao.delete(["a"])
+
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {})
+        self.assertEqual(base_dao.journal_records, 3)
+
+        reload_dao = BaseDAO(self.file_path, journal=True)
+        self.assertEqual(reload_dao.jdata, {"b": {"c": 2}})
+
+    def test_journal_compact(self):
+        '''測試日誌超過紀錄數時壓縮回快照'''
+        base_dao = BaseDAO(self.file_path, journal=True, journal_max_records=3)
+        for i in range(4):
+            base_dao.set([str(i)], i)
+
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"0": 0, "1": 1, "2": 2})
+        self.assertEqual(base_dao.journal_records, 1)
+
+        reload_dao = BaseDAO(self.file_path, journal=True)
+        self.assertEqual(reload_dao.jdata, {str(i): i for i in range(4)})
+
+    def test_journal_incomplete_record(self):
+        '''測試寫入中斷的日誌紀錄會被捨棄'''
+        base_dao = BaseDAO(self.file_path, journal=True)
+        base_dao.set(["a"], 1)
+        with open(base_dao.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"op":"set","path":["b"],"va')
+
+        reload_dao = BaseDAO(self.file_path, journal=True)
+        self.assertEqual(reload_dao.jdata, {"a": 1})
+
+        reload_dao.set(["c"], 3)
+        reload_dao = BaseDAO(self.file_path, journal=True)
+        self.assertEqual(reload_dao.jdata, {"a": 1, "c": 3})
+
+    def test_async_variant_order(self):
+        '''測試非同步方法依呼叫順序執行'''
+        base_dao = BaseDAO(self.file_path)
+
+        async def run():
+            await asyncio.gather(*[
+                base_dao.aset(["value"], i) for i in range(20)
+            ])
+            return await base_dao.aread()
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual(base_dao.jdata, {"value": 19})
+
+    def test_batch_single_write(self):
+        '''測試批次中的變更在離開區塊時才寫入'''
+        base_dao = BaseDAO(self.file_path)
+        with base_dao.batch():
+            base_dao.set(["a"], 1)
+            base_dao.set(["b", "c"], 2)
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), {})
+
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"a": 1, "b": {"c": 2}})
+
+    def test_batch_rollback(self):
+        '''測試批次中發生例外時還原記憶體資料且不寫入'''
+        base_dao = BaseDAO(self.file_path)
+        base_dao.set(["a"], {"b": 1})
+
+        with self.assertRaises(RuntimeError):
+            with base_dao.batch():
+                base_dao.set(["a", "b"], 2)
+                base_dao.set(["x", "y"], 3)
+                base_dao.delete(["a"])
+                raise RuntimeError
+
+        self.assertEqual(base_dao.jdata, {"a": {"b": 1}})
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"a": {"b": 1}})
+
+    def test_batch_nested_rollback(self):
+        '''測試內層批次失敗只還原內層的變更'''
+        base_dao = BaseDAO(self.file_path)
+        with base_dao.batch():
+            base_dao.set(["a"], 1)
+            try:
+                with base_dao.batch():
+                    base_dao.set(["b"], 2)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(base_dao.jdata, {"a": 1})
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"a": 1})
+
+    def test_batch_journal_single_record(self):
+        '''測試日誌模式下整批寫成一筆紀錄'''
+        base_dao = BaseDAO(self.file_path, journal=True)
+        with base_dao.batch():
+            base_dao.set(["a"], 1)
+            base_dao.set(["b"], 2)
+            base_dao.delete(["a"])
+
+        self.assertEqual(base_dao.journal_records, 1)
+        reload_dao = BaseDAO(self.file_path, journal=True)
+        self.assertEqual(reload_dao.jdata, {"b": 2})
+
+    def test_abatch(self):
+        '''測試非同步批次'''
+        base_dao = BaseDAO(self.file_path)
+
+        async def run():
+            async with base_dao.abatch() as batch:
+                batch.set(["a"], 1)
+                batch.set(["b"], 2)
+                batch.delete(["c"])
+            with self.assertRaises(RuntimeError):
+                async with base_dao.abatch() as batch:
+                    batch.set(["a"], 3)
+                    raise RuntimeError
+
+        asyncio.run(run())
+        self.assertEqual(base_dao.jdata, {"a": 1, "b": 2})
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"a": 1, "b": 2})
+
+    def test_abatch_interleaved_writer(self):
+        '''測試批次期間其他協程的寫入不屬於批次，批次還原時保留'''
+        base_dao = BaseDAO(self.file_path, journal=True)
+
+        async def run():
+            with self.assertRaises(RuntimeError):
+                async with base_dao.abatch() as batch:
+                    batch.set(["mine"], 1)
+                    await base_dao.aset(["other"], 1)
+                    raise RuntimeError
+
+        asyncio.run(run())
+        self.assertEqual(base_dao.jdata, {"other": 1})
+        reload_dao = BaseDAO(self.file_path, journal=True)
+        self.assertEqual(reload_dao.jdata, {"other": 1})
@@ -0,0 +1,137 @@
+import os
+import json
+import unittest
+from unittest import mock
+from bot.dao.bot_setting_dao import BotSettingDAO, CommandAuth
+
+TMP_DIR = "test_bot_setting_dao_dir"
+
+
+class TestBotSettingDAO(unittest.TestCase):
+    def setUp(self):
+        self.file_path = os.path.join(TMP_DIR, "bot_setting.json")
+
+        if not os.path.exists(TMP_DIR):
+            os.makedirs(TMP_DIR)
+
+    def tearDown(self):
+        if os.path.exists(TMP_DIR):
+            for file in os.listdir(TMP_DIR):
+                os.remove(os.path.join(TMP_DIR, file))
+            os.rmdir(TMP_DIR)
+
+    def create_dao(self, cog_auth):
+        '''以 cog_auth 建立設定檔'''
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump({"cog_auth": cog_auth}, f)
+        return BotSettingDAO(self.file_path)
+
+    def create_setting(self, setting):
+        '''以 setting 建立設定檔'''
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump({"cog_auth": {}, **setting}, f)
+        return BotSettingDAO(self.file_path)
+
+    def read_cog_auth(self):
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            return json.load(f)["cog_auth"]
+
+    def test_auth_snapshot(self):
+        '''測試權限快照不可變，重新讀取時建立新的快照'''
+        dao = self.create_dao({
+            "admin": {"guilds": [1], "roles": [10], "permissions": {"administrator": True}, "commands": {}}
+        })
+        snapshot = dao.auth_snapshot
+        self.assertEqual(snapshot.cogs["admin"].guilds, (1,))
+        self.assertEqual(snapshot.cogs["admin"].roles, frozenset([10]))
+        with self.assertRaises(TypeError):
+            snapshot.cogs["admin"].permissions["administrator"] = False  # type: ignore
+
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump({"cog_auth": {"admin": {"guilds": [2], "roles": [], "permissions": {}}}}, f)
+        dao.read()
+        self.assertEqual(dao.get_cog_guilds("admin"), [2])
+        self.assertEqual(snapshot.cogs["admin"].guilds, (1,))
+
+    def test_command_auth_fallback(self):
+        '''測試 command 未設定身份組或權限時沿用 cog 的設定'''
+        dao = self.create_dao({
+            "notification": {
+                "guilds": [],
+                "roles": [10, 11],
+                "permissions": {"manage_messages": True},
+                "commands": {
+                    "own": {"roles": [20], "permissions": {"administrator": True}},
+                    "inherit": {"roles": [], "permissions": {}}
+                }
+            }
+        })
+        self.assertEqual(
+            dao.get_command_auth("notification", "own"),
+            CommandAuth(frozenset([20]), {"administrator": True})
+        )
+        self.assertEqual(
+            dao.get_command_auth("notification", "inherit"),
+            CommandAuth(frozenset([10, 11]), {"manage_messages": True})
+        )
+        # 設定檔中沒有的 command
+        self.assertEqual(
+            dao.get_command_auth("notification", "missing"),
+            CommandAuth(frozenset([10, 11]), {"manage_messages": True})
+        )
+        self.assertEqual(dao.get_command_auth("Unknown", "missing"), CommandAuth(frozenset(), {}))
+
+    def test_deny_roles(self):
+        '''測試身份組為 [null] 時拒絕所有身份組，cog 設定時 command 一併沿用'''
+        dao = self.create_dao({
+            "admin": {"guilds": [], "roles": [None], "permissions": {}, "commands": {
+                "inherit": {"roles": [], "permissions": {}}
+            }},
+            "notification": {"guilds": [], "roles": [10], "permissions": {}, "commands": {
+                "deny": {"roles": [None], "permissions": {}}
+            }}
+        })
+        self.assertEqual(dao.get_cog_roles("admin"), [None])
+        self.assertIn(None, dao.get_command_auth("admin", "inherit").roles)
+        self.assertEqual(dao.get_command_auth("notification", "deny").roles, frozenset([None]))
+
+    def test_save_missing_auth(self):
+        '''測試缺少的 cog、command 權限位只寫入一次'''
+        dao = self.create_dao({
+            "notification": {"guilds": [], "roles": [10], "permissions": {}, "commands": {
+                "partial": {"roles": [20]}
+            }}
+        })
+        dao.register_cog("NewCog")
+        dao.get_command_auth("notification", "missing")
+        dao.get_command_auth("new_cog", "command")
+
+        with mock.patch.object(dao, "write", wraps=dao.write) as write:
+            dao.save_missing_auth()
+            dao.save_missing_auth()
+        self.assertEqual(write.call_count, 1)
+
+        cog_auth = self.read_cog_auth()
+        self.assertEqual(cog_auth["notification"]["commands"], {
+            "partial": {"roles": [20], "permissions": {}},
+            "missing": {"roles": [], "permissions": {}}
+        })
+        self.assertEqual(cog_auth["new_cog"]["commands"], {"command": {"roles": [], "permissions": {}}})
+        self.assertEqual(dao.get_command_auth("notification", "partial").roles, frozenset([20]))
+
+    def test_notification_scheduler_setting(self):
+        '''測試通知排程設定未設定的項目使用預設值'''
+        dao = self.create_setting({"notification_scheduler": {"process_shard_count": 4}})
+        setting = dao.get_notification_scheduler_setting()
+        self.assertEqual(setting["process_shard_count"], 4)
+        self.assertEqual(setting["misfire_policy"], "drop")
+        self.assertNotIn("notification_scheduler", dao.get_dao_setting("notification"))
+
+    def test_log_setting(self):
+        '''測試日誌設定未設定的項目使用預設值'''
+        dao = self.create_setting({"log": {"queue": True, "compress": False}})
+        setting = dao.get_log_setting()
+        self.assertTrue(setting["queue"])
+        self.assertEqual(setting["overflow_policy"], "block")
+        self.assertFalse(setting["compress"])
+        self.assertEqual(setting["rotation"], "size")
@@ -0,0 +1,64 @@
+import os
+import unittest
+from bot.dao.base_dao import BaseDAO
+from bot.dao.serializers import SERIALIZERS, Serializer, msgpack, get_serializer, detect_serializer
+
+TMP_DIR = "test_serializers_dir"
+
+TEST_DATA = {
+    "123456789012345678": {
+        "通知": {"hour": 8, "minute": 30, "weekdays": [1, 2, 7], "channel_id": 987654321098765432},
+        "empty": {}
+    },
+    "float": 1.5,
+    "none": None,
+    "bool": True
+}
+
+
+class TestSerializers(unittest.TestCase):
+    def setUp(self):
+        self.file_path = os.path.join(TMP_DIR, "test.json")
+
+        if not os.path.exists(TMP_DIR):
+            os.makedirs(TMP_DIR)
+
+    def tearDown(self):
+        if os.path.exists(TMP_DIR):
+            for file in os.listdir(TMP_DIR):
+                os.remove(os.path.join(TMP_DIR, file))
+            os.rmdir(TMP_DIR)
+
+    def test_lossless_round_trip(self):
+        '''測試各格式序列化後可還原'''
+        for name in SERIALIZERS:
+            try:
+                serializer = get_serializer(name)
+            except ImportError:
+                continue
+            content = serializer.dumps(TEST_DATA)
+            self.assertEqual(serializer.loads(content), TEST_DATA, name)
+            self.assertEqual(detect_serializer(content).loads(content), TEST_DATA, name)
+
+    def test_unknown_serializer(self):
+        '''測試未知的格式'''
+        with self.assertRaises(ValueError):
+            get_serializer("yaml")
+        with self.assertRaises(TypeError):
+            Serializer()  # type: ignore
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_convert_format(self):
+        '''測試讀取時自動判斷格式並轉換'''
+        base_dao = BaseDAO(self.file_path, serializer="msgpack")
+        base_dao.set(["data"], TEST_DATA)
+        with open(self.file_path, "rb") as f:
+            self.assertEqual(f.read(), get_serializer("msgpack").dumps({"data": TEST_DATA}))
+
+        base_dao = BaseDAO(self.file_path, serializer="compact_json")
+        self.assertEqual(base_dao.jdata, {"data": TEST_DATA})
+        with open(self.file_path, "rb") as f:
+            self.assertEqual(f.read(), get_serializer("compact_json").dumps({"data": TEST_DATA}))
+
+        base_dao = BaseDAO(self.file_path)
+        self.assertEqual(base_dao.jdata, {"data": TEST_DATA})
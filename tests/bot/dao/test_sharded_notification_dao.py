@@ -0,0 +1,139 @@
+import os
+import json
+import unittest
+from bot.dao.notification_dao import NotificationDAO
+from bot.dao.sharded_notification_dao import ShardedNotificationDAO, MANIFEST_FILENAME
+
+TMP_DIR = "test_sharded_notification_dao_dir"
+
+
+class TestShardedNotificationDAO(unittest.TestCase):
+    def setUp(self):
+        self.dir_path = os.path.join(TMP_DIR, "notification")
+
+        if not os.path.exists(TMP_DIR):
+            os.makedirs(TMP_DIR)
+
+    def tearDown(self):
+        for dir_path in (self.dir_path, TMP_DIR):
+            if os.path.exists(dir_path):
+                for file in os.listdir(dir_path):
+                    file_path = os.path.join(dir_path, file)
+                    if os.path.isfile(file_path):
+                        os.remove(file_path)
+        if os.path.exists(self.dir_path):
+            os.rmdir(self.dir_path)
+        if os.path.exists(TMP_DIR):
+            os.rmdir(TMP_DIR)
+
+    def read_manifest(self):
+        with open(os.path.join(self.dir_path, MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_hash_layout(self):
+        '''測試依 user_id 分配到固定數量的分片，重新開啟後資料相同'''
+        dao = ShardedNotificationDAO(self.dir_path, layout="hash", shard_count=4)
+        dao.add_weekly_notification(1, "a", 8, 30, [1, 3], 100)
+        dao.add_weekly_notification(5, "b", 9, 0, [2], 200)
+        dao.add_weekly_notification(2, "c", 10, 5, [7], 300)
+        dao.close()
+
+        self.assertEqual(
+            sorted(os.listdir(self.dir_path)),
+            [MANIFEST_FILENAME, "shard_001.json", "shard_002.json"]
+        )
+        self.assertEqual(self.read_manifest(), {"1": "shard_001", "5": "shard_001", "2": "shard_002"})
+
+        dao = ShardedNotificationDAO(self.dir_path, layout="hash", shard_count=4)
+        self.assertEqual(sorted(dao.get_all_user_id()), [1, 2, 5])
+        data = dao.get_weekly_notification(5, "b")
+        assert data is not None
+        self.assertEqual((data.hour, data.minute, data.weekdays, data.channel_id), (9, 0, [2], 200))
+        self.assertEqual(len(list(dao.iter_notifications())), 3)
+        dao.close()
+
+    def test_per_user_delete(self):
+        '''測試每個用戶一個檔案，用戶沒有通知時刪除分片與 manifest 紀錄'''
+        dao = ShardedNotificationDAO(self.dir_path, layout="per_user")
+        dao.add_weekly_notification(1, "a", 8, 30, [1], 100)
+        dao.add_weekly_notification(1, "b", 9, 0, [2], 100)
+        dao.add_weekly_notification(2, "c", 10, 5, [7], 200)
+        self.assertTrue(os.path.exists(os.path.join(self.dir_path, "1.json")))
+
+        dao.del_user_notification(1, "a")
+        self.assertEqual(dao.get_user_notifications(1), ["b"])
+        dao.del_user_notification(1, "b")
+        dao.del_user_notification(3, "not exist")
+
+        self.assertFalse(os.path.exists(os.path.join(self.dir_path, "1.json")))
+        self.assertEqual(dao.get_all_user_id(), [2])
+        self.assertEqual(self.read_manifest(), {"2": "2"})
+        dao.close()
+
+    def test_change_shard_count(self):
+        '''測試修改 shard_count 後已有的用戶仍依 manifest 讀寫原本的分片'''
+        dao = ShardedNotificationDAO(self.dir_path, layout="hash", shard_count=16)
+        dao.add_weekly_notification(13, "hi", 8, 30, [1], 100)
+        dao.close()
+
+        dao = ShardedNotificationDAO(self.dir_path, layout="hash", shard_count=8)
+        self.assertEqual(dao.get_user_notifications(13), ["hi"])
+        dao.add_weekly_notification(13, "bye", 9, 0, [2], 100)
+        dao.add_weekly_notification(21, "new", 9, 0, [2], 100)
+        self.assertEqual(self.read_manifest(), {"13": "shard_013", "21": "shard_005"})
+
+        dao.del_user_notification(13, "hi")
+        dao.del_user_notification(13, "bye")
+        self.assertEqual([record[:2] for record in dao.iter_notifications()], [(21, "new")])
+        self.assertEqual(sorted(os.listdir(self.dir_path)), [MANIFEST_FILENAME, "shard_005.json"])
+        dao.close()
+
+    def test_lazy_open(self):
+        '''測試 manifest 與分片一致時啟動不讀取分片，分片在第一次存取時才開啟'''
+        dao = ShardedNotificationDAO(self.dir_path, layout="per_user")
+        for user_id in range(5):
+            dao.add_weekly_notification(user_id, "a", 8, 30, [1], 100)
+        dao.close()
+
+        dao = ShardedNotificationDAO(self.dir_path, layout="per_user")
+        self.assertEqual(dao.shards, {})
+        self.assertEqual(sorted(dao.get_all_user_id()), [0, 1, 2, 3, 4])
+        self.assertEqual(dao.shards, {})
+        self.assertIsNone(dao.get_weekly_notification(9, "a"))
+        self.assertEqual(dao.get_user_notifications(3), ["a"])
+        self.assertEqual(list(dao.shards), ["3"])
+        dao.close()
+
+    def test_manifest_rebuild(self):
+        '''測試 manifest 與分片不一致時依分片重建'''
+        dao = ShardedNotificationDAO(self.dir_path, layout="hash", shard_count=4)
+        dao.add_weekly_notification(1, "a", 8, 30, [1], 100)
+        dao.add_weekly_notification(2, "b", 9, 0, [2], 200)
+        dao.close()
+
+        with open(os.path.join(self.dir_path, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"1": "shard_001", "9": "shard_001"}, f)
+
+        dao = ShardedNotificationDAO(self.dir_path, layout="hash", shard_count=4)
+        self.assertEqual(sorted(dao.get_all_user_id()), [1, 2])
+        self.assertEqual(self.read_manifest(), {"1": "shard_001", "2": "shard_002"})
+        dao.close()
+
+    def test_import_json_data(self):
+        '''測試從 notification.json 遷移，包含日誌中尚未寫回快照的通知'''
+        json_path = os.path.join(TMP_DIR, "notification.json")
+        source = NotificationDAO(json_path, journal=True)
+        source.add_weekly_notification(1, "a", 8, 30, [1, 2], 100)
+        source.add_weekly_notification(3, "b", 0, 55, [3], 300)
+        source.close()
+        self.assertTrue(os.path.getsize(source.journal_path) > 0)
+
+        dao = ShardedNotificationDAO(self.dir_path, layout="per_user")
+        count = dao.import_json_data(NotificationDAO(json_path, journal=True).jdata)
+        self.assertEqual(count, 2)
+        self.assertEqual(sorted(os.listdir(self.dir_path)), ["1.json", "3.json", MANIFEST_FILENAME])
+        dao.close()
+
+        dao = ShardedNotificationDAO(self.dir_path, layout="per_user")
+        self.assertEqual(dao.get_user_notifications(3), ["b"])
+        dao.close()
@@ -0,0 +1,156 @@
+import os
+import json
+import unittest
+from bot.dao.notification_dao import NotificationDAO
+from bot.dao.sqlite_notification_dao import SQLiteNotificationDAO, migrate_json_to_sqlite
+
+TMP_DIR = "test_sqlite_notification_dao_dir"
+
+
+class TestSQLiteNotificationDAO(unittest.TestCase):
+    def setUp(self):
+        self.db_path = os.path.join(TMP_DIR, "notification.db")
+        self.json_path = os.path.join(TMP_DIR, "notification.json")
+
+        if not os.path.exists(TMP_DIR):
+            os.makedirs(TMP_DIR)
+
+    def tearDown(self):
+        if os.path.exists(TMP_DIR):
+            for file in os.listdir(TMP_DIR):
+                os.remove(os.path.join(TMP_DIR, file))
+            os.rmdir(TMP_DIR)
+
+    def test_add_and_get_notification(self):
+        '''測試新增與取得通知'''
+        dao = SQLiteNotificationDAO(self.db_path)
+        dao.add_weekly_notification(1, "a", 8, 30, [1, 3, 5], 100)
+        dao.add_weekly_notification(1, "b", 9, 0, [2], 100)
+        dao.add_weekly_notification(2, "a", 10, 5, [7], 200)
+
+        self.assertEqual(dao.get_all_user_id(), [1, 2])
+        self.assertEqual(dao.get_user_notifications(1), ["a", "b"])
+        self.assertEqual(dao.get_user_notifications(3), [])
+
+        data = dao.get_weekly_notification(1, "a")
+        self.assertIsNotNone(data)
+        assert data is not None
+        self.assertEqual(
+            (data.hour, data.minute, data.weekdays, data.channel_id),
+            (8, 30, [1, 3, 5], 100)
+        )
+        self.assertIsNone(dao.get_weekly_notification(1, "c"))
+
+        dao.close()
+
+    def test_update_notification(self):
+        '''測試覆蓋通知時保持順序並更新星期'''
+        dao = SQLiteNotificationDAO(self.db_path)
+        dao.add_weekly_notification(1, "a", 8, 30, [1, 3, 5], 100)
+        dao.add_weekly_notification(1, "b", 9, 0, [2], 100)
+        dao.add_weekly_notification(1, "a", 7, 0, [6], 300)
+
+        self.assertEqual(dao.get_user_notifications(1), ["a", "b"])
+        data = dao.get_weekly_notification(1, "a")
+        assert data is not None
+        self.assertEqual(
+            (data.hour, data.minute, data.weekdays, data.channel_id),
+            (7, 0, [6], 300)
+        )
+
+        dao.close()
+
+    def test_iter_notifications(self):
+        '''測試一次查詢所有通知'''
+        dao = SQLiteNotificationDAO(self.db_path)
+        dao.add_weekly_notification(1, "a", 8, 30, [5, 1, 3], 100)
+        dao.add_weekly_notification(2, "b", 9, 0, [], 200)
+
+        records = [
+            (user_id, message, data.hour, data.minute, data.weekdays, data.channel_id)
+            for user_id, message, data in dao.iter_notifications()
+        ]
+        self.assertEqual(records, [
+            (1, "a", 8, 30, [1, 3, 5], 100),
+            (2, "b", 9, 0, [], 200)
+        ])
+
+        dao.close()
+
+    def test_del_notification(self):
+        '''測試刪除通知'''
+        dao = SQLiteNotificationDAO(self.db_path)
+        dao.add_weekly_notification(1, "a", 8, 30, [1, 3, 5], 100)
+        dao.del_user_notification(1, "a")
+        dao.del_user_notification(1, "not_exist")
+
+        self.assertEqual(dao.get_all_user_id(), [])
+        self.assertIsNone(dao.get_weekly_notification(1, "a"))
+        count = dao.conn.execute(
+            "SELECT COUNT(*) FROM notification_weekday").fetchone()[0]
+        self.assertEqual(count, 0)
+
+        dao.close()
+
+    def test_migrate_json_to_sqlite(self):
+        '''測試從 json 遷移資料'''
+        jdata = {
+            "1": {
+                "a": {"hour": 8, "minute": 30, "weekdays": [1, 2], "channel_id": 100},
+                "b": {"hour": 9, "minute": 0, "weekdays": [7], "channel_id": 100}
+            },
+            "2": {
+                "c": {"hour": 0, "minute": 55, "weekdays": [3], "channel_id": 200}
+            }
+        }
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump(jdata, f)
+
+        self.assertEqual(migrate_json_to_sqlite(self.json_path, self.db_path), 3)
+
+        dao = SQLiteNotificationDAO(self.db_path)
+        self.assertEqual(dao.get_all_user_id(), [1, 2])
+        self.assertEqual(dao.get_user_notifications(1), ["a", "b"])
+        data = dao.get_weekly_notification(2, "c")
+        assert data is not None
+        self.assertEqual(
+            (data.hour, data.minute, data.weekdays, data.channel_id),
+            (0, 55, [3], 200)
+        )
+        dao.close()
+
+    def test_migrate_journal(self):
+        '''測試遷移時包含日誌中尚未寫回快照的通知'''
+        source = NotificationDAO(self.json_path, journal=True)
+        source.add_weekly_notification(1, "a", 8, 30, [1], 100)
+        source.add_weekly_notification(2, "b", 9, 0, [2], 200)
+        source.close()
+
+        self.assertEqual(migrate_json_to_sqlite(self.json_path, self.db_path), 2)
+        dao = SQLiteNotificationDAO(self.db_path)
+        self.assertEqual(dao.get_all_user_id(), [1, 2])
+        dao.close()
+
+    def test_migrate_msgpack(self):
+        '''測試遷移 msgpack 格式的檔案，不轉換原檔案的格式'''
+        source = NotificationDAO(self.json_path, serializer="msgpack")
+        source.add_weekly_notification(1, "a", 8, 30, [1], 100)
+        source.close()
+        with open(self.json_path, "rb") as f:
+            content = f.read()
+
+        self.assertEqual(migrate_json_to_sqlite(self.json_path, self.db_path), 1)
+        with open(self.json_path, "rb") as f:
+            self.assertEqual(f.read(), content)
+        dao = SQLiteNotificationDAO(self.db_path)
+        self.assertEqual(dao.get_user_notifications(1), ["a"])
+        dao.close()
+
+    def test_migrate_failure(self):
+        '''測試遷移失敗時不留下資料庫'''
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"a": {"hour": 8, "weekdays": [1], "channel_id": 100}}}, f)
+
+        with self.assertRaises(KeyError):
+            migrate_json_to_sqlite(self.json_path, self.db_path)
+        self.assertEqual([file for file in os.listdir(TMP_DIR) if file.startswith("notification.db")], [])
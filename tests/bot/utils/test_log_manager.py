@@ -0,0 +1,129 @@
+import os
+import gzip
+import queue
+import logging
+import threading
+import unittest
+from bot.utils.log_manager import DrainingQueueListener, OverflowQueueHandler, create_file_handler
+
+TMP_DIR = "test_log_manager_dir"
+
+
+class ListHandler(logging.Handler):
+    '''記錄格式化後的日誌，可以暫停處理以填滿佇列'''
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+        self.resume = threading.Event()
+        self.resume.set()
+
+    def emit(self, record):
+        self.resume.wait()
+        self.threads.add(threading.current_thread())
+        self.messages.append(self.format(record))
+
+
+class TestLogManager(unittest.TestCase):
+    def setUp(self):
+        if not os.path.exists(TMP_DIR):
+            os.makedirs(TMP_DIR)
+
+    def tearDown(self):
+        if os.path.exists(TMP_DIR):
+            for file in os.listdir(TMP_DIR):
+                os.remove(os.path.join(TMP_DIR, file))
+            os.rmdir(TMP_DIR)
+
+    def create_logger(self, name, handler):
+        logger = logging.getLogger(name)
+        logger.propagate = False
+        logger.handlers.clear()
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        return logger
+
+    def test_drop_new(self):
+        '''測試佇列已滿時捨棄新的日誌'''
+        handler = OverflowQueueHandler(queue.Queue(2), "drop_new")
+        logger = self.create_logger("test_drop_new", handler)
+        for i in range(5):
+            logger.info(f"message {i}")
+
+        self.assertEqual(3, handler.dropped)
+        self.assertEqual(["message 0", "message 1"], [handler.queue.get().msg for _ in range(2)])
+
+    def test_drop_old(self):
+        '''測試佇列已滿時捨棄最舊的日誌'''
+        handler = OverflowQueueHandler(queue.Queue(2), "drop_old")
+        logger = self.create_logger("test_drop_old", handler)
+        for i in range(5):
+            logger.info(f"message {i}")
+
+        self.assertEqual(3, handler.dropped)
+        self.assertEqual(["message 3", "message 4"], [handler.queue.get().msg for _ in range(2)])
+
+    def test_invalid_policy(self):
+        '''測試無效的處理方式'''
+        with self.assertRaises(ValueError):
+            OverflowQueueHandler(queue.Queue(), "unknown")
+
+    def test_listener_drain(self):
+        '''測試在背景執行緒格式化，停止時寫入佇列中剩餘的日誌'''
+        log_queue = queue.Queue(3)
+        target = ListHandler()
+        target.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+        listener = DrainingQueueListener(log_queue, target, respect_handler_level=True)
+        logger = self.create_logger("test_listener_drain", OverflowQueueHandler(log_queue, "block"))
+
+        listener.start()
+        target.resume.clear()
+        for i in range(4):
+            logger.info("message %d", i)
+        target.resume.set()
+        listener.stop()
+
+        self.assertEqual([f"INFO:message {i}" for i in range(4)], target.messages)
+        self.assertNotIn(threading.current_thread(), target.threads)
+
+    def test_size_rotation(self):
+        '''測試超過大小時輪替並壓縮，只保留 backup_count 個分段'''
+        file_path = os.path.join(TMP_DIR, "test.log")
+        handler = create_file_handler(file_path, {
+            "rotation": "size", "max_bytes": 20, "when": "midnight", "backup_count": 2, "compress": True
+        })
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = self.create_logger("test_size_rotation", handler)
+        for i in range(4):
+            logger.info("message %d %s", i, "-" * 10)
+        handler.close()
+
+        self.assertEqual(["test.log", "test.log.1.gz", "test.log.2.gz"], sorted(os.listdir(TMP_DIR)))
+        with gzip.open(os.path.join(TMP_DIR, "test.log.1.gz"), "rt") as f:
+            self.assertEqual(f"message 2 {'-' * 10}\n", f.read())
+        with open(file_path) as f:
+            self.assertEqual(f"message 3 {'-' * 10}\n", f.read())
+
+    def test_time_rotation(self):
+        '''測試定時輪替的分段壓縮後仍只保留 backup_count 個'''
+        file_path = os.path.join(TMP_DIR, "test.log")
+        handler = create_file_handler(file_path, {
+            "rotation": "time", "max_bytes": 0, "when": "midnight", "backup_count": 1, "compress": True
+        })
+        for date in ("2024-01-01", "2024-01-02"):
+            with open(f"{file_path}.{date}.gz", "wb") as f:
+                f.write(gzip.compress(b"old\n"))
+        handler.doRollover()
+        handler.close()
+
+        files = sorted(os.listdir(TMP_DIR))
+        self.assertEqual(2, len(files))
+        self.assertEqual("test.log", files[0])
+        self.assertRegex(files[1], r"^test\.log\.\d{4}-\d{2}-\d{2}\.gz$")
+        self.assertNotIn(files[1], ("test.log.2024-01-01.gz", "test.log.2024-01-02.gz"))
+
+    def test_invalid_rotation(self):
+        '''測試無效的輪替方式'''
+        with self.assertRaises(ValueError):
+            create_file_handler(os.path.join(TMP_DIR, "test.log"), {"rotation": "unknown"})